@@ -1,7 +1,10 @@
 import os
 from flask import Flask
+from sqlalchemy import inspect
 from .config import config
-from .extensions import db, jwt, cors
+from .extensions import db, jwt, cors, migrate
+from .utils import metrics
+from .utils.database import pool_stats, setup_engine
 
 
 def get_cors_origins():
@@ -28,6 +31,9 @@ def create_app(config_name='default'):
 
     # Initialiser les extensions
     db.init_app(app)
+    # Révisions du schéma (migrations/), appliquées au déploiement: flask db upgrade
+    migrate.init_app(app, db, render_as_batch=True,
+                     directory=os.path.join(os.path.dirname(app.root_path), 'migrations'))
     jwt.init_app(app)
     cors.init_app(app, resources={
         r"/api/*": {
@@ -45,15 +51,48 @@ def create_app(config_name='default'):
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(spam_bp, url_prefix='/api/spam')
 
-    # Créer les tables et l'utilisateur de test
+    # Latences par étape et endpoint /api/metrics (Prometheus)
+    metrics.init_app(app)
+
+    # Commandes de maintenance (flask stats ...)
+    from .commands import register_commands
+    register_commands(app)
+
+    # Identifiant de worker des ids générés (bail réservé en base)
+    from .services.id_workers import id_worker_leases
+    id_worker_leases.init_app(app)
+
+    # Persistance de l'historique (sync ou write-behind)
+    from .services.analysis_writer import analysis_writer
+    analysis_writer.init_app(app)
+
+    # Réglages du moteur et utilisateur de test (schéma: flask db upgrade)
     with app.app_context():
-        db.create_all()
+        setup_engine(db.engine)
         create_test_user()
 
-    # Route de santé
+    # Route de santé (publique: état et version du modèle seulement)
     @app.route('/api/health')
     def health():
-        return {'status': 'ok', 'message': 'SpamGuard API is running'}
+        from .services.spam_detector import SpamDetector
+        return {
+            'status': 'ok',
+            'message': 'SpamGuard API is running',
+            'model': {'version': SpamDetector.model_info()['version']}
+        }
+
+    # Détails d'exploitation, protégés comme /api/metrics
+    @app.route('/api/health/details')
+    def health_details():
+        from .services.spam_detector import SpamDetector
+        denied = metrics.metrics_denied()
+        if denied is not None:
+            return denied
+        return {
+            'model': SpamDetector.model_info(),
+            'cache': SpamDetector.cache_stats(),
+            'database': pool_stats(db.engine)
+        }
 
     return app
 
@@ -68,6 +107,10 @@ def create_test_user():
     if not test_email or not test_password:
         return
 
+    if not inspect(db.engine).has_table(User.__tablename__):
+        print("[TEST USER] Table users absente, lancer d'abord: flask --app run db upgrade")
+        return
+
     # Vérifier si l'utilisateur existe déjà
     existing_user = User.query.filter_by(email=test_email.lower()).first()
 
@@ -0,0 +1,72 @@
+"""
+Commandes Flask de maintenance
+==============================
+
+    flask --app run stats rebuild [--user-id ID]
+    flask --app run stats check [--user-id ID]
+    flask --app run feedback apply [--batch-size N] [--watch SECONDS]
+"""
+
+import sys
+import time
+
+import click
+from flask.cli import AppGroup
+
+from .extensions import db
+from .models.stats import UserSpamStats
+
+stats_cli = AppGroup('stats', help='Statistiques agrégées par utilisateur.')
+feedback_cli = AppGroup('feedback', help='Corrections des utilisateurs.')
+
+
+@stats_cli.command('rebuild')
+@click.option('--user-id', type=int, default=None, help='Limiter à un utilisateur')
+def rebuild_stats(user_id):
+    """Recalculer les rollups depuis spam_analyses."""
+    with db.engine.begin() as conn:
+        count = UserSpamStats.rebuild(conn, user_id)
+    print(f"[Stats] Rollups recalculés pour {count} utilisateur(s)")
+
+
+@stats_cli.command('check')
+@click.option('--user-id', type=int, default=None, help='Limiter à un utilisateur')
+def check_stats(user_id):
+    """Comparer les rollups à l'agrégat brut (code de sortie 1 si écart)."""
+    mismatches = UserSpamStats.check(user_id)
+    for mismatch in mismatches:
+        print(f"[Stats] Utilisateur {mismatch['user_id']}: "
+              f"attendu {mismatch['expected']}, trouvé {mismatch['actual']}")
+    if mismatches:
+        print(f"[Stats] {len(mismatches)} utilisateur(s) incohérent(s), "
+              "corriger avec: flask stats rebuild")
+        sys.exit(1)
+    print("[Stats] Rollups cohérents")
+
+
+@feedback_cli.command('apply')
+@click.option('--batch-size', type=int, default=None, help='Corrections par mini-lot')
+@click.option('--watch', type=float, default=None,
+              help='Recommencer toutes les N secondes au lieu de quitter')
+def apply_feedback(batch_size, watch):
+    """Appliquer les corrections en attente au modèle (partial_fit)."""
+    from .services.online_learning import FEEDBACK_BATCH_SIZE, update_from_feedback
+
+    while True:
+        result = update_from_feedback(batch_size or FEEDBACK_BATCH_SIZE)
+        db.session.remove()
+        if result['applied']:
+            print(f"[Feedback] {result['applied']} correction(s) appliquée(s), "
+                  f"{result['new_terms']} nouveau(x) terme(s), "
+                  f"dernier id {result['last_id']}: modèle publié")
+        elif watch is None:
+            print("[Feedback] Aucune correction en attente")
+        if watch is None:
+            break
+        time.sleep(watch)
+
+
+def register_commands(app):
+    """Enregistre les commandes CLI de l'application."""
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(feedback_cli)
@@ -1,6 +1,8 @@
 import os
 from datetime import timedelta
 
+from .utils.database import TimedQueuePool
+
 
 def get_database_url():
     """
@@ -19,6 +21,34 @@ def get_database_url():
     return 'sqlite:///' + os.path.join(os.path.dirname(os.path.dirname(__file__)), 'spam_detector.db')
 
 
+def get_engine_options(database_url):
+    """
+    Options du moteur SQLAlchemy (pool de connexions) selon la base.
+
+    PostgreSQL: pool borné, connexions recyclées et vérifiées avant usage
+    (Render coupe les connexions inactives de la base gratuite), et délai
+    maximum par requête SQL. SQLite: pool par défaut, les PRAGMA (WAL,
+    synchronous, busy_timeout) étant appliqués à la connexion
+    (utils.database.setup_engine).
+    """
+    if database_url.startswith('sqlite'):
+        # :memory: utilise un pool à connexion unique par thread
+        return {} if ':memory:' in database_url else {'poolclass': TimedQueuePool}
+
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 280)),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+    }
+    statement_timeout = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 0))
+    if statement_timeout and database_url.startswith('postgresql'):
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+    return options
+
+
 class Config:
     """Configuration de base"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
@@ -26,6 +56,7 @@ class Config:
     # Database (PostgreSQL en production, SQLite en développement)
     SQLALCHEMY_DATABASE_URI = get_database_url()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = get_engine_options(SQLALCHEMY_DATABASE_URI)
 
     # JWT Configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key-change-in-production'
@@ -34,6 +65,25 @@ class Config:
     JWT_HEADER_NAME = 'Authorization'
     JWT_HEADER_TYPE = 'Bearer'
 
+    # Jeton exigé par /api/metrics (sans jeton: requêtes locales uniquement)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Analyse par lot (nombre maximum de textes par requête)
+    SPAM_BATCH_MAX_SIZE = int(os.environ.get('SPAM_BATCH_MAX_SIZE', 1000))
+
+    # Persistance de l'historique: 'sync' (commit avant réponse) ou 'async' (write-behind)
+    ANALYSIS_WRITE_MODE = os.environ.get('ANALYSIS_WRITE_MODE', 'sync')
+    ANALYSIS_FLUSH_SIZE = int(os.environ.get('ANALYSIS_FLUSH_SIZE', 100))
+    ANALYSIS_FLUSH_INTERVAL = float(os.environ.get('ANALYSIS_FLUSH_INTERVAL', 1.0))
+    ANALYSIS_FLUSH_RETRIES = int(os.environ.get('ANALYSIS_FLUSH_RETRIES', 3))
+    ANALYSIS_QUEUE_MAX = int(os.environ.get('ANALYSIS_QUEUE_MAX', 10000))
+    ANALYSIS_DEAD_LETTER_PATH = os.environ.get('ANALYSIS_DEAD_LETTER_PATH') or os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), 'analysis_dead_letter.jsonl'
+    )
+
+    # Bail de l'identifiant de worker des ids générés (secondes)
+    ID_WORKER_LEASE_TTL = float(os.environ.get('ID_WORKER_LEASE_TTL', 300))
+
 
 class DevelopmentConfig(Config):
     """Configuration de développement"""
@@ -49,6 +99,7 @@ class TestingConfig(Config):
     """Configuration de test"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = get_engine_options(SQLALCHEMY_DATABASE_URI)
 
 
 config = {
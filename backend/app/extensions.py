@@ -1,8 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
+from flask_migrate import Migrate
 
 # Initialisation des extensions
 db = SQLAlchemy()
 jwt = JWTManager()
 cors = CORS()
+migrate = Migrate()
@@ -1,4 +1,8 @@
 from .user import User
 from .analysis import SpamAnalysis
+from .stats import UserSpamStats, UserSpamStatsHourly
+from .feedback import SpamFeedback
+from .id_worker import IdWorkerLease
 
-__all__ = ['User', 'SpamAnalysis']
+__all__ = ['User', 'SpamAnalysis', 'UserSpamStats', 'UserSpamStatsHourly', 'SpamFeedback',
+           'IdWorkerLease']
@@ -1,46 +1,253 @@
 from datetime import datetime
-import json
+from sqlalchemy import case, func, select, tuple_, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
 from ..extensions import db
+from ..services.text_features import FLAG_NAMES
+
+# Longueur de l'aperçu du texte dans les listes
+PREVIEW_LENGTH = 60
+
+# Champs de la vue liste de l'historique (?fields=), dans l'ordre de to_dict
+LIST_FIELDS = (
+    'id', 'text', 'full_text', 'isSpam', 'confidence',
+    'indicators', 'flags', 'time', 'date', 'analyzed_at'
+)
+# Le texte complet (jusqu'à 10k caractères) n'est envoyé que sur demande
+DEFAULT_LIST_FIELDS = tuple(field for field in LIST_FIELDS if field != 'full_text')
+
+
+def flags_to_mask(flags_dict):
+    """Encoder les flags en entier (un bit par flag de FLAG_NAMES)"""
+    mask = 0
+    for bit, name in enumerate(FLAG_NAMES):
+        if flags_dict.get(name):
+            mask |= 1 << bit
+    return mask
+
+
+def mask_to_flags(mask):
+    """Décoder un masque de flags en dictionnaire"""
+    return {name: bool(mask >> bit & 1) for bit, name in enumerate(FLAG_NAMES)}
 
 
 class SpamAnalysis(db.Model):
     """Modèle pour stocker l'historique des analyses de spam"""
     __tablename__ = 'spam_analyses'
+    __table_args__ = (
+        # Historique d'un utilisateur: l'id départage les analyses de même
+        # date et sert de clé à la pagination par curseur
+        db.Index('ix_spam_analyses_user_analyzed_at_id', 'user_id', 'analyzed_at', 'id'),
+        # Comptage des spams d'un utilisateur; les colonnes suivantes rendent
+        # l'index couvrant pour aggregate_stats (pas d'accès à la table)
+        db.Index('ix_spam_analyses_user_is_spam', 'user_id', 'is_spam',
+                 'analyzed_at', 'confidence'),
+        # Recherche par indicateur (opérateur @>), PostgreSQL uniquement
+        db.Index('ix_spam_analyses_indicators_gin', 'indicators',
+                 postgresql_using='gin',
+                 postgresql_ops={'indicators': 'jsonb_path_ops'}).ddl_if(dialect='postgresql'),
+    )
 
-    id = db.Column(db.Integer, primary_key=True)
+    # Autoincrément de la base en mode d'écriture sync; en mode async, id
+    # généré côté application avant la mise en file (utils.ids). Les ids
+    # générés (horodatés, ~2^52) restent au-dessus de ceux de la séquence,
+    # qui reprend après le plus grand id existant
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     text = db.Column(db.Text, nullable=False)
     is_spam = db.Column(db.Boolean, nullable=False)
     confidence = db.Column(db.Float, nullable=False)
-    indicators = db.Column(db.Text)  # JSON array stocké comme texte
-    flags = db.Column(db.Text)  # JSON object stocké comme texte
+    # Liste JSON (JSONB sur PostgreSQL, texte JSON1 sur SQLite)
+    indicators = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'))
+    flags_mask = db.Column(db.Integer, nullable=False, default=0,
+                           server_default='0')  # Un bit par flag (FLAG_NAMES)
     analyzed_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     def set_indicators(self, indicators_list):
         """Stocker les indicateurs comme JSON"""
-        self.indicators = json.dumps(indicators_list)
+        self.indicators = list(indicators_list)
 
     def get_indicators(self):
         """Récupérer les indicateurs comme liste"""
-        if self.indicators:
-            return json.loads(self.indicators)
-        return []
+        return self.indicators or []
 
     def set_flags(self, flags_dict):
-        """Stocker les flags comme JSON"""
-        self.flags = json.dumps(flags_dict)
+        """Stocker les flags comme masque de bits"""
+        self.flags_mask = flags_to_mask(flags_dict)
 
     def get_flags(self):
         """Récupérer les flags comme dictionnaire"""
-        if self.flags:
-            return json.loads(self.flags)
-        return {}
+        return mask_to_flags(self.flags_mask or 0)
+
+    @classmethod
+    def aggregate_stats(cls, user_id, since):
+        """
+        Calculer les statistiques d'un utilisateur en une seule requête.
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+            since (datetime): Début de la fenêtre récente
+
+        Returns:
+            dict: total, spam, avg_confidence, recent_total, recent_spam
+        """
+        is_spam = cls.is_spam == True  # noqa: E712
+        recent = cls.analyzed_at >= since
+        row = db.session.query(
+            func.count(),
+            func.count().filter(is_spam),
+            func.avg(cls.confidence),
+            func.count().filter(recent),
+            func.count().filter(is_spam & recent)
+        ).filter(cls.user_id == user_id).one()
+
+        return {
+            'total': row[0],
+            'spam': row[1],
+            'avg_confidence': row[2],
+            'recent_total': row[3],
+            'recent_spam': row[4]
+        }
+
+    @classmethod
+    def history_order(cls):
+        """Ordre de l'historique: plus récentes d'abord, id en départage"""
+        return (cls.analyzed_at.desc(), cls.id.desc())
+
+    @classmethod
+    def history_filters(cls, flags=(), indicators=()):
+        """
+        Critères SQL pour filtrer l'historique (tous doivent être vérifiés).
+
+        Args:
+            flags (list): Noms de flags qui doivent être levés (FLAG_NAMES)
+            indicators (list): Indicateurs qui doivent être présents
+
+        Raises:
+            ValueError: si un flag est inconnu
+        """
+        criteria = []
+        for name in flags:
+            if name not in FLAG_NAMES:
+                raise ValueError(f"Flag inconnu: {name}")
+            criteria.append(cls.flags_mask.op('&')(1 << FLAG_NAMES.index(name)) != 0)
+
+        for indicator in indicators:
+            if db.engine.dialect.name == 'postgresql':
+                # Contenance JSONB, servie par l'index GIN
+                criteria.append(type_coerce(cls.indicators, JSONB).contains([indicator]))
+            else:
+                elements = func.json_each(cls.indicators).table_valued('value')
+                criteria.append(
+                    select(1).select_from(elements)
+                    .where(elements.c.value == indicator).exists()
+                )
+        return criteria
+
+    @classmethod
+    def list_columns(cls, fields):
+        """
+        Colonnes à lire pour la vue liste, l'aperçu étant calculé en SQL.
+
+        id et analyzed_at sont toujours lus (clé de pagination).
+        """
+        columns = [cls.id, cls.analyzed_at]
+        if 'text' in fields:
+            columns.append(case(
+                (func.length(cls.text) > PREVIEW_LENGTH,
+                 func.substr(cls.text, 1, PREVIEW_LENGTH) + '...'),
+                else_=cls.text
+            ).label('preview'))
+        if 'full_text' in fields:
+            columns.append(cls.text)
+        if 'isSpam' in fields:
+            columns.append(cls.is_spam)
+        if 'confidence' in fields:
+            columns.append(cls.confidence)
+        if 'indicators' in fields:
+            columns.append(cls.indicators)
+        if 'flags' in fields:
+            columns.append(cls.flags_mask)
+        return columns
+
+    @staticmethod
+    def list_item(row, fields):
+        """Sérialiser une ligne lue avec list_columns (mêmes clés que to_dict)"""
+        item = {}
+        if 'id' in fields:
+            item['id'] = row.id
+        if 'text' in fields:
+            item['text'] = row.preview
+        if 'full_text' in fields:
+            item['full_text'] = row.text
+        if 'isSpam' in fields:
+            item['isSpam'] = row.is_spam
+        if 'confidence' in fields:
+            item['confidence'] = row.confidence
+        if 'indicators' in fields:
+            item['indicators'] = row.indicators or []
+        if 'flags' in fields:
+            item['flags'] = mask_to_flags(row.flags_mask or 0)
+        if 'time' in fields or 'date' in fields or 'analyzed_at' in fields:
+            # Un seul formatage: HH:MM et YYYY-MM-DD sont extraits de l'ISO
+            analyzed_at = row.analyzed_at.isoformat()
+            if 'time' in fields:
+                item['time'] = analyzed_at[11:16]
+            if 'date' in fields:
+                item['date'] = analyzed_at[:10]
+            if 'analyzed_at' in fields:
+                item['analyzed_at'] = analyzed_at
+        return item
+
+    @classmethod
+    def keyset_page(cls, user_id, limit, after=None, before=None, columns=None,
+                    criteria=()):
+        """
+        Lire une page de l'historique par clé (analyzed_at, id), sans OFFSET.
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+            limit (int): Nombre maximum de lignes
+            after (tuple): Clé de la dernière ligne vue (lignes plus anciennes)
+            before (tuple): Clé de la première ligne vue (lignes plus récentes)
+            columns (list): Colonnes à lire (list_columns); par défaut les
+                objets SpamAnalysis complets
+            criteria (list): Filtres supplémentaires (history_filters)
+
+        Returns:
+            tuple: (analyses dans l'ordre de l'historique, True s'il reste
+            des lignes au-delà de la page dans le sens de lecture)
+        """
+        key = tuple_(cls.analyzed_at, cls.id)
+        query = db.session.query(*columns) if columns else cls.query
+        query = query.filter(cls.user_id == user_id, *criteria)
+
+        if before is not None:
+            # Lecture vers les plus récentes, puis remise dans l'ordre
+            rows = query.filter(key > tuple_(*before)) \
+                .order_by(cls.analyzed_at.asc(), cls.id.asc()) \
+                .limit(limit + 1).all()
+            has_more = len(rows) > limit
+            return rows[:limit][::-1], has_more
+
+        if after is not None:
+            query = query.filter(key < tuple_(*after))
+        rows = query.order_by(*cls.history_order()).limit(limit + 1).all()
+        return rows[:limit], len(rows) > limit
+
+    def to_row(self):
+        """Valeurs des colonnes, pour une insertion groupée hors session"""
+        if self.analyzed_at is None:
+            self.analyzed_at = datetime.utcnow()
+        return {
+            column.name: getattr(self, column.name)
+            for column in self.__table__.columns
+        }
 
     def to_dict(self):
         """Convertir en dictionnaire pour l'API"""
         return {
             'id': self.id,
-            'text': self.text[:60] + '...' if len(self.text) > 60 else self.text,
+            'text': self.text[:PREVIEW_LENGTH] + '...' if len(self.text) > PREVIEW_LENGTH else self.text,
             'full_text': self.text,
             'isSpam': self.is_spam,
             'confidence': self.confidence,
@@ -0,0 +1,31 @@
+from datetime import datetime
+from ..extensions import db
+
+# Libellés acceptés (classes du modèle)
+FEEDBACK_LABELS = ('spam', 'ham')
+
+
+class SpamFeedback(db.Model):
+    """Correction d'un utilisateur: le libellé attendu pour un texte"""
+    __tablename__ = 'spam_feedback'
+
+    # Id croissant: le modèle publié mémorise le dernier id appliqué
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    # Analyse corrigée (facultative, l'historique peut être supprimé)
+    analysis_id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), nullable=True)
+    text = db.Column(db.Text, nullable=False)
+    label = db.Column(db.String(4), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def to_dict(self):
+        """Convertir en dictionnaire pour l'API"""
+        return {
+            'id': self.id,
+            'analysisId': self.analysis_id,
+            'label': self.label,
+            'created_at': self.created_at.isoformat()
+        }
+
+    def __repr__(self):
+        return f'<SpamFeedback {self.id} {self.label}>'
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+
+
+class IdWorkerLease(db.Model):
+    """Identifiant de worker des ids (utils.ids) réservé par un processus"""
+    __tablename__ = 'id_worker_leases'
+
+    worker_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    # hôte:pid:aléa du processus détenteur
+    owner = db.Column(db.String(64), nullable=False)
+    # Bail renouvelé par le détenteur; libre une fois expiré
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    @classmethod
+    def claim(cls, owner, ttl, max_workers):
+        """
+        Réserver le plus petit identifiant libre.
+
+        Les baux expirés (processus arrêté sans libérer le sien) sont
+        d'abord supprimés. Deux processus qui visent le même identifiant
+        sont départagés par la clé primaire.
+
+        Args:
+            owner (str): Détenteur du bail
+            ttl (float): Durée du bail en secondes
+            max_workers (int): Nombre d'identifiants disponibles
+
+        Returns:
+            int: Identifiant réservé
+
+        Raises:
+            RuntimeError: si tous les identifiants sont réservés
+        """
+        table = cls.__table__
+        now = datetime.utcnow()
+        with db.engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.expires_at < now))
+            taken = set(conn.execute(select(table.c.worker_id)).scalars())
+
+        for worker_id in range(max_workers):
+            if worker_id in taken:
+                continue
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(insert(table).values(
+                        worker_id=worker_id, owner=owner,
+                        expires_at=now + timedelta(seconds=ttl)
+                    ))
+                return worker_id
+            except IntegrityError:
+                continue  # Réservé entre-temps par un autre processus
+
+        raise RuntimeError(
+            f"Aucun identifiant de worker libre ({max_workers} baux actifs)"
+        )
+
+    @classmethod
+    def renew(cls, worker_id, owner, ttl):
+        """Prolonger un bail; False s'il a expiré et changé de détenteur."""
+        table = cls.__table__
+        with db.engine.begin() as conn:
+            renewed = conn.execute(
+                update(table)
+                .where(table.c.worker_id == worker_id, table.c.owner == owner)
+                .values(expires_at=datetime.utcnow() + timedelta(seconds=ttl))
+            ).rowcount
+        return renewed == 1
+
+    @classmethod
+    def release(cls, worker_id, owner):
+        """Libérer un bail (arrêt normal du processus)."""
+        table = cls.__table__
+        with db.engine.begin() as conn:
+            conn.execute(delete(table).where(
+                table.c.worker_id == worker_id, table.c.owner == owner
+            ))
+
+    def __repr__(self):
+        return f'<IdWorkerLease {self.worker_id} {self.owner}>'
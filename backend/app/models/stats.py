@@ -0,0 +1,319 @@
+"""
+Statistiques agrégées par utilisateur (rollup)
+==============================================
+
+/api/spam/stats lisait tout l'historique de l'utilisateur à chaque
+rafraîchissement du tableau de bord. Les totaux sont maintenant tenus à
+jour à chaque écriture, dans la même transaction que l'historique:
+
+- user_spam_stats        : total, nombre de spams, somme des confiances
+- user_spam_stats_hourly : compteurs par heure pour la fenêtre de 24h
+
+La lecture devient un accès par clé primaire plus au plus 24 petits
+compteurs horaires. La fenêtre couvre exactement les dernières 24h,
+comme l'ancien /stats: les heures entières viennent des compteurs, et
+l'heure la plus ancienne, qui ne compte qu'en partie, est comptée dans
+spam_analyses à partir de maintenant - 24h (au plus une heure
+d'historique, par l'index (user_id, analyzed_at)).
+
+rebuild() recalcule les rollups depuis spam_analyses et check() les
+compare à l'agrégat brut (commandes `flask stats rebuild` / `flask stats
+check`).
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..extensions import db
+
+RECENT_WINDOW = timedelta(hours=24)
+
+# Écart toléré sur la somme des confiances (additions flottantes successives)
+CONFIDENCE_TOLERANCE = 1e-6
+
+
+def hour_bucket(moment):
+    """Début de l'heure contenant `moment`."""
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def recent_cutoff(now=None):
+    """Début de la plus ancienne heure conservée (celle qui contient now - 24h)."""
+    return hour_bucket((now or datetime.utcnow()) - RECENT_WINDOW)
+
+
+def _upsert(table, rows, key_columns, increment=True):
+    """
+    INSERT ... ON CONFLICT DO UPDATE (PostgreSQL et SQLite).
+
+    Avec increment=True les compteurs existants sont augmentés des valeurs
+    insérées, sinon ils sont remplacés.
+    """
+    dialect = postgresql if db.engine.dialect.name == 'postgresql' else sqlite
+    stmt = dialect.insert(table).values(rows)
+    value_columns = [name for name in rows[0] if name not in key_columns]
+    if increment:
+        set_ = {name: table.c[name] + stmt.excluded[name] for name in value_columns}
+    else:
+        set_ = {name: stmt.excluded[name] for name in value_columns}
+    return stmt.on_conflict_do_update(index_elements=key_columns, set_=set_)
+
+
+class UserSpamStats(db.Model):
+    """Totaux courants des analyses d'un utilisateur"""
+    __tablename__ = 'user_spam_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    spam = db.Column(db.Integer, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+    @classmethod
+    def apply(cls, executor, rows, sign=1):
+        """
+        Répercuter des analyses insérées (sign=1) ou supprimées (sign=-1).
+
+        Doit être appelée dans la transaction qui modifie spam_analyses.
+
+        Args:
+            executor: Session ou Connection de la transaction en cours
+            rows (list): dicts avec user_id, is_spam, confidence, analyzed_at
+            sign (int): 1 pour une insertion, -1 pour une suppression
+        """
+        if not rows:
+            return
+
+        cutoff = recent_cutoff()
+        totals = defaultdict(lambda: [0, 0, 0.0])
+        buckets = defaultdict(lambda: [0, 0])
+        for row in rows:
+            spam = 1 if row['is_spam'] else 0
+            entry = totals[row['user_id']]
+            entry[0] += 1
+            entry[1] += spam
+            entry[2] += row['confidence']
+            hour = hour_bucket(row['analyzed_at'])
+            if hour >= cutoff:
+                bucket = buckets[(row['user_id'], hour)]
+                bucket[0] += 1
+                bucket[1] += spam
+
+        table = cls.__table__
+        hourly = UserSpamStatsHourly.__table__
+
+        if sign > 0:
+            executor.execute(_upsert(table, [
+                {'user_id': user_id, 'total': t, 'spam': s, 'confidence_sum': c}
+                for user_id, (t, s, c) in totals.items()
+            ], ['user_id']))
+            if buckets:
+                executor.execute(_upsert(hourly, [
+                    {'user_id': user_id, 'hour': hour, 'total': t, 'spam': s}
+                    for (user_id, hour), (t, s) in buckets.items()
+                ], ['user_id', 'hour']))
+            # Les heures sorties de la fenêtre ne sont plus lues
+            executor.execute(delete(hourly).where(
+                hourly.c.user_id.in_(list(totals)), hourly.c.hour < cutoff
+            ))
+            return
+
+        for user_id, (t, s, c) in totals.items():
+            executor.execute(update(table).where(table.c.user_id == user_id).values(
+                total=table.c.total - t,
+                spam=table.c.spam - s,
+                confidence_sum=table.c.confidence_sum - c
+            ))
+        for (user_id, hour), (t, s) in buckets.items():
+            executor.execute(update(hourly).where(
+                hourly.c.user_id == user_id, hourly.c.hour == hour
+            ).values(total=hourly.c.total - t, spam=hourly.c.spam - s))
+
+    @classmethod
+    def reset(cls, executor, user_id):
+        """Remettre à zéro les statistiques (historique effacé)."""
+        executor.execute(delete(cls.__table__).where(cls.user_id == user_id))
+        executor.execute(delete(UserSpamStatsHourly.__table__).where(
+            UserSpamStatsHourly.user_id == user_id
+        ))
+
+    @classmethod
+    def read(cls, user_id, now=None):
+        """
+        Lire les statistiques d'un utilisateur sans parcourir l'historique.
+
+        Returns:
+            dict: mêmes clés que SpamAnalysis.aggregate_stats
+        """
+        from .analysis import SpamAnalysis
+
+        now = now or datetime.utcnow()
+        cutoff = now - RECENT_WINDOW
+        first_whole_hour = hour_bucket(cutoff) + timedelta(hours=1)
+
+        stats = db.session.get(cls, user_id)
+        recent_total, recent_spam = db.session.query(
+            func.coalesce(func.sum(UserSpamStatsHourly.total), 0),
+            func.coalesce(func.sum(UserSpamStatsHourly.spam), 0)
+        ).filter(
+            UserSpamStatsHourly.user_id == user_id,
+            UserSpamStatsHourly.hour >= first_whole_hour
+        ).one()
+
+        # Heure la plus ancienne, en partie hors fenêtre: comptage exact
+        partial_total, partial_spam = db.session.query(
+            func.count(),
+            func.count().filter(SpamAnalysis.is_spam == True)  # noqa: E712
+        ).filter(
+            SpamAnalysis.user_id == user_id,
+            SpamAnalysis.analyzed_at >= cutoff,
+            SpamAnalysis.analyzed_at < first_whole_hour
+        ).one()
+
+        total = stats.total if stats else 0
+        return {
+            'total': total,
+            'spam': stats.spam if stats else 0,
+            'avg_confidence': stats.confidence_sum / total if total else None,
+            'recent_total': int(recent_total) + partial_total,
+            'recent_spam': int(recent_spam) + partial_spam
+        }
+
+    @classmethod
+    def _raw_aggregates(cls, executor, user_id=None, now=None):
+        """
+        Totaux, compteurs horaires et fenêtre exacte de 24h, recalculés
+        depuis spam_analyses.
+        """
+        from .analysis import SpamAnalysis
+
+        analyses = SpamAnalysis.__table__
+        user_filter = [analyses.c.user_id == user_id] if user_id is not None else []
+
+        totals = {
+            row.user_id: (row.total, row.spam, row.confidence_sum or 0.0)
+            for row in executor.execute(
+                select(
+                    analyses.c.user_id,
+                    func.count().label('total'),
+                    func.count().filter(analyses.c.is_spam == True).label('spam'),  # noqa: E712
+                    func.sum(analyses.c.confidence).label('confidence_sum')
+                ).where(*user_filter).group_by(analyses.c.user_id)
+            )
+        }
+
+        # La fenêtre ne couvre que 24h: l'arrondi à l'heure se fait ici
+        # plutôt qu'en SQL (date_trunc / strftime selon le dialecte)
+        now = now or datetime.utcnow()
+        buckets = defaultdict(lambda: [0, 0])
+        recent = defaultdict(lambda: [0, 0])
+        for row in executor.execute(
+            select(analyses.c.user_id, analyses.c.is_spam, analyses.c.analyzed_at)
+            .where(analyses.c.analyzed_at >= recent_cutoff(now), *user_filter)
+        ):
+            spam = 1 if row.is_spam else 0
+            bucket = buckets[(row.user_id, hour_bucket(row.analyzed_at))]
+            bucket[0] += 1
+            bucket[1] += spam
+            if row.analyzed_at >= now - RECENT_WINDOW:
+                recent[row.user_id][0] += 1
+                recent[row.user_id][1] += spam
+
+        return totals, buckets, recent
+
+    @classmethod
+    def rebuild(cls, executor, user_id=None):
+        """
+        Recalculer les rollups depuis spam_analyses (backfill ou réparation).
+
+        Les lignes sont remplacées par upsert: deux reconstructions
+        concurrentes écrivent les mêmes valeurs.
+
+        Returns:
+            int: nombre d'utilisateurs recalculés
+        """
+        table = cls.__table__
+        hourly = UserSpamStatsHourly.__table__
+        totals, buckets, _ = cls._raw_aggregates(executor, user_id)
+
+        if user_id is not None:
+            executor.execute(delete(table).where(table.c.user_id == user_id))
+            executor.execute(delete(hourly).where(hourly.c.user_id == user_id))
+        else:
+            executor.execute(delete(table))
+            executor.execute(delete(hourly))
+
+        if totals:
+            executor.execute(_upsert(table, [
+                {'user_id': uid, 'total': t, 'spam': s, 'confidence_sum': c}
+                for uid, (t, s, c) in totals.items()
+            ], ['user_id'], increment=False))
+        if buckets:
+            executor.execute(_upsert(hourly, [
+                {'user_id': uid, 'hour': hour, 'total': t, 'spam': s}
+                for (uid, hour), (t, s) in buckets.items()
+            ], ['user_id', 'hour'], increment=False))
+        return len(totals)
+
+    @classmethod
+    def check(cls, user_id=None):
+        """
+        Comparer les rollups à l'agrégat brut de spam_analyses.
+
+        Returns:
+            list: une entrée par utilisateur divergent (vide si cohérent)
+        """
+        now = datetime.utcnow()
+        totals, _, recent = cls._raw_aggregates(db.session, user_id, now)
+
+        query = cls.query if user_id is None else cls.query.filter_by(user_id=user_id)
+        user_ids = set(totals) | {stats.user_id for stats in query}
+
+        mismatches = []
+        for uid in sorted(user_ids):
+            expected_total, expected_spam, expected_sum = totals.get(uid, (0, 0, 0.0))
+            expected_recent = recent[uid]
+
+            actual = cls.read(uid, now)
+            stats = db.session.get(cls, uid)
+            actual_sum = stats.confidence_sum if stats else 0.0
+
+            if (actual['total'], actual['spam']) != (expected_total, expected_spam) or \
+                    [actual['recent_total'], actual['recent_spam']] != expected_recent or \
+                    abs(actual_sum - expected_sum) > CONFIDENCE_TOLERANCE * max(1.0, abs(expected_sum)):
+                mismatches.append({
+                    'user_id': uid,
+                    'expected': {
+                        'total': expected_total,
+                        'spam': expected_spam,
+                        'confidence_sum': expected_sum,
+                        'recent_total': expected_recent[0],
+                        'recent_spam': expected_recent[1]
+                    },
+                    'actual': {
+                        'total': actual['total'],
+                        'spam': actual['spam'],
+                        'confidence_sum': actual_sum,
+                        'recent_total': actual['recent_total'],
+                        'recent_spam': actual['recent_spam']
+                    }
+                })
+        return mismatches
+
+    def __repr__(self):
+        return f'<UserSpamStats user={self.user_id} total={self.total}>'
+
+
+class UserSpamStatsHourly(db.Model):
+    """Compteurs horaires d'un utilisateur pour la fenêtre récente"""
+    __tablename__ = 'user_spam_stats_hourly'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    hour = db.Column(db.DateTime, primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    spam = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<UserSpamStatsHourly user={self.user_id} hour={self.hour}>'
@@ -1,20 +1,26 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import func
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from flask_jwt_extended import get_jwt_identity
 from ..extensions import db
-from ..models.analysis import SpamAnalysis
+from ..models.analysis import DEFAULT_LIST_FIELDS, LIST_FIELDS, SpamAnalysis
+from ..models.feedback import FEEDBACK_LABELS, SpamFeedback
+from ..models.stats import UserSpamStats
+from ..services import bulk_scan
+from ..services.analysis_writer import analysis_writer
 from ..services.spam_detector import SpamDetector
+from ..utils.cursors import NEXT, PREV, decode_cursor, encode_cursor
+from ..utils.metrics import stage, timed_jwt_required
 from ..utils.validators import validate_text
 
 spam_bp = Blueprint('spam', __name__)
 
 
 @spam_bp.route('/analyze', methods=['POST'])
-@jwt_required()
+@timed_jwt_required()
 def analyze_spam():
     """Analyser un texte pour détecter le spam"""
     user_id = int(get_jwt_identity())
-    data = request.get_json()
+    with stage('json_parse'):
+        data = request.get_json()
 
     if not data:
         return jsonify({'error': 'Données requises'}), 400
@@ -22,7 +28,8 @@ def analyze_spam():
     text = data.get('text', '')
 
     # Validation du texte
-    valid, error = validate_text(text)
+    with stage('validate'):
+        valid, error = validate_text(text)
     if not valid:
         return jsonify({'error': error}), 400
 
@@ -43,8 +50,8 @@ def analyze_spam():
     analysis.set_indicators(result['indicators'])
     analysis.set_flags(result['flags'])
 
-    db.session.add(analysis)
-    db.session.commit()
+    # Commit immédiat (sync) ou insertion différée par lots (async)
+    analysis_writer.save([analysis])
 
     return jsonify({
         'id': analysis.id,
@@ -56,44 +63,240 @@ def analyze_spam():
     }), 200
 
 
+@spam_bp.route('/analyze/batch', methods=['POST'])
+@timed_jwt_required()
+def analyze_spam_batch():
+    """Analyser une liste de textes en une seule requête"""
+    user_id = int(get_jwt_identity())
+    with stage('json_parse'):
+        data = request.get_json()
+
+    if not data:
+        return jsonify({'error': 'Données requises'}), 400
+
+    texts = data.get('texts')
+
+    if not isinstance(texts, list) or not texts:
+        return jsonify({'error': 'Une liste de textes est requise'}), 400
+
+    max_size = current_app.config['SPAM_BATCH_MAX_SIZE']
+    if len(texts) > max_size:
+        return jsonify({'error': f'Le lot ne peut pas dépasser {max_size} textes'}), 400
+
+    # Validation de chaque texte
+    with stage('validate'):
+        for index, text in enumerate(texts):
+            if not isinstance(text, str):
+                return jsonify({'error': f'Texte {index}: format invalide'}), 400
+            valid, error = validate_text(text)
+            if not valid:
+                return jsonify({'error': f'Texte {index}: {error}'}), 400
+
+    # Analyser tous les textes en un seul passage
+    results = SpamDetector.analyze_batch(texts)
+
+    analyses = []
+    for text, result in zip(texts, results):
+        analysis = SpamAnalysis(
+            user_id=user_id,
+            text=text,
+            is_spam=bool(result['isSpam']),
+            confidence=float(result['confidence'])
+        )
+        analysis.set_indicators(result['indicators'])
+        analysis.set_flags(result['flags'])
+        analyses.append(analysis)
+
+    # Insertion groupée de tout l'historique
+    analysis_writer.save(analyses)
+
+    return jsonify({
+        'results': [
+            {
+                'id': analysis.id,
+                'isSpam': analysis.is_spam,
+                'confidence': analysis.confidence,
+                'indicators': result['indicators'],
+                'flags': result['flags'],
+                'level': SpamDetector.get_spam_level(analysis.confidence)
+            }
+            for analysis, result in zip(analyses, results)
+        ],
+        'count': len(analyses)
+    }), 200
+
+
+@spam_bp.route('/scan', methods=['POST'])
+@timed_jwt_required()
+def scan_mailbox():
+    """
+    Analyser un export de boîte mail envoyé en flux (NDJSON ou mbox).
+
+    Le corps est lu au fil de l'eau et les résultats sont renvoyés en
+    NDJSON, une ligne par message, au fur et à mesure des micro-lots.
+    Format: ?format=ndjson|mbox, sinon déduit du Content-Type.
+    ?save=1 enregistre aussi les analyses dans l'historique, par lots.
+    """
+    user_id = int(get_jwt_identity())
+
+    fmt = request.args.get('format') or bulk_scan.CONTENT_TYPES.get(request.mimetype)
+    if fmt not in bulk_scan.FORMATS:
+        return jsonify({'error': f"Format requis: {', '.join(bulk_scan.FORMATS)}"}), 400
+
+    detector = SpamDetector.get_ml_detector()
+    if detector is None:
+        return jsonify({'error': 'Modèle ML indisponible'}), 503
+
+    on_batch = None
+    if request.args.get('save', type=int):
+        def on_batch(pairs):
+            analyses = []
+            for text, result in pairs:
+                analysis = SpamAnalysis(
+                    user_id=user_id,
+                    text=text,
+                    is_spam=bool(result['isSpam']),
+                    confidence=float(result['confidence'])
+                )
+                analysis.set_indicators(result['indicators'])
+                analysis.set_flags(result['flags'])
+                analyses.append(analysis)
+            analysis_writer.save(analyses)
+
+    messages = bulk_scan.iter_messages(request.stream, fmt)
+    records = bulk_scan.scan(messages, detector, on_batch=on_batch)
+    return Response(
+        stream_with_context(bulk_scan.to_ndjson(records)),
+        mimetype='application/x-ndjson'
+    )
+
+
 @spam_bp.route('/history', methods=['GET'])
-@jwt_required()
+@timed_jwt_required()
 def get_history():
-    """Récupérer l'historique des analyses de l'utilisateur"""
+    """
+    Récupérer l'historique des analyses de l'utilisateur.
+
+    Par défaut la pagination se fait par curseur (?cursor=...), sur la clé
+    (analyzed_at, id): le coût d'une page ne dépend pas de sa profondeur.
+    Le paramètre ?page= conserve l'ancienne pagination par OFFSET.
+    Le total vient des statistiques agrégées (pas de COUNT(*)).
+
+    ?fields=id,text,... limite les champs renvoyés; le texte complet
+    (full_text) n'est inclus que s'il est demandé.
+
+    ?flag=suspiciousUrl&indicator=gratuit (répétables) filtrent
+    l'historique dans la base; le total est alors compté sur le filtre.
+    """
     user_id = int(get_jwt_identity())
+    analysis_writer.flush_user(user_id)
+
+    fields = DEFAULT_LIST_FIELDS
+    if request.args.get('fields'):
+        fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in LIST_FIELDS]
+        if unknown:
+            return jsonify({'error': f"Champs inconnus: {', '.join(unknown)}"}), 400
+        fields = set(fields)
+    columns = SpamAnalysis.list_columns(fields)
+
+    try:
+        criteria = SpamAnalysis.history_filters(
+            flags=request.args.getlist('flag'),
+            indicators=request.args.getlist('indicator')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     # Paramètres de pagination
-    page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    if per_page < 1:
+        per_page = 20
 
     # Limiter per_page à 100 max
     per_page = min(per_page, 100)
 
-    # Récupérer les analyses paginées
-    pagination = SpamAnalysis.query.filter_by(user_id=user_id) \
-        .order_by(SpamAnalysis.analyzed_at.desc()) \
-        .paginate(page=page, per_page=per_page, error_out=False)
+    if criteria:
+        total = SpamAnalysis.query.filter(SpamAnalysis.user_id == user_id, *criteria).count()
+    else:
+        stats = db.session.get(UserSpamStats, user_id)
+        total = stats.total if stats else 0
+
+    if 'page' in request.args:
+        return _history_by_page(user_id, per_page, total, fields, columns, criteria)
+
+    after = before = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            analyzed_at, analysis_id, direction = decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if direction == NEXT:
+            after = (analyzed_at, analysis_id)
+        else:
+            before = (analyzed_at, analysis_id)
+
+    items, has_more = SpamAnalysis.keyset_page(
+        user_id, per_page, after=after, before=before, columns=columns,
+        criteria=criteria
+    )
+
+    if before is not None:
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = after is not None, has_more
+
+    next_cursor = prev_cursor = None
+    if items and has_next:
+        next_cursor = encode_cursor(items[-1].analyzed_at, items[-1].id, NEXT)
+    if items and has_prev:
+        prev_cursor = encode_cursor(items[0].analyzed_at, items[0].id, PREV)
+
+    return jsonify({
+        'history': [SpamAnalysis.list_item(row, fields) for row in items],
+        'pagination': {
+            'per_page': per_page,
+            'total': total,
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor,
+            'has_next': has_next,
+            'has_prev': has_prev
+        }
+    }), 200
+
+
+def _history_by_page(user_id, per_page, total, fields, columns, criteria):
+    """Ancienne pagination par numéro de page (OFFSET), pour compatibilité"""
+    page = max(request.args.get('page', 1, type=int), 1)
+    pages = -(-total // per_page)
 
-    analyses = [analysis.to_dict() for analysis in pagination.items]
+    rows = db.session.query(*columns) \
+        .filter(SpamAnalysis.user_id == user_id, *criteria) \
+        .order_by(*SpamAnalysis.history_order()) \
+        .offset((page - 1) * per_page) \
+        .limit(per_page) \
+        .all()
 
     return jsonify({
-        'history': analyses,
+        'history': [SpamAnalysis.list_item(row, fields) for row in rows],
         'pagination': {
-            'page': pagination.page,
-            'per_page': pagination.per_page,
-            'total': pagination.total,
-            'pages': pagination.pages,
-            'has_next': pagination.has_next,
-            'has_prev': pagination.has_prev
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': pages,
+            'has_next': page < pages,
+            'has_prev': page > 1
         }
     }), 200
 
 
 @spam_bp.route('/history/<int:analysis_id>', methods=['GET'])
-@jwt_required()
+@timed_jwt_required()
 def get_analysis(analysis_id):
     """Récupérer une analyse spécifique"""
     user_id = int(get_jwt_identity())
+    analysis_writer.flush_user(user_id)
 
     analysis = SpamAnalysis.query.filter_by(
         id=analysis_id,
@@ -107,10 +310,11 @@ def get_analysis(analysis_id):
 
 
 @spam_bp.route('/history/<int:analysis_id>', methods=['DELETE'])
-@jwt_required()
+@timed_jwt_required()
 def delete_analysis(analysis_id):
     """Supprimer une analyse de l'historique"""
     user_id = int(get_jwt_identity())
+    analysis_writer.flush_user(user_id)
 
     analysis = SpamAnalysis.query.filter_by(
         id=analysis_id,
@@ -120,6 +324,7 @@ def delete_analysis(analysis_id):
     if not analysis:
         return jsonify({'error': 'Analyse non trouvée'}), 404
 
+    UserSpamStats.apply(db.session, [analysis.to_row()], sign=-1)
     db.session.delete(analysis)
     db.session.commit()
 
@@ -127,25 +332,31 @@ def delete_analysis(analysis_id):
 
 
 @spam_bp.route('/history/clear', methods=['DELETE'])
-@jwt_required()
+@timed_jwt_required()
 def clear_history():
     """Effacer tout l'historique de l'utilisateur"""
     user_id = int(get_jwt_identity())
+    analysis_writer.flush_user(user_id)
 
     SpamAnalysis.query.filter_by(user_id=user_id).delete()
+    UserSpamStats.reset(db.session, user_id)
     db.session.commit()
 
     return jsonify({'message': 'Historique effacé'}), 200
 
 
 @spam_bp.route('/stats', methods=['GET'])
-@jwt_required()
+@timed_jwt_required()
 def get_stats():
     """Récupérer les statistiques de l'utilisateur"""
     user_id = int(get_jwt_identity())
+    analysis_writer.flush_user(user_id)
+
+    # Statistiques tenues à jour à l'écriture (pas de parcours de l'historique)
+    stats = UserSpamStats.read(user_id)
 
     # Total des analyses
-    total = SpamAnalysis.query.filter_by(user_id=user_id).count()
+    total = stats['total']
 
     if total == 0:
         return jsonify({
@@ -158,39 +369,20 @@ def get_stats():
             }
         }), 200
 
-    # Nombre de spams détectés
-    spam_count = SpamAnalysis.query.filter_by(
-        user_id=user_id,
-        is_spam=True
-    ).count()
-
-    # Messages légitimes
+    # Nombre de spams détectés et messages légitimes
+    spam_count = stats['spam']
     legitimate_count = total - spam_count
 
     # Taux de spam
     spam_rate = round((spam_count / total) * 100, 1) if total > 0 else 0
 
     # Confiance moyenne
-    avg_confidence = db.session.query(
-        func.avg(SpamAnalysis.confidence)
-    ).filter_by(user_id=user_id).scalar()
-
+    avg_confidence = stats['avg_confidence']
     avg_confidence = round(avg_confidence, 1) if avg_confidence else 0
 
     # Statistiques des dernières 24h
-    from datetime import datetime, timedelta
-    last_24h = datetime.utcnow() - timedelta(hours=24)
-
-    recent_total = SpamAnalysis.query.filter(
-        SpamAnalysis.user_id == user_id,
-        SpamAnalysis.analyzed_at >= last_24h
-    ).count()
-
-    recent_spam = SpamAnalysis.query.filter(
-        SpamAnalysis.user_id == user_id,
-        SpamAnalysis.is_spam == True,
-        SpamAnalysis.analyzed_at >= last_24h
-    ).count()
+    recent_total = stats['recent_total']
+    recent_spam = stats['recent_spam']
 
     return jsonify({
         'stats': {
@@ -206,3 +398,51 @@ def get_stats():
             }
         }
     }), 200
+
+
+@spam_bp.route('/feedback', methods=['POST'])
+@timed_jwt_required()
+def submit_feedback():
+    """Signaler un faux positif ou un faux négatif
+
+    Corps: {"label": "spam"|"ham", "analysisId": ...} pour corriger une
+    analyse de l'historique, ou {"label": ..., "text": "..."}. Les
+    corrections sont appliquées au modèle par: flask feedback apply
+    """
+    user_id = int(get_jwt_identity())
+    data = request.get_json()
+
+    if not data:
+        return jsonify({'error': 'Données requises'}), 400
+
+    label = data.get('label')
+    if label not in FEEDBACK_LABELS:
+        return jsonify({'error': f"label doit valoir {' ou '.join(FEEDBACK_LABELS)}"}), 400
+
+    analysis_id = data.get('analysisId')
+    if analysis_id is not None:
+        if not isinstance(analysis_id, int) or isinstance(analysis_id, bool):
+            return jsonify({'error': 'analysisId invalide'}), 400
+        analysis_writer.flush_user(user_id)
+        analysis = db.session.execute(
+            db.select(SpamAnalysis.text).filter_by(id=analysis_id, user_id=user_id)
+        ).first()
+        if analysis is None:
+            return jsonify({'error': 'Analyse non trouvée'}), 404
+        text = analysis.text
+    else:
+        text = data.get('text', '')
+        valid, error = validate_text(text)
+        if not valid:
+            return jsonify({'error': error}), 400
+
+    feedback = SpamFeedback(
+        user_id=user_id,
+        analysis_id=analysis_id,
+        text=text,
+        label=label
+    )
+    db.session.add(feedback)
+    db.session.commit()
+
+    return jsonify({'feedback': feedback.to_dict()}), 201
@@ -0,0 +1,252 @@
+"""
+Cache des résultats d'analyse
+=============================
+
+Une grande partie du trafic est constituée de doublons exacts (la même
+campagne de spam transférée par de nombreux utilisateurs). Ce cache évite
+de recalculer la vectorisation, le score Naive Bayes et les regex.
+
+- Clé : empreinte SHA-256 du texte + version du modèle (empreinte de
+  l'artefact chargé et de la liste des mots-clés). Un nouveau modèle
+  produit donc de nouvelles clés; les anciennes entrées ne sont plus lues
+  et expirent avec le TTL.
+- Niveau 1 : LRU en mémoire du processus, bornée, avec TTL.
+- Niveau 2 (optionnel) : base SQLite locale partagée par les workers
+  gunicorn d'une même machine.
+
+Configuration (variables d'environnement):
+- SPAM_CACHE_SIZE          : nombre maximum d'entrées (0 désactive le cache)
+- SPAM_CACHE_TTL           : durée de vie d'une entrée en secondes
+- SPAM_CACHE_BACKEND       : 'memory' (défaut) ou 'sqlite'
+- SPAM_CACHE_PATH          : fichier SQLite du cache partagé
+- SPAM_CACHE_TRIM_INTERVAL : enregistrements entre deux purges du cache
+                             partagé (défaut 100)
+"""
+
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_SIZE = int(os.environ.get('SPAM_CACHE_SIZE', 10000))
+CACHE_TTL = float(os.environ.get('SPAM_CACHE_TTL', 3600))
+CACHE_BACKEND = os.environ.get('SPAM_CACHE_BACKEND', 'memory').lower()
+CACHE_PATH = os.environ.get('SPAM_CACHE_PATH') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    'model',
+    'analysis_cache.db'
+)
+CACHE_TRIM_INTERVAL = int(os.environ.get('SPAM_CACHE_TRIM_INTERVAL', 100))
+
+
+def text_digest(text):
+    """Empreinte SHA-256 (bytes) du texte exact."""
+    return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).digest()
+
+
+def _to_native(value):
+    """Convertit les scalaires NumPy en types Python pour la sérialisation JSON."""
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Type non sérialisable: {type(value).__name__}")
+
+
+class SQLiteCacheBackend:
+    """
+    Cache partagé entre processus, stocké dans une base SQLite locale.
+
+    Chaque thread garde sa propre connexion, rouverte après un fork. Le mode
+    WAL, persistant dans le fichier, est activé une seule fois à la création.
+    Les entrées expirées et celles au-delà de max_size sont supprimées tous
+    les trim_interval enregistrements, pas à chaque écriture.
+    """
+
+    def __init__(self, path, max_size, ttl, trim_interval=CACHE_TRIM_INTERVAL):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.trim_interval = max(trim_interval, 1)
+        self._local = threading.local()
+        self._sets = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS analysis_cache ('
+                ' key TEXT PRIMARY KEY,'
+                ' version TEXT NOT NULL,'
+                ' value TEXT NOT NULL,'
+                ' expires_at REAL NOT NULL)'
+            )
+            # Purge des expirées et borne de taille sans tri de la table
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS ix_analysis_cache_expires_at'
+                ' ON analysis_cache (expires_at)'
+            )
+
+    def _connection(self):
+        """Connexion du thread courant (nouvelle après un fork)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT value FROM analysis_cache WHERE key = ? AND expires_at > ?',
+            (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, version, value):
+        """Enregistre une entrée; retourne le nombre d'entrées évincées."""
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO analysis_cache VALUES (?, ?, ?, ?)',
+                (key, version, json.dumps(value, default=_to_native), time.time() + self.ttl)
+            )
+        with self._lock:
+            self._sets += 1
+            if self._sets % self.trim_interval:
+                return 0
+        return self.trim()
+
+    def trim(self):
+        """Supprime les entrées expirées, puis celles au-delà de max_size."""
+        conn = self._connection()
+        with conn:
+            evicted = conn.execute(
+                'DELETE FROM analysis_cache WHERE expires_at <= ?', (time.time(),)
+            ).rowcount
+            # Borne la taille: supprime les entrées qui expirent le plus tôt
+            evicted += conn.execute(
+                'DELETE FROM analysis_cache WHERE key IN ('
+                ' SELECT key FROM analysis_cache ORDER BY expires_at DESC'
+                ' LIMIT -1 OFFSET ?)',
+                (self.max_size,)
+            ).rowcount
+        return evicted
+
+    def clear(self):
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM analysis_cache')
+
+
+class AnalysisCache:
+    """
+    Cache LRU borné avec TTL, optionnellement adossé à un backend partagé.
+
+    Les compteurs hits/misses/evictions sont propres au processus.
+    """
+
+    def __init__(self, max_size=CACHE_SIZE, ttl=CACHE_TTL, backend=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.backend = backend
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def key(self, text, version):
+        """Clé de cache du texte pour une version de modèle donnée."""
+        return f'{version}:{text_digest(text).hex()}'
+
+    def set_version(self, version):
+        """
+        Déclare la version du modèle actif.
+
+        Si elle change (modèle ré-entraîné), le niveau 1 est vidé. Les
+        entrées du backend partagé ne sont pas supprimées: les workers ne
+        rechargent pas le modèle au même instant, et la version fait partie
+        de la clé. Celles des anciennes versions expirent avec le TTL.
+        """
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+            self.evictions += len(self._entries)
+            self._entries.clear()
+
+    def get(self, key):
+        """Retourne une copie du résultat en cache, ou None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(value)
+                del self._entries[key]
+                self.evictions += 1
+
+        value = self.backend.get(key) if self.backend is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, value, now)
+        return copy.deepcopy(value)
+
+    def set(self, key, value):
+        """Met un résultat en cache (niveau 1 et backend partagé)."""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._store(key, value, time.monotonic())
+        if self.backend is not None:
+            evicted = self.backend.set(key, self.version, value)
+            with self._lock:
+                self.evictions += evicted
+
+    def _store(self, key, value, now):
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        """Compteurs du cache pour ce processus."""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'backend': 'sqlite' if self.backend is not None else 'memory',
+                'size': len(self._entries),
+                'maxSize': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+def create_cache():
+    """Crée le cache selon la configuration d'environnement."""
+    backend = None
+    if CACHE_SIZE > 0 and CACHE_BACKEND == 'sqlite':
+        backend = SQLiteCacheBackend(CACHE_PATH, CACHE_SIZE, CACHE_TTL)
+    return AnalysisCache(CACHE_SIZE, CACHE_TTL, backend)
@@ -0,0 +1,312 @@
+"""
+Persistance de l'historique des analyses (synchrone ou write-behind)
+====================================================================
+
+En mode 'sync' (défaut), chaque analyse est insérée et validée avant la
+réponse. En mode 'async', les lignes sont placées dans une file en mémoire
+et un thread d'arrière-plan les insère par lots (INSERT multi-lignes),
+déclenché par la taille de la file ou par un intervalle. La réponse n'attend
+donc plus l'aller-retour COMMIT vers la base.
+
+En mode 'async', les ids sont générés côté application (utils.ids) et
+sont donc connus avant l'insertion; en mode 'sync', la base les attribue. La file est vidée à l'arrêt du worker (atexit).
+
+Avant une lecture de l'historique, flush_user() insère seulement les
+lignes en file de l'utilisateur qui lit, depuis la requête: elle n'attend
+ni le verrou du flush d'arrière-plan, ni les lignes des autres
+utilisateurs. Si un lot en cours d'insertion contient des lignes de cet
+utilisateur, elle attend la fin de ce seul lot. Comme la file, cette
+garantie est propre au processus.
+
+Échecs d'insertion d'un lot:
+- erreur passagère (base indisponible): le lot reste en tête de file et
+  est réessayé aux flush suivants, ANALYSIS_FLUSH_RETRIES fois au plus
+- ensuite, ou d'emblée pour une erreur propre aux données (contrainte,
+  valeur invalide): le lot est coupé en deux récursivement, les moitiés
+  valides sont insérées et chaque ligne encore en échec est écartée dans
+  le fichier ANALYSIS_DEAD_LETTER_PATH (une ligne JSON par analyse)
+- la file est bornée à ANALYSIS_QUEUE_MAX lignes: au-delà, save() insère
+  directement, comme en mode 'sync'
+Les lignes encore en file à l'arrêt du worker sont aussi écartées dans le
+fichier plutôt que perdues.
+
+Dans les deux modes, les statistiques agrégées (models.stats) sont mises à
+jour dans la même transaction que l'insertion.
+
+Configuration (app.config):
+- ANALYSIS_WRITE_MODE       : 'sync' ou 'async'
+- ANALYSIS_FLUSH_SIZE       : nombre de lignes déclenchant un flush
+- ANALYSIS_FLUSH_INTERVAL   : intervalle maximum entre deux flush (secondes)
+- ANALYSIS_FLUSH_RETRIES    : essais d'un lot avant de l'isoler ligne à ligne
+- ANALYSIS_QUEUE_MAX        : lignes en file au-delà desquelles save() insère
+                              directement
+- ANALYSIS_DEAD_LETTER_PATH : fichier des analyses écartées
+"""
+
+import atexit
+import json
+import os
+import threading
+from collections import Counter, deque
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from ..extensions import db
+from ..models.analysis import SpamAnalysis
+from ..models.stats import UserSpamStats
+from ..utils.ids import generate_id
+from ..utils.metrics import stage
+
+
+class AnalysisWriter:
+    """Extension Flask qui persiste les SpamAnalysis selon le mode configuré."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.mode = 'sync'
+        self.flush_size = 100
+        self.flush_interval = 1.0
+        self.flush_retries = 3
+        self.queue_max = 10000
+        self.dead_letter_path = None
+        self.dead_lettered = 0
+        self._failures = 0
+        self._queue = deque()
+        # Lignes en file par utilisateur, et lots en cours d'insertion
+        # par flush(): (utilisateurs du lot, événement de fin)
+        self._pending_users = Counter()
+        self._in_flight = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._pid = None
+        self._atexit_registered = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.mode = app.config.get('ANALYSIS_WRITE_MODE', 'sync')
+        self.flush_size = app.config.get('ANALYSIS_FLUSH_SIZE', 100)
+        self.flush_interval = app.config.get('ANALYSIS_FLUSH_INTERVAL', 1.0)
+        self.flush_retries = app.config.get('ANALYSIS_FLUSH_RETRIES', 3)
+        self.queue_max = app.config.get('ANALYSIS_QUEUE_MAX', 10000)
+        self.dead_letter_path = app.config.get('ANALYSIS_DEAD_LETTER_PATH')
+        if self.mode not in ('sync', 'async'):
+            raise ValueError(f"ANALYSIS_WRITE_MODE inconnu: {self.mode}")
+        if self.mode == 'async' and not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def save(self, analyses):
+        """
+        Persiste une liste d'analyses.
+
+        En mode async, les analyses reçoivent leur id immédiatement et sont
+        insérées plus tard par le thread d'arrière-plan.
+        """
+        if self.mode == 'sync':
+            rows = [analysis.to_row() for analysis in analyses]
+            with stage('db_commit'):
+                db.session.add_all(analyses)
+                UserSpamStats.apply(db.session, rows)
+                db.session.commit()
+            return
+
+        for analysis in analyses:
+            if analysis.id is None:
+                analysis.id = generate_id()
+        rows = [analysis.to_row() for analysis in analyses]
+
+        self._ensure_thread()
+        with self._lock:
+            queued = len(self._queue) + len(rows) <= self.queue_max
+            if queued:
+                self._queue.extend(rows)
+                self._pending_users.update(row['user_id'] for row in rows)
+            pending = len(self._queue)
+        if pending >= self.flush_size:
+            self._wakeup.set()
+        if not queued:
+            # File pleine (base lente ou indisponible): insertion directe
+            self._insert(rows)
+
+    def pending(self):
+        """Nombre de lignes en attente d'insertion."""
+        with self._lock:
+            return len(self._queue)
+
+    def flush(self):
+        """Insère toutes les lignes en attente (thread d'arrière-plan, arrêt)."""
+        if self.mode != 'async':
+            return 0
+
+        inserted = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [
+                        self._queue.popleft()
+                        for _ in range(min(self.flush_size, len(self._queue)))
+                    ]
+                    if not batch:
+                        return inserted
+                    for row in batch:
+                        self._pending_users[row['user_id']] -= 1
+                        if not self._pending_users[row['user_id']]:
+                            del self._pending_users[row['user_id']]
+                    in_flight = ({row['user_id'] for row in batch}, threading.Event())
+                    self._in_flight.append(in_flight)
+                try:
+                    count, done = self._insert_batch(batch)
+                finally:
+                    with self._lock:
+                        self._in_flight.remove(in_flight)
+                    in_flight[1].set()
+                inserted += count
+                if not done:
+                    return inserted
+
+    def flush_user(self, user_id):
+        """
+        Insère les lignes en attente d'un utilisateur, avant la lecture de
+        son historique (appelée depuis la requête).
+
+        Returns:
+            int: Nombre de lignes insérées par cet appel
+        """
+        if self.mode != 'async':
+            return 0
+
+        rows = []
+        with self._lock:
+            if self._pending_users[user_id] > 0:
+                kept = deque()
+                for row in self._queue:
+                    (rows if row['user_id'] == user_id else kept).append(row)
+                self._queue = kept
+                del self._pending_users[user_id]
+            batches = [done for users, done in self._in_flight if user_id in users]
+
+        inserted = self._insert_batch(rows)[0] if rows else 0
+        for done in batches:
+            done.wait()
+        return inserted
+
+    def _insert_batch(self, batch):
+        """
+        Insère un lot retiré de la file.
+
+        Returns:
+            tuple: (lignes insérées, False si le lot a été remis en tête de
+            file après une erreur passagère)
+        """
+        try:
+            self._insert(batch)
+        except Exception as e:
+            print(f"[AnalysisWriter] Erreur d'insertion ({len(batch)} lignes): {e}")
+            transient = not isinstance(e, (IntegrityError, DataError))
+            with self._lock:
+                self._failures += 1
+                if transient and self._failures < self.flush_retries:
+                    # Remettre le lot en tête de file pour le prochain flush
+                    self._queue.extendleft(reversed(batch))
+                    self._pending_users.update(row['user_id'] for row in batch)
+                    return 0, False
+                self._failures = 0
+            # Essais épuisés, ou ligne invalide: isoler les lignes fautives
+            return self._insert_isolating(batch), True
+        with self._lock:
+            self._failures = 0
+        return len(batch), True
+
+    def _insert_isolating(self, rows):
+        """
+        Insère un lot en échec moitié par moitié: les sous-lots valides sont
+        insérés, chaque ligne qui échoue seule est écartée.
+
+        Returns:
+            int: Nombre de lignes insérées
+        """
+        inserted = 0
+        middle = len(rows) // 2
+        for half in (rows[:middle], rows[middle:]):
+            if not half:
+                continue
+            try:
+                self._insert(half)
+                inserted += len(half)
+            except Exception as e:
+                if len(half) == 1:
+                    self._dead_letter(half, e)
+                else:
+                    inserted += self._insert_isolating(half)
+        return inserted
+
+    def _dead_letter(self, rows, error):
+        """Écarte des lignes impossibles à insérer (fichier JSON lines, ou log)."""
+        self.dead_lettered += len(rows)
+        ids = [row['id'] for row in rows]
+        if not self.dead_letter_path:
+            print(f"[AnalysisWriter] {len(rows)} analyse(s) abandonnee(s) {ids}: {error}")
+            return
+        try:
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(json.dumps({'row': row, 'error': str(error)}, default=str) + '\n')
+        except OSError as e:
+            print(f"[AnalysisWriter] {len(rows)} analyse(s) abandonnee(s) {ids}: {error} ({e})")
+            return
+        print(f"[AnalysisWriter] {len(rows)} analyse(s) ecartee(s) dans "
+              f"{self.dead_letter_path} {ids}: {error}")
+
+    def _insert(self, rows):
+        """INSERT multi-lignes et mise à jour des rollups, dans une transaction dédiée."""
+        with self.app.app_context(), stage('db_flush'):
+            with db.engine.begin() as conn:
+                conn.execute(SpamAnalysis.__table__.insert(), rows)
+                UserSpamStats.apply(conn, rows)
+
+    def _ensure_thread(self):
+        """Démarre le thread de flush dans le processus courant (après fork)."""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name='analysis-writer', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[AnalysisWriter] Erreur de flush: {e}")
+
+    def shutdown(self):
+        """Arrête le thread et insère les dernières lignes (arrêt du worker)."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=max(5.0, self.flush_interval * 2))
+        self.flush()
+        with self._lock:
+            remaining = list(self._queue)
+            self._queue.clear()
+            self._pending_users.clear()
+        if remaining:
+            # Base toujours indisponible: ne pas perdre les lignes en file
+            self._dead_letter(remaining, "arret du worker, base indisponible")
+
+
+# Instance partagée, initialisée par create_app()
+analysis_writer = AnalysisWriter()
@@ -0,0 +1,247 @@
+"""
+Analyse en flux d'exports de boîtes mail (NDJSON ou mbox)
+=========================================================
+
+Pipeline de générateurs: lecture ligne à ligne du flux binaire, découpage
+en messages, micro-lots de taille fixe classifiés par MLSpamDetector,
+puis un résultat par message. Seuls le message en cours et le lot en cours
+sont en mémoire, quelle que soit la taille de l'export.
+
+Formats d'entrée:
+- ndjson : un objet JSON par ligne, {"text": "...", "id": "..."} (id
+           optionnel), ou directement une chaîne JSON
+- mbox   : messages séparés par des lignes « From  » (mboxrd); le texte
+           analysé est le sujet suivi du corps text/plain (ou text/html
+           sans balises)
+
+Chaque résultat est un dict sérialisable en une ligne NDJSON:
+    {"ref": ..., "isSpam": ..., "confidence": ..., "level": ...,
+     "indicators": [...], "flags": {...}}
+ou {"ref": ..., "error": "..."} pour un message illisible.
+
+Configuration (variables d'environnement):
+- SPAM_SCAN_BATCH_SIZE        : taille des micro-lots
+- SPAM_SCAN_MAX_MESSAGE_BYTES : taille maximale lue par message
+- SPAM_SCAN_MAX_CHARS         : nombre de caractères analysés par message
+"""
+
+import email
+import html
+from email.header import decode_header, make_header
+import json
+import os
+import re
+from itertools import islice
+
+SCAN_BATCH_SIZE = int(os.environ.get('SPAM_SCAN_BATCH_SIZE', 256))
+MAX_MESSAGE_BYTES = int(os.environ.get('SPAM_SCAN_MAX_MESSAGE_BYTES', 1 << 20))
+MAX_TEXT_CHARS = int(os.environ.get('SPAM_SCAN_MAX_CHARS', 10000))
+
+FORMATS = ('ndjson', 'mbox')
+
+# Format déduit du Content-Type de la requête
+CONTENT_TYPES = {
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'application/mbox': 'mbox',
+}
+
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_MBOXRD_FROM_RE = re.compile(rb'^>+From ')
+
+
+def _iter_lines(stream, max_bytes):
+    """
+    Lignes d'un flux binaire, sans jamais lire plus de max_bytes à la fois.
+
+    Yields:
+        tuple: (ligne, True si la ligne a été tronquée)
+    """
+    while True:
+        line = stream.readline(max_bytes)
+        if not line:
+            return
+        if len(line) >= max_bytes and not line.endswith(b'\n'):
+            # Ignorer la fin de la ligne trop longue
+            while True:
+                rest = stream.readline(max_bytes)
+                if not rest or rest.endswith(b'\n'):
+                    break
+            yield line, True
+        else:
+            yield line, False
+
+
+def iter_ndjson(stream, max_bytes):
+    """Messages d'un flux NDJSON: dicts {ref, text} ou {ref, error}."""
+    for number, (line, truncated) in enumerate(_iter_lines(stream, max_bytes), start=1):
+        if not line.strip():
+            continue
+        if truncated:
+            yield {'ref': number, 'error': f'Ligne de plus de {max_bytes} octets'}
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield {'ref': number, 'error': 'JSON invalide'}
+            continue
+
+        if isinstance(record, str):
+            yield {'ref': number, 'text': record}
+        elif isinstance(record, dict) and isinstance(record.get('text'), str):
+            yield {'ref': record.get('id', number), 'text': record['text']}
+        else:
+            yield {'ref': number, 'error': 'Champ text manquant'}
+
+
+def _decode_part(part):
+    """Contenu texte d'une partie MIME (charset déclaré, sinon UTF-8)."""
+    payload = part.get_payload(decode=True) or b''
+    charset = part.get_content_charset() or 'utf-8'
+    try:
+        return payload.decode(charset, 'replace')
+    except LookupError:
+        return payload.decode('utf-8', 'replace')
+
+
+def _message_text(raw):
+    """
+    Sujet et corps lisible d'un message RFC 822.
+
+    Utilise la politique compat32 du parseur: les en-têtes restent des
+    chaînes brutes, bien plus rapide que email.policy.default qui analyse
+    chaque en-tête structuré.
+    """
+    message = email.message_from_bytes(raw)
+    subject = str(make_header(decode_header(message.get('subject', '') or '')))
+    ref = (message.get('message-id', '') or '').strip() or None
+
+    plain = html_part = None
+    for part in message.walk():
+        content_type = part.get_content_type()
+        if content_type == 'text/plain' and plain is None:
+            plain = part
+        elif content_type == 'text/html' and html_part is None:
+            html_part = part
+
+    content = ''
+    if plain is not None:
+        content = _decode_part(plain)
+    elif html_part is not None:
+        content = html.unescape(_HTML_TAG_RE.sub(' ', _decode_part(html_part)))
+
+    return ref, f'{subject}\n{content}' if subject else content
+
+
+def iter_mbox(stream, max_bytes):
+    """Messages d'un flux mbox: dicts {ref, text} ou {ref, error}."""
+    number = 0
+    lines = []
+    size = 0
+    truncated = False
+
+    def build():
+        try:
+            ref, text = _message_text(b''.join(lines))
+        except Exception as e:
+            return {'ref': number, 'error': f'Message illisible: {e}'}
+        item = {'ref': ref or number, 'text': text}
+        if truncated:
+            item['truncated'] = True
+        return item
+
+    for line, _ in _iter_lines(stream, max_bytes):
+        if line.startswith(b'From '):
+            if number:
+                yield build()
+            number += 1
+            lines, size, truncated = [], 0, False
+            continue
+        if not number:
+            continue  # Contenu avant le premier séparateur
+        if size + len(line) > max_bytes:
+            truncated = True
+            continue
+        if _MBOXRD_FROM_RE.match(line):
+            line = line[1:]
+        lines.append(line)
+        size += len(line)
+
+    if number:
+        yield build()
+
+
+def iter_messages(stream, fmt, max_bytes=MAX_MESSAGE_BYTES):
+    """Choisir le lecteur selon le format ('ndjson' ou 'mbox')."""
+    if fmt == 'ndjson':
+        return iter_ndjson(stream, max_bytes)
+    if fmt == 'mbox':
+        return iter_mbox(stream, max_bytes)
+    raise ValueError(f"Format inconnu: {fmt} (attendu: {', '.join(FORMATS)})")
+
+
+def iter_batches(items, size):
+    """Découper un itérable en listes d'au plus `size` éléments."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def scan(messages, detector, batch_size=SCAN_BATCH_SIZE, max_chars=MAX_TEXT_CHARS,
+         on_batch=None):
+    """
+    Classifier des messages par micro-lots.
+
+    Args:
+        messages: itérable de dicts {ref, text} ou {ref, error}
+        detector: instance de MLSpamDetector
+        batch_size (int): taille des micro-lots
+        max_chars (int): caractères analysés par message
+        on_batch (callable): appelé avec [(texte, résultat)] après chaque
+            lot (persistance de l'historique)
+
+    Yields:
+        dict: un résultat par message, dans l'ordre d'entrée
+    """
+    for batch in iter_batches(messages, batch_size):
+        valid = [item for item in batch if 'error' not in item]
+        texts = []
+        for item in valid:
+            text = item['text']
+            if len(text) > max_chars:
+                text = text[:max_chars]
+                item['truncated'] = True
+            texts.append(text)
+
+        results = detector.analyze_batch(texts) if texts else []
+        by_item = {id(item): result for item, result in zip(valid, results)}
+
+        if on_batch is not None and texts:
+            on_batch(list(zip(texts, results)))
+
+        for item in batch:
+            if 'error' in item:
+                yield {'ref': item['ref'], 'error': item['error']}
+                continue
+            result = by_item[id(item)]
+            confidence = float(result['confidence'])
+            record = {
+                'ref': item['ref'],
+                'isSpam': bool(result['isSpam']),
+                'confidence': confidence,
+                'level': detector.get_spam_level(confidence),
+                'indicators': result['indicators'],
+                'flags': {name: bool(value) for name, value in result['flags'].items()}
+            }
+            if item.get('truncated'):
+                record['truncated'] = True
+            yield record
+
+
+def to_ndjson(records):
+    """Sérialiser les résultats en lignes NDJSON (bytes)."""
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
@@ -0,0 +1,111 @@
+"""
+Identifiants de worker des ids générés côté application
+=======================================================
+
+Les ids snowflake (utils.ids) réservent 6 bits à l'identifiant du
+processus qui les génère. Deux processus actifs avec le même identifiant
+produisent le même id dans la même milliseconde, et l'insertion échoue sur
+la clé primaire. Un pid ne convient pas: deux workers peuvent avoir des
+pid égaux modulo 64, et deux instances Render (conteneurs) réutilisent les
+mêmes petits pid.
+
+Chaque processus réserve donc un identifiant en base (table
+id_worker_leases), au démarrage du worker ou à son premier id:
+
+- le plus petit identifiant sans bail actif est pris, la clé primaire
+  départageant deux processus concurrents
+- un thread renouvelle le bail toutes les ID_WORKER_LEASE_TTL / 3
+  secondes; s'il a expiré et été repris, un nouvel identifiant est
+  réservé pour les ids suivants
+- le bail est libéré à l'arrêt normal du processus (atexit); celui d'un
+  processus tué expire après ID_WORKER_LEASE_TTL secondes
+
+Seul le mode d'écriture async génère des ids: en mode sync, la base les
+attribue et aucun bail n'est réservé.
+
+Avec SPAM_ID_WORKER, l'identifiant est fixé sans bail: réservé à un
+déploiement à un seul processus.
+
+Configuration (app.config):
+- ID_WORKER_LEASE_TTL : durée d'un bail en secondes
+"""
+
+import atexit
+import os
+import secrets
+import socket
+import threading
+
+from ..models.id_worker import IdWorkerLease
+from ..utils import ids
+
+
+class IdWorkerLeases:
+    """Extension Flask qui attribue à chaque processus un identifiant de worker."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.ttl = 300.0
+        # (identifiant, détenteur) du bail du processus courant
+        self.lease = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._atexit_registered = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.ttl = app.config.get('ID_WORKER_LEASE_TTL', 300.0)
+        if self.ttl <= 0:
+            raise ValueError("ID_WORKER_LEASE_TTL doit être positif")
+        ids.set_worker_source(self.acquire)
+
+    def acquire(self):
+        """Réserve un identifiant pour le processus courant (appelée par utils.ids)."""
+        with self.app.app_context():
+            owner = f'{socket.gethostname()[:40]}:{os.getpid()}:{secrets.token_hex(4)}'
+            worker_id = IdWorkerLease.claim(owner, self.ttl, ids.MAX_WORKERS)
+
+        if self._pid != os.getpid():
+            # Nouveau processus: le thread du parent n'a pas survécu au fork
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            threading.Thread(target=self._renew_loop, args=(self._stop,),
+                             name='id-worker-lease', daemon=True).start()
+        self.lease = (worker_id, owner)
+        if not self._atexit_registered:
+            atexit.register(self.release)
+            self._atexit_registered = True
+        print(f"[IdWorkers] Identifiant de worker {worker_id} reserve (pid {os.getpid()})")
+        return worker_id
+
+    def _renew_loop(self, stop):
+        while not stop.wait(self.ttl / 3):
+            lease = self.lease
+            try:
+                with self.app.app_context():
+                    renewed = IdWorkerLease.renew(*lease, self.ttl)
+            except Exception as e:
+                # Base indisponible: réessayer avant l'expiration du bail
+                print(f"[IdWorkers] Erreur de renouvellement du bail {lease[0]}: {e}")
+                continue
+            if not renewed and lease == self.lease:
+                print(f"[IdWorkers] Bail {lease[0]} perdu, nouvel identifiant au prochain id")
+                ids.release_worker_id()
+
+    def release(self):
+        """Libère le bail du processus courant (arrêt du worker)."""
+        if self._pid != os.getpid() or self.lease is None:
+            return
+        self._stop.set()
+        lease, self.lease, self._pid = self.lease, None, None
+        try:
+            with self.app.app_context():
+                IdWorkerLease.release(*lease)
+        except Exception as e:
+            print(f"[IdWorkers] Bail {lease[0]} non libere (expirera): {e}")
+
+
+# Instance partagée, initialisée par create_app()
+id_worker_leases = IdWorkerLeases()
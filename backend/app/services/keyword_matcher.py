@@ -0,0 +1,185 @@
+"""
+Recherche multi-mots-clés (automate d'Aho-Corasick)
+===================================================
+
+Les détecteurs cherchent chaque indicateur de spam dans le texte. Avec un
+test `mot_cle in texte` par indicateur, le coût croît avec
+(nombre de mots-clés x longueur du texte). L'automate d'Aho-Corasick
+trouve toutes les occurrences en un seul passage sur le texte, quel que
+soit le nombre de mots-clés. Pour les petites listes (comme les listes
+intégrées aux détecteurs), les tests `in` exécutés en C restent plus
+rapides que l'automate parcouru en Python: le matcher choisit donc la
+stratégie selon la taille de la liste, avec un résultat identique.
+
+Pour un lot de textes, match_matrix() construit la matrice booléenne
+(textes x mots-clés): chaque mot-clé est cherché dans le corpus joint, et
+seule sa première occurrence dans chaque texte est visitée.
+
+Des indicateurs supplémentaires peuvent être fournis par l'opérateur dans
+un fichier texte (un par ligne, lignes vides et commentaires '#' ignorés)
+désigné par la variable d'environnement SPAM_INDICATORS_FILE.
+"""
+
+import bisect
+import os
+from collections import deque
+
+import numpy as np
+
+# Fichier d'indicateurs fournis par l'opérateur (optionnel)
+INDICATORS_FILE_ENV = 'SPAM_INDICATORS_FILE'
+
+# Nombre de mots-clés à partir duquel l'automate est plus rapide que les tests `in`
+AUTOMATON_MIN_KEYWORDS = 128
+
+
+def load_keywords_file(path=None):
+    """
+    Charge la liste des indicateurs fournis par l'opérateur.
+
+    Args:
+        path (str): Chemin du fichier (par défaut: $SPAM_INDICATORS_FILE)
+
+    Returns:
+        list: Indicateurs dans l'ordre du fichier (liste vide si aucun fichier)
+    """
+    path = path or os.environ.get(INDICATORS_FILE_ENV)
+    if not path:
+        return []
+
+    with open(path, encoding='utf-8') as f:
+        return [
+            line.strip()
+            for line in f
+            if line.strip() and not line.lstrip().startswith('#')
+        ]
+
+
+class KeywordMatcher:
+    """
+    Automate d'Aho-Corasick construit une fois pour une liste de mots-clés.
+
+    find() retourne les mots-clés présents dans le texte, dans l'ordre de la
+    liste d'origine (doublons compris), exactement comme une boucle
+    `if mot_cle.lower() in texte_minuscule`.
+    """
+
+    def __init__(self, keywords, use_automaton=None):
+        self.keywords = list(keywords)
+        self._lowered = [keyword.lower() for keyword in self.keywords]
+        self._goto = None
+
+        if use_automaton is None:
+            use_automaton = len(self.keywords) >= AUTOMATON_MIN_KEYWORDS
+        if use_automaton:
+            self._build_automaton()
+
+    def _build_automaton(self):
+        """Construit le trie, les liens d'échec et les sorties de l'automate."""
+        # Trie des mots-clés (en minuscules)
+        goto = [{}]
+        outputs = [[]]
+        for index, keyword in enumerate(self._lowered):
+            state = 0
+            for char in keyword:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(index)
+
+        # Liens d'échec (parcours en largeur), sorties fusionnées le long des liens
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                if outputs[fail[next_state]]:
+                    outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [tuple(output) for output in outputs]
+
+    def find(self, text_lower):
+        """
+        Trouve tous les mots-clés présents dans le texte en un seul passage.
+
+        Args:
+            text_lower (str): Le texte, déjà en minuscules
+
+        Returns:
+            list: Mots-clés trouvés, dans l'ordre de la liste d'origine
+        """
+        if self._goto is None:
+            return [
+                keyword
+                for keyword, lowered in zip(self.keywords, self._lowered)
+                if lowered in text_lower
+            ]
+
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+
+        matched = set(outputs[0])
+        state = 0
+        for char in text_lower:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                matched.update(outputs[state])
+
+        return [self.keywords[index] for index in sorted(matched)]
+
+    def match_matrix(self, texts_lower, separator='\x00'):
+        """
+        Matrice des mots-clés présents dans chaque texte d'un lot.
+
+        La ligne i donne, dans l'ordre de la liste d'origine, les mêmes
+        mots-clés que find(texts_lower[i]).
+
+        Args:
+            texts_lower (list): Les textes, déjà en minuscules
+            separator (str): Séparateur des textes joints (absent des mots-clés)
+
+        Returns:
+            np.ndarray: Matrice booléenne (n_textes, n_mots_clés)
+        """
+        n_texts = len(texts_lower)
+        matrix = np.zeros((n_texts, len(self.keywords)), dtype=bool)
+        if not n_texts:
+            return matrix
+
+        joined = separator.join(texts_lower)
+        starts = [0]
+        for text in texts_lower:
+            starts.append(starts[-1] + len(text) + 1)
+
+        columns = {}
+        for index, lowered in enumerate(self._lowered):
+            columns.setdefault(lowered, []).append(index)
+
+        for lowered, indexes in columns.items():
+            if not lowered:
+                matrix[:, indexes] = True
+                continue
+            rows = []
+            position = joined.find(lowered)
+            while position != -1:
+                row = bisect.bisect_right(starts, position) - 1
+                rows.append(row)
+                # Passer au texte suivant: une occurrence par texte suffit
+                position = joined.find(lowered, starts[row + 1])
+            if rows:
+                matrix[np.ix_(rows, indexes)] = True
+        return matrix
@@ -0,0 +1,179 @@
+"""
+Micro-batching des prédictions concurrentes
+===========================================
+
+Chaque appel à MLSpamDetector.predict/analyze paie un coût fixe: une
+transformation en matrice creuse et un appel à predict_proba, quel que soit
+le nombre de textes. Quand plusieurs threads analysent en même temps
+(workers gunicorn à threads), le micro-batcher regroupe leurs textes:
+
+- le premier texte reçu ouvre un lot
+- le lot se ferme après SPAM_MICRO_BATCH_MAX_DELAY_MS millisecondes, ou dès
+  qu'il atteint SPAM_MICRO_BATCH_MAX_SIZE textes
+- un thread dédié score tout le lot en un seul appel vectorisé et rend à
+  chaque appelant son propre résultat
+
+Le délai borne la latence ajoutée à une requête isolée. Avec un délai de 0,
+le lot réunit seulement les textes arrivés pendant le calcul du lot
+précédent: aucune attente à faible charge, des lots naturels sous charge.
+
+Un lot ne se forme que si plusieurs threads appellent en même temps: il
+réunit au plus GUNICORN_THREADS textes par worker (gunicorn.conf.py), à
+aligner sur SPAM_MICRO_BATCH_MAX_SIZE. Un worker synchrone ne sert qu'une
+requête à la fois et n'en tire aucun bénéfice.
+
+Un appelant attend son résultat au plus SPAM_MICRO_BATCH_TIMEOUT_MS
+millisecondes, puis MicroBatchTimeout est levée (SpamDetector se replie
+alors sur les règles). Le thread de scoring est relancé s'il s'est arrêté.
+
+La taille des lots obtenus est exportée dans spamguard_batch_size
+{source="micro_batch"}, et l'attente de chaque appelant (lot et calcul)
+dans l'étape micro_batch_wait.
+
+Variables d'environnement:
+- SPAM_MICRO_BATCH              : '1' pour activer (défaut désactivé)
+- SPAM_MICRO_BATCH_MAX_SIZE     : textes maximum par lot (défaut 32)
+- SPAM_MICRO_BATCH_MAX_DELAY_MS : attente maximum d'un lot (défaut 2)
+- SPAM_MICRO_BATCH_TIMEOUT_MS   : attente maximum d'un résultat (défaut 5000)
+"""
+
+import os
+import queue
+import threading
+import time
+
+from app.utils.metrics import observe_batch, stage
+
+MICRO_BATCH_ENABLED = os.environ.get('SPAM_MICRO_BATCH', '0').lower() in ('1', 'true', 'yes')
+MICRO_BATCH_MAX_SIZE = int(os.environ.get('SPAM_MICRO_BATCH_MAX_SIZE', 32))
+MICRO_BATCH_MAX_DELAY_MS = float(os.environ.get('SPAM_MICRO_BATCH_MAX_DELAY_MS', 2))
+MICRO_BATCH_TIMEOUT_MS = float(os.environ.get('SPAM_MICRO_BATCH_TIMEOUT_MS', 5000))
+
+
+class MicroBatchTimeout(Exception):
+    """Résultat non reçu dans le délai (thread de scoring bloqué ou arrêté)."""
+
+
+class _Pending:
+    """Texte en attente de son résultat."""
+
+    __slots__ = ('item', 'done', 'result', 'error')
+
+    def __init__(self, item):
+        self.item = item
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Regroupe les appels concurrents à une fonction de scoring par lot.
+
+    Args:
+        score (callable): Fonction liste -> liste de résultats, dans l'ordre
+        max_size (int): Éléments maximum par lot
+        max_delay (float): Attente maximum d'un lot (secondes)
+        timeout (float): Attente maximum d'un résultat (secondes)
+    """
+
+    def __init__(self, score, max_size=MICRO_BATCH_MAX_SIZE,
+                 max_delay=MICRO_BATCH_MAX_DELAY_MS / 1000,
+                 timeout=MICRO_BATCH_TIMEOUT_MS / 1000):
+        if max_size < 1 or max_delay < 0 or timeout <= 0:
+            raise ValueError("max_size doit être >= 1, max_delay >= 0 et timeout > 0")
+        self.score = score
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.batches = 0
+        self.items = 0
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, item):
+        """
+        Ajoute un élément au lot courant et attend son résultat.
+
+        Raises:
+            MicroBatchTimeout: si le résultat n'arrive pas dans le délai
+            Exception: l'erreur levée par la fonction de scoring pour ce lot
+        """
+        self._ensure_worker()
+        pending = _Pending(item)
+        self._queue.put(pending)
+        with stage('micro_batch_wait'):
+            done = pending.done.wait(self.timeout)
+        if not done:
+            raise MicroBatchTimeout(
+                f"Aucun résultat du micro-batcher après {self.timeout * 1000:.0f} ms"
+            )
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def stats(self):
+        """Lots traités et taille moyenne obtenue dans ce processus."""
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'meanSize': round(self.items / self.batches, 2) if self.batches else 0,
+            'maxSize': self.max_size,
+            'maxDelayMs': self.max_delay * 1000,
+        }
+
+    def _ensure_worker(self):
+        """
+        Démarre le thread de scoring dans ce processus (après un fork aussi),
+        ou le relance s'il s'est arrêté.
+        """
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                # La file et le thread du processus parent ne survivent pas au fork
+                self._queue = queue.SimpleQueue()
+                self._pid = os.getpid()
+            else:
+                print("[MicroBatcher] Thread de scoring arrete, redemarrage")
+            self._thread = threading.Thread(target=self._run, args=(self._queue,),
+                                            name='micro-batcher', daemon=True)
+            self._thread.start()
+
+    def _run(self, pending_queue):
+        """Boucle du thread de scoring: former un lot, le scorer, répondre."""
+        while True:
+            batch = [pending_queue.get()]
+            deadline = time.perf_counter() + self.max_delay
+            while len(batch) < self.max_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    if remaining > 0:
+                        batch.append(pending_queue.get(timeout=remaining))
+                    else:
+                        batch.append(pending_queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._score(batch)
+
+    def _score(self, batch):
+        try:
+            results = self.score([pending.item for pending in batch])
+            for pending, result in zip(batch, results):
+                pending.result = result
+        except Exception as e:
+            for pending in batch:
+                pending.error = e
+        finally:
+            for pending in batch:
+                pending.done.set()
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            observe_batch('micro_batch', len(batch))
+        except Exception as e:
+            print(f"[MicroBatcher] Erreur de metrique: {e}")
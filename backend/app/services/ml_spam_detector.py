@@ -9,14 +9,42 @@ Architecture du modèle:
 1. CountVectorizer (Bag of Words) - Transforme le texte en vecteurs de comptage
 2. TfidfTransformer - Applique la pondération TF-IDF
 3. MultinomialNB - Classifieur Naive Bayes multinomial
+
+Moteur d'inférence (variable d'environnement SPAM_INFERENCE_ENGINE):
+- sklearn (défaut) : pipeline scikit-learn du fichier pickle
+- numpy            : moteur NumPy pur (voir nb_engine), sur le modèle
+                     compact mappé en mémoire s'il existe
+
+Rechargement à chaud: dans chaque processus, un thread de surveillance
+vérifie toutes les SPAM_MODEL_CHECK_INTERVAL secondes si le modèle publié
+a changé (spam_model.pkl remplacé, ou lien spam_model_compact déplacé;
+voir model_store.publish_model). Le nouveau modèle est chargé en
+arrière-plan puis substitué d'un bloc entre deux requêtes: une analyse en
+cours termine avec les composants de l'ancien, et aucune requête ne paie
+le temps de chargement.
+
+Micro-batching (SPAM_MICRO_BATCH=1, voir micro_batcher): les appels
+concurrents à predict et analyze sont scorés ensemble en un seul appel
+vectorisé; les indicateurs visuels restent calculés dans chaque appelant.
 """
 
+import hashlib
 import os
 import pickle
-import re
+import threading
+import time
+from datetime import datetime
 
 # Importer la fonction de nettoyage partagée (nécessaire pour le unpickle)
 from app.services.text_preprocessor import nettoyage_texte  # noqa: F401
+from app.services.model_store import (
+    COMPACT_MODEL_DIR, compact_model_files, file_fingerprint, load_compact_model
+)
+from app.services.keyword_matcher import KeywordMatcher, load_keywords_file
+from app.services.micro_batcher import MICRO_BATCH_ENABLED, MicroBatcher
+from app.services.nb_engine import NaiveBayesEngine
+from app.services.text_features import extract_features
+from app.utils.metrics import count_model_reload, stage
 
 # Chemin vers le modèle
 MODEL_PATH = os.path.join(
@@ -25,6 +53,40 @@ MODEL_PATH = os.path.join(
     'spam_model.pkl'
 )
 
+# Moteur d'inférence: 'sklearn' ou 'numpy'
+INFERENCE_ENGINE = os.environ.get('SPAM_INFERENCE_ENGINE', 'sklearn').lower()
+
+# Intervalle entre deux vérifications du fichier modèle (0 désactive)
+MODEL_CHECK_INTERVAL = float(os.environ.get('SPAM_MODEL_CHECK_INTERVAL', 30))
+
+
+def _model_stamp():
+    """Identité du modèle publié: fichier pickle et version compacte pointée."""
+    try:
+        stat = os.stat(MODEL_PATH)
+        pickle_stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        pickle_stamp = None
+    return (pickle_stamp, os.path.realpath(COMPACT_MODEL_DIR))
+
+
+class LoadedModel:
+    """Composants d'une même version du modèle, remplacés ensemble."""
+
+    def __init__(self, stamp, version, accuracy, classes, engine=None,
+                 bow_transformer=None, tfidf_transformer=None, model=None,
+                 feedback_last_id=None):
+        self.stamp = stamp
+        self.version = version
+        self.accuracy = accuracy
+        self.classes = classes
+        self.engine = engine
+        self.bow_transformer = bow_transformer
+        self.tfidf_transformer = tfidf_transformer
+        self.model = model
+        self.feedback_last_id = feedback_last_id
+        self.loaded_at = datetime.utcnow()
+
 
 class MLSpamDetector:
     """
@@ -35,17 +97,73 @@ class MLSpamDetector:
     """
 
     _instance = None
-    _model_data = None
+
+    # Modèle actif (LoadedModel), remplacé par le thread de surveillance
+    _active = None
+    _reload_lock = threading.Lock()
+    _start_lock = threading.Lock()
+    _watcher_pid = None
+
+    # Regroupement des prédictions concurrentes (None si désactivé)
+    _batcher = None
+
+    # Mots-clés suspects (indicateurs visuels)
+    SPAM_KEYWORDS = [
+        'gratuit', 'gagnant', 'prix', 'urgent', 'félicitations',
+        'cliquez', 'offre', 'promotion', 'réduction', 'loterie',
+        'héritage', 'argent', 'crédit', 'virement', 'gagner',
+        'free', 'winner', 'prize', 'click', 'offer', 'discount',
+        'lottery', 'inheritance', 'money', 'credit', 'transfer'
+    ]
+
+    # Matcher multi-mots-clés (liste intégrée + fichier opérateur)
+    _keyword_matcher = None
+
+    # Empreinte de la liste des mots-clés, pour les clés de cache
+    _keywords_version = None
 
     def __new__(cls):
         """Singleton pattern pour éviter de recharger le modèle."""
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._load_model()
+            instance = super().__new__(cls)
+            instance._load_model()
+            if MICRO_BATCH_ENABLED:
+                instance._batcher = MicroBatcher(instance._score_batch)
+            cls._instance = instance
         return cls._instance
 
     def _load_model(self):
-        """Charge le modèle depuis le fichier pickle."""
+        """Charge le modèle depuis le fichier pickle (ou le format compact)."""
+        self._active = self._read_model()
+
+    @staticmethod
+    def _read_model():
+        """
+        Lit les artefacts publiés.
+
+        Returns:
+            LoadedModel: Composants du modèle, prêts à être activés
+        """
+        if INFERENCE_ENGINE not in ('sklearn', 'numpy'):
+            raise ValueError(f"Moteur d'inférence inconnu: {INFERENCE_ENGINE}")
+
+        # Relevé avant la lecture: une publication concurrente sera vue au
+        # prochain contrôle
+        stamp = _model_stamp()
+
+        # Moteur NumPy sur le modèle compact: pas de unpickle
+        if INFERENCE_ENGINE == 'numpy' and os.path.exists(
+                os.path.join(COMPACT_MODEL_DIR, 'metadata.json')):
+            compact_model = load_compact_model()
+            engine = NaiveBayesEngine.from_compact(compact_model)
+            return LoadedModel(
+                stamp=stamp,
+                version=file_fingerprint(compact_model_files(compact_model.model_dir)),
+                accuracy=engine.accuracy,
+                classes=engine.classes_,
+                engine=engine
+            )
+
         if not os.path.exists(MODEL_PATH):
             raise FileNotFoundError(
                 f"Modèle non trouvé: {MODEL_PATH}\n"
@@ -53,12 +171,100 @@ class MLSpamDetector:
             )
 
         with open(MODEL_PATH, 'rb') as f:
-            self._model_data = pickle.load(f)
+            model_data = pickle.load(f)
+
+        model = model_data['model']
+        return LoadedModel(
+            stamp=stamp,
+            version=file_fingerprint([MODEL_PATH]),
+            accuracy=model_data.get('accuracy', 0.95),
+            classes=model.classes_,
+            engine=NaiveBayesEngine.from_sklearn(model_data) if INFERENCE_ENGINE == 'numpy' else None,
+            bow_transformer=model_data['bow_transformer'],
+            tfidf_transformer=model_data['tfidf_transformer'],
+            model=model,
+            feedback_last_id=model_data.get('feedback_last_id')
+        )
+
+    def reload_if_changed(self):
+        """
+        Recharge le modèle si une nouvelle version a été publiée.
+
+        Le chargement se fait à côté du modèle actif, remplacé ensuite par
+        une seule affectation. Un seul thread recharge à la fois.
+
+        Returns:
+            bool: True si un nouveau modèle a été activé
+        """
+        with self._reload_lock:
+            stamp = _model_stamp()
+            if stamp[0] is None or stamp == self._active.stamp:
+                return False
+            try:
+                loaded = self._read_model()
+            except Exception as e:
+                print(f"[MLSpamDetector] Echec du rechargement, modele actuel conserve: {e}")
+                return False
+            self._active = loaded
+            count_model_reload()
+            print(f"[MLSpamDetector] Nouveau modele charge (version {loaded.version})")
+            return True
+
+    def _ensure_watcher(self):
+        """Démarre le thread de surveillance dans ce processus (après un fork aussi)."""
+        if MODEL_CHECK_INTERVAL <= 0 or self._watcher_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._watcher_pid == os.getpid():
+                return
+            # Les threads et verrous du processus parent ne survivent pas au fork
+            MLSpamDetector._reload_lock = threading.Lock()
+            MLSpamDetector._watcher_pid = os.getpid()
+            threading.Thread(target=self._watch, name='model-watcher', daemon=True).start()
+
+    def _watch(self):
+        """Boucle du thread de surveillance."""
+        while True:
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                print(f"[MLSpamDetector] Erreur de surveillance du modele: {e}")
+            time.sleep(MODEL_CHECK_INTERVAL)
+
+    def model_info(self):
+        """
+        Description du modèle actif (exposée par /api/health/details).
 
-        self.bow_transformer = self._model_data['bow_transformer']
-        self.tfidf_transformer = self._model_data['tfidf_transformer']
-        self.model = self._model_data['model']
-        self.model_accuracy = self._model_data.get('accuracy', 0.95)
+        Returns:
+            dict: version, moteur, accuracy, date de chargement et dernière
+            correction appliquée
+        """
+        active = self._active
+        return {
+            'version': active.version,
+            'engine': 'numpy' if active.engine is not None else 'sklearn',
+            'accuracy': round(float(active.accuracy) * 100, 2),
+            'loadedAt': active.loaded_at.isoformat(),
+            'feedbackLastId': active.feedback_last_id
+        }
+
+    @property
+    def model_version(self):
+        """Empreinte de l'artefact du modèle actif."""
+        return self._active.version
+
+    @property
+    def keywords_version(self):
+        """Empreinte de la liste des mots-clés (indicateurs des résultats)."""
+        return self._keywords_version
+
+    @property
+    def model_accuracy(self):
+        return self._active.accuracy
+
+    @property
+    def classes(self):
+        return self._active.classes
 
     def predict(self, text):
         """
@@ -70,25 +276,62 @@ class MLSpamDetector:
         Returns:
             tuple: (prediction, probabilité_spam, probabilité_ham)
         """
-        # Transformer le texte
-        text_bow = self.bow_transformer.transform([text])
-        text_tfidf = self.tfidf_transformer.transform(text_bow)
+        if self._batcher is not None:
+            self._ensure_watcher()
+            return self._batcher.submit(text)[:3]
+        return self.predict_batch([text])[0]
 
-        # Prédiction
-        prediction = self.model.predict(text_tfidf)[0]
+    def predict_batch(self, texts):
+        """
+        Prédit la classe d'une liste de textes en un seul appel vectorisé.
 
-        # Probabilités
-        probabilities = self.model.predict_proba(text_tfidf)[0]
-        classes = self.model.classes_
+        Tous les textes passent par une seule transformation en matrice
+        creuse et un seul appel à predict_proba.
+
+        Args:
+            texts (list): Les textes à analyser
+
+        Returns:
+            list: Liste de tuples (prediction, probabilité_spam, probabilité_ham)
+        """
+        self._ensure_watcher()
+        return self._predict_with(self._active, texts)
+
+    def _score_batch(self, texts):
+        """Scoring d'un micro-lot: prédictions et accuracy du modèle utilisé."""
+        active = self._active
+        return [
+            (prediction, prob_spam, prob_ham, active.accuracy)
+            for prediction, prob_spam, prob_ham in self._predict_with(active, texts)
+        ]
+
+    @staticmethod
+    def _predict_with(active, texts):
+        """Prédictions avec les composants d'un LoadedModel."""
+        if active.engine is not None:
+            # Moteur NumPy: label et probabilités en un seul passage
+            probabilities = active.engine.predict_proba(texts)
+        else:
+            # Transformer les textes (tokenisation et sac de mots, puis TF-IDF)
+            with stage('tokenize'):
+                texts_bow = active.bow_transformer.transform(texts)
+            with stage('tfidf'):
+                texts_tfidf = active.tfidf_transformer.transform(texts_bow)
+            with stage('nb_score'):
+                probabilities = active.model.predict_proba(texts_tfidf)
+
+        # La prédiction est la classe la plus probable
+        classes = active.classes
+        predictions = classes[probabilities.argmax(axis=1)]
 
         # Trouver les indices des classes
         spam_idx = list(classes).index('spam') if 'spam' in classes else 1
         ham_idx = list(classes).index('ham') if 'ham' in classes else 0
 
-        prob_spam = probabilities[spam_idx] * 100
-        prob_ham = probabilities[ham_idx] * 100
-
-        return prediction, prob_spam, prob_ham
+        return [
+            (prediction, row[spam_idx] * 100, row[ham_idx] * 100)
+            for prediction, row in zip(predictions, probabilities)
+        ]
 
     def analyze(self, text):
         """
@@ -100,33 +343,77 @@ class MLSpamDetector:
         Returns:
             dict: Résultat complet de l'analyse
         """
-        if not text or not text.strip():
-            return {
-                'isSpam': False,
-                'confidence': 0,
-                'indicators': [],
-                'flags': {
-                    'multipleExclamations': False,
-                    'allCaps': False,
-                    'suspiciousUrl': False,
-                    'phoneNumber': False,
-                    'moneySymbol': False,
-                    'excessivePunctuation': False
-                },
-                'mlPrediction': 'ham',
-                'mlConfidence': 0
-            }
-
-        # Prédiction ML
-        prediction, prob_spam, prob_ham = self.predict(text)
+        if self._batcher is not None and text and text.strip():
+            self._ensure_watcher()
+            prediction, prob_spam, prob_ham, accuracy = self._batcher.submit(text)
+            return self._build_result(text, prediction, prob_spam, prob_ham, accuracy)
+        return self.analyze_batch([text])[0]
+
+    def analyze_batch(self, texts):
+        """
+        Analyse complète d'une liste de textes.
+
+        Les textes non vides sont classifiés ensemble via predict_batch;
+        chaque résultat est identique à celui de analyze() pour le même texte.
+
+        Args:
+            texts (list): Les textes à analyser
+
+        Returns:
+            list: Résultats d'analyse, dans l'ordre des textes reçus
+        """
+        self._ensure_watcher()
+        active = self._active
+        results = [None] * len(texts)
+        to_predict = []
+
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                results[i] = self._empty_result()
+            else:
+                to_predict.append(i)
+
+        if to_predict:
+            predictions = self._predict_with(active, [texts[i] for i in to_predict])
+            for i, (prediction, prob_spam, prob_ham) in zip(to_predict, predictions):
+                results[i] = self._build_result(
+                    texts[i], prediction, prob_spam, prob_ham, active.accuracy
+                )
+
+        return results
+
+    @staticmethod
+    def _empty_result():
+        """Résultat retourné pour un texte vide."""
+        return {
+            'isSpam': False,
+            'confidence': 0,
+            'indicators': [],
+            'flags': {
+                'multipleExclamations': False,
+                'allCaps': False,
+                'suspiciousUrl': False,
+                'phoneNumber': False,
+                'moneySymbol': False,
+                'excessivePunctuation': False
+            },
+            'mlPrediction': 'ham',
+            'mlConfidence': 0
+        }
+
+    def _build_result(self, text, prediction, prob_spam, prob_ham, model_accuracy):
+        """Construit le résultat d'analyse à partir de la prédiction ML."""
         is_spam = prediction == 'spam'
 
         # Confiance basée sur la probabilité ML
         confidence = prob_spam if is_spam else prob_ham
 
         # Analyse des patterns (pour les indicateurs visuels)
-        flags = self._analyze_patterns(text)
-        indicators = self._find_indicators(text)
+        with stage('flags'):
+            features = extract_features(text)
+        flags = features['flags']
+        with stage('indicators'):
+            indicators = self._find_indicators(text, features['text_lower'])
 
         return {
             'isSpam': is_spam,
@@ -135,71 +422,33 @@ class MLSpamDetector:
             'flags': flags,
             'mlPrediction': prediction,
             'mlConfidence': round(prob_spam, 2),
-            'modelAccuracy': round(self.model_accuracy * 100, 2)
+            'modelAccuracy': round(model_accuracy * 100, 2)
         }
 
     def _analyze_patterns(self, text):
         """Analyse les patterns suspects dans le texte."""
-        flags = {
-            'multipleExclamations': False,
-            'allCaps': False,
-            'suspiciousUrl': False,
-            'phoneNumber': False,
-            'moneySymbol': False,
-            'excessivePunctuation': False
-        }
-
-        # Points d'exclamation multiples
-        if text.count('!') >= 3:
-            flags['multipleExclamations'] = True
-
-        # Texte en majuscules
-        alpha_chars = [c for c in text if c.isalpha()]
-        if alpha_chars:
-            caps_ratio = sum(1 for c in alpha_chars if c.isupper()) / len(alpha_chars)
-            if caps_ratio > 0.6:
-                flags['allCaps'] = True
-
-        # URLs
-        url_pattern = r'https?://|www\.|\.com|\.net|\.org|\.fr'
-        if re.search(url_pattern, text.lower()):
-            flags['suspiciousUrl'] = True
-
-        # Numéros de téléphone
-        phone_pattern = r'\+?\d{1,3}[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{1,4}[-.\s]?\d{1,9}'
-        if re.search(phone_pattern, text):
-            flags['phoneNumber'] = True
-
-        # Symboles monétaires
-        money_pattern = r'[$€£¥₹]|\d+\s*(euro|dollar|usd|eur)'
-        if re.search(money_pattern, text.lower()):
-            flags['moneySymbol'] = True
+        return extract_features(text)['flags']
 
-        # Ponctuation excessive
-        punctuation_count = sum(1 for c in text if c in '!?.,;:')
-        if len(text) > 0 and punctuation_count / len(text) > 0.1:
-            flags['excessivePunctuation'] = True
-
-        return flags
-
-    def _find_indicators(self, text):
+    def _find_indicators(self, text, text_lower=None):
         """Trouve les mots-clés suspects dans le texte."""
-        spam_keywords = [
-            'gratuit', 'gagnant', 'prix', 'urgent', 'félicitations',
-            'cliquez', 'offre', 'promotion', 'réduction', 'loterie',
-            'héritage', 'argent', 'crédit', 'virement', 'gagner',
-            'free', 'winner', 'prize', 'click', 'offer', 'discount',
-            'lottery', 'inheritance', 'money', 'credit', 'transfer'
-        ]
+        if text_lower is None:
+            text_lower = text.lower()
 
-        text_lower = text.lower()
-        found = []
+        return self._keyword_matcher.find(text_lower)
 
-        for keyword in spam_keywords:
-            if keyword in text_lower:
-                found.append(keyword)
+    @classmethod
+    def reload_keywords(cls):
+        """
+        Reconstruit le matcher des mots-clés.
 
-        return found
+        À appeler après modification de SPAM_KEYWORDS ou du fichier
+        désigné par SPAM_INDICATORS_FILE.
+        """
+        keywords = cls.SPAM_KEYWORDS + load_keywords_file()
+        cls._keyword_matcher = KeywordMatcher(keywords)
+        cls._keywords_version = hashlib.sha256(
+            '\n'.join(keywords).encode('utf-8')
+        ).hexdigest()[:12]
 
     @classmethod
     def get_spam_level(cls, confidence):
@@ -222,6 +471,10 @@ class MLSpamDetector:
             return 'critical'
 
 
+# Construire le matcher des mots-clés au chargement
+MLSpamDetector.reload_keywords()
+
+
 # Instance globale du détecteur (lazy loading)
 _detector = None
 
@@ -0,0 +1,278 @@
+"""
+Format compact du modèle ML (tableaux NumPy mappés en mémoire)
+==============================================================
+
+Le fichier spam_model.pkl contient des objets scikit-learn dont le
+vocabulaire est un dict Python: chaque worker gunicorn qui le charge en
+garde sa propre copie dans le tas.
+
+Ce module exporte les paramètres appris sous forme de fichiers .npy plats,
+chargés avec np.load(mmap_mode='r'). Les pages sont alors partagées par le
+cache du système entre tous les processus qui lisent le même artefact.
+
+Contenu du dossier exporté:
+- vocabulary.npy       : termes encodés en UTF-8, triés (dtype S<n>)
+- vocabulary_ids.npy   : colonne de la matrice pour chaque terme trié
+- idf.npy              : vecteur IDF du TfidfTransformer
+- feature_log_prob.npy : log P(terme | classe) du MultinomialNB
+- class_log_prior.npy  : log P(classe) du MultinomialNB
+- classes.npy          : libellés des classes
+- metadata.json        : paramètres TF-IDF, accuracy, version du format
+
+publish_model() écrit les deux formats dans l'ordre: d'abord le modèle
+compact, puis spam_model.pkl par renommage atomique. Le remplacement du
+pickle signale donc un nouveau modèle complet aux workers en cours.
+
+Le modèle compact publié est un lien symbolique spam_model_compact vers
+un dossier versionné (spam_model_compact.<version>), remplacé en une
+opération: un lecteur ne mélange jamais les tableaux de deux versions.
+Seules les COMPACT_KEEP_VERSIONS dernières versions sont conservées.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# Chemin vers le modèle compact (à côté de spam_model.pkl)
+COMPACT_MODEL_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    'model',
+    'spam_model_compact'
+)
+
+# Versions du modèle compact conservées sur disque (la courante comprise)
+COMPACT_KEEP_VERSIONS = int(os.environ.get('SPAM_COMPACT_KEEP_VERSIONS', 2))
+
+_ARRAYS = (
+    'vocabulary',
+    'vocabulary_ids',
+    'idf',
+    'feature_log_prob',
+    'class_log_prior',
+    'classes',
+)
+
+
+def file_fingerprint(paths):
+    """
+    Empreinte SHA-256 (12 caractères hexadécimaux) du contenu de fichiers.
+
+    Sert de version du modèle: elle change à chaque ré-entraînement.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def compact_model_files(model_dir=COMPACT_MODEL_DIR):
+    """Fichiers constituant le modèle compact, dans un ordre stable."""
+    return [os.path.join(model_dir, f'{name}.npy') for name in _ARRAYS] + [
+        os.path.join(model_dir, 'metadata.json')
+    ]
+
+
+def _save_array(output_dir, name, array):
+    """Écrit un tableau dans un fichier temporaire puis le renomme.
+
+    Le renommage remplace l'inode sans modifier l'ancien fichier, ce qui
+    évite de corrompre les pages déjà mappées par un worker en cours.
+    """
+    path = os.path.join(output_dir, f'{name}.npy')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array, allow_pickle=False)
+    os.replace(tmp_path, path)
+
+
+def export_compact_model(model_data, output_dir=COMPACT_MODEL_DIR):
+    """
+    Exporte le dictionnaire du modèle pickle au format compact.
+
+    Args:
+        model_data (dict): Dictionnaire contenant bow_transformer,
+            tfidf_transformer, model et accuracy
+        output_dir (str): Dossier de destination
+
+    Returns:
+        str: Chemin du dossier exporté
+    """
+    bow_transformer = model_data['bow_transformer']
+    tfidf_transformer = model_data['tfidf_transformer']
+    model = model_data['model']
+
+    # Table de chaînes triée (l'ordre des octets UTF-8 est l'ordre des code points)
+    terms = sorted(bow_transformer.vocabulary_)
+    encoded = [term.encode('utf-8') for term in terms]
+    if any(term.endswith(b'\x00') for term in encoded):
+        raise ValueError("Terme du vocabulaire terminé par un octet nul, non exportable")
+
+    vocabulary = np.array(encoded, dtype=np.bytes_)
+    vocabulary_ids = np.array(
+        [bow_transformer.vocabulary_[term] for term in terms], dtype=np.int32
+    )
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    arrays = {
+        'vocabulary': vocabulary,
+        'vocabulary_ids': vocabulary_ids,
+        'idf': np.ascontiguousarray(tfidf_transformer.idf_, dtype=np.float64),
+        'feature_log_prob': np.ascontiguousarray(model.feature_log_prob_, dtype=np.float64),
+        'class_log_prior': np.ascontiguousarray(model.class_log_prior_, dtype=np.float64),
+        'classes': np.array([str(c) for c in model.classes_]),
+    }
+    for name in _ARRAYS:
+        _save_array(output_dir, name, arrays[name])
+
+    metadata = {
+        'format_version': FORMAT_VERSION,
+        'accuracy': float(model_data.get('accuracy', 0.95)),
+        'binary': bool(bow_transformer.binary),
+        'norm': tfidf_transformer.norm,
+        'use_idf': bool(tfidf_transformer.use_idf),
+        'sublinear_tf': bool(tfidf_transformer.sublinear_tf),
+        'n_features': int(len(terms)),
+    }
+    metadata_path = os.path.join(output_dir, 'metadata.json')
+    with open(metadata_path + '.tmp', 'w') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(metadata_path + '.tmp', metadata_path)
+
+    return output_dir
+
+
+def _compact_versions(compact_dir):
+    """Dossiers versionnés du modèle compact, du plus ancien au plus récent."""
+    parent = os.path.dirname(compact_dir) or '.'
+    prefix = os.path.basename(compact_dir) + '.'
+    versions = [
+        os.path.join(parent, name) for name in os.listdir(parent)
+        if name.startswith(prefix) and os.path.isdir(os.path.join(parent, name))
+        and not os.path.islink(os.path.join(parent, name))
+    ]
+    return sorted(versions, key=os.path.getmtime)
+
+
+def publish_compact_model(model_data, compact_dir=COMPACT_MODEL_DIR):
+    """
+    Exporte le modèle compact dans un nouveau dossier versionné, puis fait
+    pointer le lien compact_dir vers lui (renommage atomique du lien).
+
+    Returns:
+        str: Dossier versionné publié
+    """
+    version_dir = f'{compact_dir}.{time.time_ns():x}'
+    export_compact_model(model_data, version_dir)
+
+    # Ancienne installation: dossier réel, déplacé une fois pour le lien
+    if os.path.isdir(compact_dir) and not os.path.islink(compact_dir):
+        os.replace(compact_dir, f'{compact_dir}.{time.time_ns() - 1:x}')
+
+    tmp_link = compact_dir + '.tmp'
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(os.path.basename(version_dir), tmp_link)
+    os.replace(tmp_link, compact_dir)
+
+    current = os.path.realpath(compact_dir)
+    old_versions = [path for path in _compact_versions(compact_dir)
+                    if os.path.realpath(path) != current]
+    for path in old_versions[:max(len(old_versions) - COMPACT_KEEP_VERSIONS + 1, 0)]:
+        # Les pages déjà mappées par un worker restent valides après suppression
+        shutil.rmtree(path, ignore_errors=True)
+
+    return version_dir
+
+
+def publish_model(model_data, model_path, compact_dir=COMPACT_MODEL_DIR):
+    """
+    Publie un modèle: export compact, puis remplacement atomique du pickle.
+
+    Un lecteur voit toujours soit l'ancien fichier complet, soit le nouveau.
+
+    Args:
+        model_data (dict): Dictionnaire du modèle (bow_transformer,
+            tfidf_transformer, model, accuracy...)
+        model_path (str): Chemin de spam_model.pkl
+        compact_dir (str): Dossier du modèle compact
+    """
+    publish_compact_model(model_data, compact_dir)
+
+    tmp_path = model_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(model_data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, model_path)
+
+
+class CompactModel:
+    """
+    Paramètres du modèle chargés en lecture seule depuis le format compact.
+
+    Les tableaux sont des np.memmap: rien n'est copié dans le tas du
+    processus, et les workers forkés partagent les mêmes pages.
+    """
+
+    def __init__(self, model_dir=COMPACT_MODEL_DIR):
+        # Résoudre le lien une seule fois: tous les tableaux viennent de la
+        # même version, même si une publication a lieu pendant le chargement
+        model_dir = os.path.realpath(model_dir)
+        metadata_path = os.path.join(model_dir, 'metadata.json')
+        if not os.path.exists(metadata_path):
+            raise FileNotFoundError(
+                f"Modèle compact non trouvé: {model_dir}\n"
+                "Exécutez d'abord: python train_model.py"
+            )
+
+        with open(metadata_path) as f:
+            self.metadata = json.load(f)
+
+        if self.metadata.get('format_version') != FORMAT_VERSION:
+            raise ValueError(
+                f"Version de format non supportée: {self.metadata.get('format_version')}"
+            )
+
+        self.model_dir = model_dir
+        for name in _ARRAYS:
+            setattr(self, name, np.load(
+                os.path.join(model_dir, f'{name}.npy'), mmap_mode='r'
+            ))
+
+        self.accuracy = self.metadata['accuracy']
+        self.n_features = self.metadata['n_features']
+
+    def lookup(self, tokens):
+        """
+        Convertit des tokens en indices de colonnes du vocabulaire.
+
+        Args:
+            tokens (list): Tokens produits par nettoyage_texte
+
+        Returns:
+            np.ndarray: Indices de colonnes des tokens connus (les tokens
+            hors vocabulaire sont ignorés)
+        """
+        if not tokens:
+            return np.empty(0, dtype=np.int32)
+
+        queries = np.array([token.encode('utf-8') for token in tokens], dtype=np.bytes_)
+        positions = np.searchsorted(self.vocabulary, queries)
+        positions[positions == len(self.vocabulary)] = 0
+        known = self.vocabulary[positions] == queries
+        return self.vocabulary_ids[positions[known]]
+
+
+def load_compact_model(model_dir=COMPACT_MODEL_DIR):
+    """Charge le modèle compact mappé en mémoire."""
+    return CompactModel(model_dir)
@@ -0,0 +1,154 @@
+"""
+Moteur d'inférence Naive Bayes en NumPy pur
+===========================================
+
+Reproduit CountVectorizer -> TfidfTransformer -> MultinomialNB.predict_proba
+à partir des seuls paramètres appris (vocabulaire, idf_, feature_log_prob_,
+class_log_prior_), sans passer par scikit-learn sur le chemin des requêtes.
+
+Pour chaque texte, les tokens sont convertis en indices de colonnes, les
+comptages sont pondérés TF-IDF puis normalisés, et le produit creux avec
+feature_log_prob_ donne la log-vraisemblance jointe. Le label et les
+probabilités sont calculés en un seul passage.
+"""
+
+import numpy as np
+
+from app.services.text_preprocessor import nettoyage_texte
+from app.utils.metrics import stage
+
+
+class NaiveBayesEngine:
+    """
+    Moteur de scoring Naive Bayes multinomial avec pondération TF-IDF.
+
+    Utiliser from_sklearn() ou from_compact() pour le construire.
+    """
+
+    def __init__(self, lookup, analyzer, idf, feature_log_prob, class_log_prior,
+                 classes, binary=False, norm='l2', use_idf=True,
+                 sublinear_tf=False, accuracy=0.95):
+        self._lookup = lookup
+        self._analyzer = analyzer
+        self.idf = idf
+        self.feature_log_prob = feature_log_prob
+        self.class_log_prior = class_log_prior
+        self.classes_ = np.asarray(classes)
+        self.binary = binary
+        self.norm = norm
+        self.use_idf = use_idf
+        self.sublinear_tf = sublinear_tf
+        self.accuracy = accuracy
+        self.n_features = feature_log_prob.shape[1]
+
+    @classmethod
+    def from_sklearn(cls, model_data):
+        """Construit le moteur depuis le dictionnaire du modèle pickle."""
+        bow_transformer = model_data['bow_transformer']
+        tfidf_transformer = model_data['tfidf_transformer']
+        model = model_data['model']
+        vocabulary = bow_transformer.vocabulary_
+
+        def lookup(tokens):
+            return np.fromiter(
+                (vocabulary[token] for token in tokens if token in vocabulary),
+                dtype=np.int64
+            )
+
+        return cls(
+            lookup=lookup,
+            analyzer=bow_transformer.build_analyzer(),
+            idf=tfidf_transformer.idf_ if tfidf_transformer.use_idf else None,
+            feature_log_prob=model.feature_log_prob_,
+            class_log_prior=model.class_log_prior_,
+            classes=model.classes_,
+            binary=bow_transformer.binary,
+            norm=tfidf_transformer.norm,
+            use_idf=tfidf_transformer.use_idf,
+            sublinear_tf=tfidf_transformer.sublinear_tf,
+            accuracy=model_data.get('accuracy', 0.95)
+        )
+
+    @classmethod
+    def from_compact(cls, compact_model):
+        """Construit le moteur depuis un CompactModel (tableaux mappés en mémoire)."""
+        metadata = compact_model.metadata
+        return cls(
+            lookup=compact_model.lookup,
+            analyzer=nettoyage_texte,
+            idf=compact_model.idf,
+            feature_log_prob=compact_model.feature_log_prob,
+            class_log_prior=compact_model.class_log_prior,
+            classes=compact_model.classes,
+            binary=metadata['binary'],
+            norm=metadata['norm'],
+            use_idf=metadata['use_idf'],
+            sublinear_tf=metadata['sublinear_tf'],
+            accuracy=compact_model.accuracy
+        )
+
+    def predict_proba(self, texts):
+        """
+        Calcule les probabilités de chaque classe pour une liste de textes.
+
+        Args:
+            texts (list): Les textes à analyser
+
+        Returns:
+            np.ndarray: Matrice (n_textes, n_classes) des probabilités,
+            colonnes dans l'ordre de classes_
+        """
+        n_texts = len(texts)
+
+        # Indices (ligne, colonne) de chaque token connu
+        with stage('tokenize'):
+            cols = [self._lookup(self._analyzer(text)) for text in texts]
+        with stage('tfidf'):
+            rows, cols, weights = self._tfidf_weights(n_texts, cols)
+        with stage('nb_score'):
+            return self._class_probabilities(n_texts, rows, cols, weights)
+
+    def _tfidf_weights(self, n_texts, cols):
+        """Poids TF-IDF normalisés de chaque (ligne, colonne) non nulle."""
+        lengths = np.fromiter((len(c) for c in cols), dtype=np.int64, count=n_texts)
+        rows = np.repeat(np.arange(n_texts, dtype=np.int64), lengths)
+        cols = np.concatenate(cols).astype(np.int64) if n_texts else np.empty(0, np.int64)
+
+        # Comptages par (ligne, colonne), équivalent à CountVectorizer
+        keys, counts = np.unique(rows * self.n_features + cols, return_counts=True)
+        rows = keys // self.n_features
+        cols = keys % self.n_features
+        weights = counts.astype(np.float64)
+
+        # Pondération TF-IDF puis normalisation par ligne
+        if self.binary:
+            weights[:] = 1.0
+        if self.sublinear_tf:
+            weights = np.log(weights) + 1.0
+        if self.use_idf:
+            weights *= self.idf[cols]
+        if self.norm == 'l2':
+            norms = np.sqrt(np.bincount(rows, weights * weights, minlength=n_texts))
+        elif self.norm == 'l1':
+            norms = np.bincount(rows, np.abs(weights), minlength=n_texts)
+        else:
+            norms = None
+        if norms is not None:
+            norms[norms == 0.0] = 1.0
+            weights /= norms[rows]
+        return rows, cols, weights
+
+    def _class_probabilities(self, n_texts, rows, cols, weights):
+        """Probabilités des classes à partir des poids TF-IDF creux."""
+        # Log-vraisemblance jointe: produit creux avec feature_log_prob_
+        jll = np.empty((n_texts, len(self.classes_)), dtype=np.float64)
+        for c in range(len(self.classes_)):
+            jll[:, c] = np.bincount(
+                rows, weights * self.feature_log_prob[c, cols], minlength=n_texts
+            )
+        jll += self.class_log_prior
+
+        # Normalisation log-sum-exp
+        jll_max = jll.max(axis=1, keepdims=True)
+        log_prob_x = jll_max + np.log(np.exp(jll - jll_max).sum(axis=1, keepdims=True))
+        return np.exp(jll - log_prob_x)
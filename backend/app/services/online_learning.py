@@ -0,0 +1,147 @@
+"""
+Mise à jour incrémentale du modèle à partir des corrections utilisateurs
+========================================================================
+
+Les corrections (table spam_feedback) sont appliquées par mini-lots avec
+MultinomialNB.partial_fit, sans ré-entraînement complet:
+
+1. Vocabulaire extensible: les termes inconnus du CountVectorizer sont
+   ajoutés en fin de vocabulaire; le MultinomialNB reçoit des colonnes de
+   comptage nulles et le TfidfTransformer l'IDF maximal (celui d'un terme
+   vu dans un seul document). Les colonnes existantes ne changent pas, le
+   modèle compact et le moteur NumPy restent donc utilisables.
+2. Chaque correction compte pour FEEDBACK_WEIGHT exemples d'entraînement.
+3. Le modèle mis à jour est publié par model_store.publish_model (pickle
+   remplacé atomiquement); les workers le rechargent sans redémarrage.
+
+Le modèle publié mémorise l'id de la dernière correction appliquée
+(feedback_last_id): une mise à jour interrompue ou relancée n'applique
+jamais deux fois la même correction, et un modèle ré-entraîné par
+train_model.py (compteur à 0) reçoit à nouveau toutes les corrections.
+
+Configuration (variables d'environnement):
+- SPAM_FEEDBACK_BATCH_SIZE : corrections par appel à partial_fit
+- SPAM_FEEDBACK_WEIGHT     : poids d'une correction (sample_weight)
+- SPAM_FEEDBACK_SETTLE_SECONDS : âge minimum d'une correction avant
+  application (les transactions concurrentes peuvent valider des ids
+  dans le désordre)
+"""
+
+import fcntl
+import os
+import pickle
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import select
+
+from ..extensions import db
+from ..models.feedback import SpamFeedback
+from .ml_spam_detector import MODEL_PATH
+from .model_store import publish_model
+
+FEEDBACK_BATCH_SIZE = int(os.environ.get('SPAM_FEEDBACK_BATCH_SIZE', 256))
+FEEDBACK_WEIGHT = float(os.environ.get('SPAM_FEEDBACK_WEIGHT', 5.0))
+FEEDBACK_SETTLE_SECONDS = float(os.environ.get('SPAM_FEEDBACK_SETTLE_SECONDS', 30))
+
+
+def grow_vocabulary(model_data, token_lists):
+    """
+    Ajoute au modèle les termes absents du vocabulaire.
+
+    Args:
+        model_data (dict): Dictionnaire du modèle (modifié en place)
+        token_lists (list): Tokens de chaque texte (sortie de l'analyzer)
+
+    Returns:
+        int: Nombre de termes ajoutés
+    """
+    vocabulary = model_data['bow_transformer'].vocabulary_
+    new_terms = {}
+    for tokens in token_lists:
+        for token in tokens:
+            if token not in vocabulary and token not in new_terms:
+                new_terms[token] = len(vocabulary) + len(new_terms)
+
+    if not new_terms:
+        return 0
+
+    vocabulary.update(new_terms)
+    n_features = len(vocabulary)
+    added = len(new_terms)
+
+    tfidf_transformer = model_data['tfidf_transformer']
+    idf = tfidf_transformer.idf_
+    tfidf_transformer.idf_ = np.concatenate([idf, np.full(added, idf.max())])
+    tfidf_transformer.n_features_in_ = n_features
+
+    model = model_data['model']
+    model.feature_count_ = np.hstack([
+        model.feature_count_,
+        np.zeros((model.feature_count_.shape[0], added))
+    ])
+    model.n_features_in_ = n_features
+
+    return added
+
+
+def apply_feedback_batch(model_data, texts, labels, weight=FEEDBACK_WEIGHT):
+    """
+    Applique un mini-lot de corrections au modèle (en place).
+
+    Returns:
+        int: Nombre de termes ajoutés au vocabulaire
+    """
+    bow_transformer = model_data['bow_transformer']
+    analyzer = bow_transformer.build_analyzer()
+    added = grow_vocabulary(model_data, [analyzer(text) for text in texts])
+
+    features = model_data['tfidf_transformer'].transform(bow_transformer.transform(texts))
+    model_data['model'].partial_fit(
+        features, np.asarray(labels), sample_weight=np.full(len(texts), weight)
+    )
+    return added
+
+
+def update_from_feedback(batch_size=FEEDBACK_BATCH_SIZE, model_path=MODEL_PATH):
+    """
+    Applique les corrections en attente et publie le modèle mis à jour.
+
+    À appeler dans un contexte d'application. Un verrou de fichier empêche
+    deux mises à jour simultanées sur la même machine.
+
+    Returns:
+        dict: applied (corrections appliquées), new_terms, last_id
+    """
+    with open(model_path + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        with open(model_path, 'rb') as f:
+            model_data = pickle.load(f)
+
+        last_id = model_data.get('feedback_last_id', 0)
+        settled = datetime.utcnow() - timedelta(seconds=FEEDBACK_SETTLE_SECONDS)
+        applied = new_terms = 0
+
+        while True:
+            rows = db.session.execute(
+                select(SpamFeedback.id, SpamFeedback.text, SpamFeedback.label)
+                .where(SpamFeedback.id > last_id, SpamFeedback.created_at <= settled)
+                .order_by(SpamFeedback.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            new_terms += apply_feedback_batch(
+                model_data, [row.text for row in rows], [row.label for row in rows]
+            )
+            applied += len(rows)
+            last_id = rows[-1].id
+
+        if applied:
+            model_data['feedback_last_id'] = last_id
+            model_data['feedback_count'] = model_data.get('feedback_count', 0) + applied
+            publish_model(model_data, model_path)
+
+    return {'applied': applied, 'new_terms': new_terms, 'last_id': last_id}
@@ -4,11 +4,24 @@ Service de détection de spam (avec ML + fallback règles)
 
 Ce service utilise en priorité le modèle ML Naive Bayes pour la détection.
 Si le modèle n'est pas disponible, il utilise un système de règles heuristiques.
+Tant que le modèle manque (déploiement avant la fin de l'entraînement), son
+chargement est retenté toutes les SPAM_MODEL_CHECK_INTERVAL secondes.
+
+Les lots (analyze_batch) passent par la version vectorisée des règles: flags
+et indicateurs de N textes en matrices, score par produit matrice-vecteur
+avec les poids WEIGHTS, résultats identiques à l'analyse texte par texte.
 """
 
-import re
-import random
+import hashlib
 import os
+import time
+
+import numpy as np
+
+from app.services.analysis_cache import create_cache, text_digest
+from app.services.keyword_matcher import KeywordMatcher, load_keywords_file
+from app.services.text_features import FLAG_NAMES, extract_features, extract_features_batch
+from app.utils.metrics import count_analyses, count_cache, observe_batch, stage
 
 # Chemin vers le modèle ML
 MODEL_PATH = os.path.join(
@@ -17,9 +30,13 @@ MODEL_PATH = os.path.join(
     'spam_model.pkl'
 )
 
+# Intervalle entre deux tentatives de chargement du modèle absent
+ML_RETRY_INTERVAL = float(os.environ.get('SPAM_MODEL_CHECK_INTERVAL', 30))
+
 # Variables globales pour le ML
 ML_AVAILABLE = False
 _ml_detector = None
+_next_ml_retry = 0.0
 
 
 def _try_load_ml():
@@ -44,6 +61,21 @@ def _try_load_ml():
 ML_AVAILABLE = _try_load_ml()
 
 
+def _active_ml_detector():
+    """Détecteur ML chargé, ou None (chargement retenté périodiquement)."""
+    global ML_AVAILABLE, _next_ml_retry
+
+    if ML_AVAILABLE:
+        return _ml_detector
+    if ML_RETRY_INTERVAL <= 0 or time.monotonic() < _next_ml_retry:
+        return None
+
+    _next_ml_retry = time.monotonic() + ML_RETRY_INTERVAL
+    if os.path.exists(MODEL_PATH):
+        ML_AVAILABLE = _try_load_ml()
+    return _ml_detector if ML_AVAILABLE else None
+
+
 class SpamDetector:
     """
     Service de détection de spam hybride.
@@ -73,6 +105,15 @@ class SpamDetector:
         'cher client', 'cher utilisateur', 'désabonnez-vous'
     ]
 
+    # Matcher multi-mots-clés (liste intégrée + fichier opérateur)
+    _indicator_matcher = None
+
+    # Version des règles (empreinte des indicateurs), pour les clés de cache
+    _rules_version = None
+
+    # Cache des résultats d'analyse
+    _cache = create_cache()
+
     # Poids pour chaque type d'indicateur
     WEIGHTS = {
         'indicator': 15,
@@ -84,6 +125,16 @@ class SpamDetector:
         'excessive_punctuation': 10
     }
 
+    # Poids associé à chaque flag de extract_features
+    FLAG_WEIGHTS = {
+        'multipleExclamations': 'multiple_exclamations',
+        'allCaps': 'all_caps',
+        'suspiciousUrl': 'url',
+        'phoneNumber': 'phone_number',
+        'moneySymbol': 'money_symbol',
+        'excessivePunctuation': 'excessive_punctuation'
+    }
+
     # Seuil pour classifier comme spam
     SPAM_THRESHOLD = 30
 
@@ -93,6 +144,7 @@ class SpamDetector:
         Analyser un texte pour détecter s'il s'agit de spam.
 
         Utilise le modèle ML en priorité, avec fallback sur les règles heuristiques.
+        Les résultats sont mis en cache par empreinte du texte et version du modèle.
 
         Args:
             text (str): Le texte à analyser
@@ -100,17 +152,143 @@ class SpamDetector:
         Returns:
             dict: Résultat de l'analyse avec score, indicateurs et flags
         """
+        # Un seul détecteur pour la clé et le scoring
+        ml_detector = _active_ml_detector()
+        version = cls._cache_version(ml_detector)
+        key = cls._cache_key(text, version)
+        if key is not None:
+            with stage('cache'):
+                cached = cls._cache.get(key)
+            count_cache(cached is not None, cached is None)
+            if cached is not None:
+                return cached
+
         # Essayer d'utiliser le modèle ML en priorité
-        if ML_AVAILABLE and _ml_detector is not None:
+        if ml_detector is not None:
             try:
-                result = _ml_detector.analyze(text)
+                result = ml_detector.analyze(text)
                 result['method'] = 'ml'
+                count_analyses('ml')
+                cls._cache_result(key, version, ml_detector, result)
                 return result
             except Exception as e:
                 print(f"[SpamDetector] Erreur ML, fallback sur regles: {e}")
+                count_analyses('ml_error')
+                # Résultat de secours: ne pas le mettre en cache sous la version ML
+                with stage('rules'):
+                    return cls._analyze_with_rules(text)
 
         # Fallback: Système basé sur les règles heuristiques
-        return cls._analyze_with_rules(text)
+        with stage('rules'):
+            result = cls._analyze_with_rules(text)
+        count_analyses('rules')
+        cls._cache_result(key, version, ml_detector, result)
+        return result
+
+    @classmethod
+    def analyze_batch(cls, texts):
+        """
+        Analyser une liste de textes en un seul passage.
+
+        Les textes déjà en cache ne sont pas ré-analysés. Le modèle ML classifie
+        les autres en un appel vectorisé; en cas d'indisponibilité, chaque texte
+        passe par les règles heuristiques.
+
+        Args:
+            texts (list): Les textes à analyser
+
+        Returns:
+            list: Résultats d'analyse, dans l'ordre des textes reçus
+        """
+        ml_detector = _active_ml_detector()
+        version = cls._cache_version(ml_detector)
+        keys = [cls._cache_key(text, version) for text in texts]
+        with stage('cache'):
+            results = [
+                cls._cache.get(key) if key is not None else None
+                for key in keys
+            ]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if cls._cache.enabled:
+            count_cache(len(texts) - len(missing), len(missing))
+        if not missing:
+            return results
+
+        observe_batch('analyze_batch', len(missing))
+        cacheable = True
+        computed = None
+        if ml_detector is not None:
+            try:
+                computed = ml_detector.analyze_batch([texts[i] for i in missing])
+                for result in computed:
+                    result['method'] = 'ml'
+                count_analyses('ml', len(computed))
+            except Exception as e:
+                print(f"[SpamDetector] Erreur ML, fallback sur regles: {e}")
+                count_analyses('ml_error', len(missing))
+                cacheable = False
+        else:
+            count_analyses('rules', len(missing))
+
+        if computed is None:
+            with stage('rules'):
+                computed = cls._analyze_batch_with_rules([texts[i] for i in missing])
+
+        # Modèle rechargé pendant le calcul: résultats non mis en cache
+        cacheable = cacheable and cls._cache_version(ml_detector) == version
+        for i, result in zip(missing, computed):
+            results[i] = result
+            if cacheable and keys[i] is not None:
+                cls._cache.set(keys[i], result)
+
+        return results
+
+    @classmethod
+    def _cache_version(cls, ml_detector):
+        """Version des résultats du détecteur donné (None: règles)."""
+        if ml_detector is not None:
+            # Les indicateurs du résultat dépendent aussi des mots-clés
+            return f'ml-{ml_detector.model_version}-{ml_detector.keywords_version}'
+        return f'rules-{cls._rules_version}'
+
+    @classmethod
+    def _cache_key(cls, text, version):
+        """Clé de cache du texte pour une version (None si cache désactivé)."""
+        if not cls._cache.enabled:
+            return None
+
+        cls._cache.set_version(version)
+        return cls._cache.key(text, version)
+
+    @classmethod
+    def _cache_result(cls, key, version, ml_detector, result):
+        """
+        Met un résultat en cache sous la clé calculée avant l'analyse.
+
+        Le détecteur ML recharge son modèle en place: si sa version a changé
+        pendant l'analyse, le résultat peut venir du nouveau modèle et n'est
+        pas stocké sous la clé de l'ancien.
+        """
+        if key is not None and cls._cache_version(ml_detector) == version:
+            cls._cache.set(key, result)
+
+    @staticmethod
+    def get_ml_detector():
+        """Détecteur ML chargé, ou None si le modèle n'est pas disponible."""
+        return _active_ml_detector()
+
+    @classmethod
+    def model_info(cls):
+        """Méthode de détection active et version du modèle (pour /api/health/details)."""
+        ml_detector = _active_ml_detector()
+        if ml_detector is None:
+            return {'method': 'rules', 'version': f'rules-{cls._rules_version}'}
+        return {'method': 'ml', **ml_detector.model_info()}
+
+    @classmethod
+    def cache_stats(cls):
+        """Compteurs du cache d'analyse (hits, misses, evictions)."""
+        return cls._cache.stats()
 
     @classmethod
     def _analyze_with_rules(cls, text):
@@ -136,68 +314,28 @@ class SpamDetector:
                 'method': 'rules'
             }
 
-        text_lower = text.lower()
+        # Comptages et flags calculés en un seul passage
+        features = extract_features(text)
+        text_lower = features['text_lower']
+        flags = features['flags']
         score = 0
-        found_indicators = []
-        flags = {
-            'multipleExclamations': False,
-            'allCaps': False,
-            'suspiciousUrl': False,
-            'phoneNumber': False,
-            'moneySymbol': False,
-            'excessivePunctuation': False
-        }
 
-        # Rechercher les indicateurs de spam
-        for indicator in cls.SPAM_INDICATORS:
-            if indicator.lower() in text_lower:
-                found_indicators.append(indicator)
-                score += cls.WEIGHTS['indicator']
-
-        # Vérifier les multiples points d'exclamation
-        exclamation_count = text.count('!')
-        if exclamation_count >= 3:
-            flags['multipleExclamations'] = True
-            score += cls.WEIGHTS['multiple_exclamations']
-
-        # Vérifier si le texte est principalement en majuscules
-        alpha_chars = [c for c in text if c.isalpha()]
-        if alpha_chars:
-            caps_ratio = sum(1 for c in alpha_chars if c.isupper()) / len(alpha_chars)
-            if caps_ratio > 0.6:
-                flags['allCaps'] = True
-                score += cls.WEIGHTS['all_caps']
-
-        # Vérifier la présence d'URLs
-        url_pattern = r'https?://|www\.|\.com|\.net|\.org|\.fr'
-        if re.search(url_pattern, text_lower):
-            flags['suspiciousUrl'] = True
-            score += cls.WEIGHTS['url']
-
-        # Vérifier la présence de numéros de téléphone
-        phone_pattern = r'\+?\d{1,3}[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{1,4}[-.\s]?\d{1,9}'
-        if re.search(phone_pattern, text):
-            flags['phoneNumber'] = True
-            score += cls.WEIGHTS['phone_number']
-
-        # Vérifier la présence de symboles monétaires
-        money_pattern = r'[$€£¥₹]|\d+\s*(euro|dollar|usd|eur)'
-        if re.search(money_pattern, text_lower):
-            flags['moneySymbol'] = True
-            score += cls.WEIGHTS['money_symbol']
-
-        # Vérifier la ponctuation excessive
-        punctuation_count = sum(1 for c in text if c in '!?.,;:')
-        if len(text) > 0 and punctuation_count / len(text) > 0.1:
-            flags['excessivePunctuation'] = True
-            score += cls.WEIGHTS['excessive_punctuation']
+        # Rechercher les indicateurs de spam (un seul passage sur le texte)
+        found_indicators = cls._indicator_matcher.find(text_lower)
+        score += cls.WEIGHTS['indicator'] * len(found_indicators)
+
+        # Ajouter le poids de chaque flag levé
+        for flag, weight_key in cls.FLAG_WEIGHTS.items():
+            if flags[flag]:
+                score += cls.WEIGHTS[weight_key]
 
         # Déterminer si c'est du spam
         is_spam = score > cls.SPAM_THRESHOLD
 
-        # Calculer la confiance (entre 60% et 95%)
+        # Calculer la confiance (entre 60% et 95%), avec une variation de
+        # -5 à +5 déterministe, dérivée de l'empreinte du texte
         base_confidence = min(95, max(60, score + 40))
-        confidence = min(95, max(60, base_confidence + random.randint(-5, 5)))
+        confidence = min(95, max(60, base_confidence + cls._confidence_jitter(text)))
 
         return {
             'isSpam': is_spam,
@@ -208,6 +346,114 @@ class SpamDetector:
             'method': 'rules'
         }
 
+    @classmethod
+    def _score_batch_with_rules(cls, texts):
+        """
+        Scores des règles pour N textes non vides, en tableaux NumPy.
+
+        Les comptages (nombre d'indicateurs, puis les six flags) forment une
+        matrice (N, 7); le score est son produit avec le vecteur des poids.
+
+        Returns:
+            dict: matches (N, n_indicateurs), flags (N, 6), scores,
+            confidence et isSpam (N,)
+        """
+        features = extract_features_batch(texts)
+        flags = features['flags']
+        matches = cls._indicator_matcher.match_matrix(features['text_lower'])
+
+        # Score = [nombre d'indicateurs, flags...] . [poids]
+        counts = np.column_stack([matches.sum(axis=1), flags]).astype(np.int64)
+        weights = np.array(
+            [cls.WEIGHTS['indicator']]
+            + [cls.WEIGHTS[cls.FLAG_WEIGHTS[flag]] for flag in FLAG_NAMES],
+            dtype=np.int64
+        )
+        scores = counts @ weights
+
+        # Même confiance que _analyze_with_rules, jitter compris
+        base_confidence = np.clip(scores + 40, 60, 95)
+        confidence = np.clip(base_confidence + cls._confidence_jitters(texts), 60, 95)
+
+        return {
+            'matches': matches,
+            'flags': flags,
+            'scores': scores,
+            'confidence': confidence,
+            'isSpam': scores > cls.SPAM_THRESHOLD,
+        }
+
+    @classmethod
+    def _analyze_batch_with_rules(cls, texts):
+        """
+        Analyse par règles de N textes en opérations vectorisées.
+
+        Chaque résultat est identique à celui de _analyze_with_rules.
+
+        Args:
+            texts (list): Les textes à analyser
+
+        Returns:
+            list: Résultats d'analyse, dans l'ordre des textes reçus
+        """
+        results = [None] * len(texts)
+        to_score = []
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                results[i] = cls._analyze_with_rules(text)
+            else:
+                to_score.append(i)
+        if not to_score:
+            return results
+
+        scored = cls._score_batch_with_rules([texts[i] for i in to_score])
+
+        # Indicateurs de chaque ligne, dans l'ordre de la liste d'origine
+        matches = scored['matches']
+        keywords = cls._indicator_matcher.keywords
+        found = [keywords[k] for k in np.nonzero(matches)[1].tolist()]
+        ends = np.cumsum(matches.sum(axis=1)).tolist()
+
+        start = 0
+        for i, end, row_flags, score, confidence, spam in zip(
+            to_score, ends, scored['flags'].tolist(), scored['scores'].tolist(),
+            scored['confidence'].tolist(), scored['isSpam'].tolist()
+        ):
+            results[i] = {
+                'isSpam': spam,
+                'confidence': confidence,
+                'indicators': found[start:end],
+                'flags': dict(zip(FLAG_NAMES, row_flags)),
+                'score': score,
+                'method': 'rules'
+            }
+            start = end
+        return results
+
+    @staticmethod
+    def _confidence_jitter(text):
+        """Variation de confiance dans [-5, 5], reproductible pour un même texte."""
+        return int.from_bytes(text_digest(text)[:8], 'big') % 11 - 5
+
+    @staticmethod
+    def _confidence_jitters(texts):
+        """_confidence_jitter de chaque texte, en tableau."""
+        prefixes = b''.join(text_digest(text)[:8] for text in texts)
+        return (np.frombuffer(prefixes, dtype='>u8') % 11).astype(np.int64) - 5
+
+    @classmethod
+    def reload_indicators(cls):
+        """
+        Reconstruit le matcher des indicateurs.
+
+        À appeler après modification de SPAM_INDICATORS ou du fichier
+        désigné par SPAM_INDICATORS_FILE.
+        """
+        indicators = cls.SPAM_INDICATORS + load_keywords_file()
+        cls._indicator_matcher = KeywordMatcher(indicators)
+        rules = '\n'.join(indicators) + repr(sorted(cls.WEIGHTS.items()))
+        cls._rules_version = hashlib.sha256(rules.encode('utf-8')).hexdigest()[:12]
+
     @classmethod
     def get_spam_level(cls, confidence):
         """
@@ -227,3 +473,7 @@ class SpamDetector:
             return 'high'
         else:
             return 'critical'
+
+
+# Construire le matcher des indicateurs au chargement
+SpamDetector.reload_indicators()
@@ -0,0 +1,216 @@
+"""
+Extraction des caractéristiques heuristiques d'un texte
+=======================================================
+
+Module partagé par le détecteur ML (indicateurs visuels) et par le
+détecteur à règles (fallback). Toutes les statistiques de caractères
+(points d'exclamation, ratio de majuscules, ponctuation) sont obtenues
+en un seul comptage des caractères (np.unique sur les code points pour
+les textes longs, Counter pour les courts), puis en parcourant
+uniquement les caractères distincts. Les regex sont compilées une fois
+au chargement du module.
+
+extract_features_batch calcule les mêmes flags pour N textes sous forme
+de matrice booléenne (N, 6): les comptages de caractères sont des sommes
+cumulées sur les code points de tous les textes concaténés, et chaque
+regex parcourt une seule fois le corpus joint.
+"""
+
+import bisect
+import re
+from collections import Counter
+
+import numpy as np
+
+# Patterns suspects (compilés une seule fois)
+URL_PATTERN = re.compile(r'https?://|www\.|\.com|\.net|\.org|\.fr')
+PHONE_PATTERN = re.compile(r'\+?\d{1,3}[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{1,4}[-.\s]?\d{1,9}')
+MONEY_PATTERN = re.compile(r'[$€£¥₹]|\d+\s*(euro|dollar|usd|eur)')
+
+# Caractères comptés comme ponctuation pour le flag excessivePunctuation
+PUNCTUATION_CHARS = frozenset('!?.,;:')
+
+# Ordre des flags (aussi celui des bits du masque stocké en base)
+FLAG_NAMES = (
+    'multipleExclamations',
+    'allCaps',
+    'suspiciousUrl',
+    'phoneNumber',
+    'moneySymbol',
+    'excessivePunctuation',
+)
+
+# En dessous de cette longueur, Counter est plus rapide que np.unique
+NUMPY_MIN_LENGTH = 512
+
+# Séparateur des textes joints: aucune regex ne peut le consommer, une
+# correspondance reste donc toujours à l'intérieur d'un seul texte
+BATCH_SEPARATOR = '\x00'
+
+# Classes de caractères (bits) pour les comptages par lot
+_ALPHA = 1
+_UPPER = 2
+_PUNCTUATION = 4
+
+# Table des classes pour le plan multilingue de base, construite au premier lot
+_bmp_classes = None
+
+
+def _char_counts(text):
+    """Retourne les couples (caractère, nombre d'occurrences) du texte."""
+    if len(text) < NUMPY_MIN_LENGTH:
+        return Counter(text).items()
+
+    codepoints, counts = np.unique(
+        np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32),
+        return_counts=True
+    )
+    return zip(map(chr, codepoints.tolist()), counts.tolist())
+
+
+def extract_features(text):
+    """
+    Calcule en un passage les comptages et les flags heuristiques d'un texte.
+
+    Args:
+        text (str): Le texte à analyser
+
+    Returns:
+        dict: text_lower, exclamation_count et flags (les six flags
+        suspects utilisés par les deux détecteurs)
+    """
+    text_lower = text.lower()
+
+    # Un seul comptage des caractères, puis un parcours des caractères distincts
+    alpha_count = 0
+    upper_count = 0
+    punctuation_count = 0
+    exclamation_count = 0
+    for char, count in _char_counts(text):
+        if char.isalpha():
+            alpha_count += count
+            if char.isupper():
+                upper_count += count
+        if char in PUNCTUATION_CHARS:
+            punctuation_count += count
+            if char == '!':
+                exclamation_count = count
+
+    flags = {
+        'multipleExclamations': exclamation_count >= 3,
+        'allCaps': bool(alpha_count) and upper_count / alpha_count > 0.6,
+        'suspiciousUrl': URL_PATTERN.search(text_lower) is not None,
+        'phoneNumber': PHONE_PATTERN.search(text) is not None,
+        'moneySymbol': MONEY_PATTERN.search(text_lower) is not None,
+        'excessivePunctuation': len(text) > 0 and punctuation_count / len(text) > 0.1
+    }
+
+    return {
+        'text_lower': text_lower,
+        'exclamation_count': exclamation_count,
+        'flags': flags
+    }
+
+
+def _char_classes(chars):
+    """Bits _ALPHA, _UPPER et _PUNCTUATION de chaque caractère."""
+    return np.fromiter(
+        (
+            (_ALPHA if char.isalpha() else 0)
+            | (_UPPER if char.isalpha() and char.isupper() else 0)
+            | (_PUNCTUATION if char in PUNCTUATION_CHARS else 0)
+            for char in chars
+        ),
+        dtype=np.uint8, count=len(chars)
+    )
+
+
+def _codepoint_classes(codepoints):
+    """Classes des code points: table précalculée, sauf hors du plan de base."""
+    global _bmp_classes
+    if _bmp_classes is None:
+        _bmp_classes = _char_classes([chr(c) for c in range(0x10000)])
+
+    astral = codepoints >= 0x10000
+    if not astral.any():
+        return _bmp_classes[codepoints]
+
+    classes = _bmp_classes[np.where(astral, 0, codepoints)]
+    values, inverse = np.unique(codepoints[astral], return_inverse=True)
+    classes[astral] = _char_classes([chr(c) for c in values.tolist()])[inverse]
+    return classes
+
+
+def _segment_counts(mask, bounds, lengths):
+    """Nombre de valeurs vraies de mask dans chaque segment [bounds[i], bounds[i + 1])."""
+    counts = np.zeros(len(lengths), dtype=np.int64)
+    # reduceat sur les segments non vides: leurs débuts sont strictement croissants
+    non_empty = lengths > 0
+    if non_empty.any():
+        counts[non_empty] = np.add.reduceat(mask, bounds[:-1][non_empty], dtype=np.int64)
+    return counts
+
+
+def _pattern_hits(pattern, texts):
+    """Textes contenant au moins une correspondance, en un parcours du corpus joint."""
+    joined = BATCH_SEPARATOR.join(texts)
+    starts = [0]
+    for text in texts:
+        starts.append(starts[-1] + len(text) + 1)
+
+    hits = np.zeros(len(texts), dtype=bool)
+    match = pattern.search(joined)
+    while match is not None:
+        row = bisect.bisect_right(starts, match.start()) - 1
+        hits[row] = True
+        # Une correspondance par texte suffit: reprendre au texte suivant
+        match = pattern.search(joined, starts[row + 1])
+    return hits
+
+
+def extract_features_batch(texts):
+    """
+    Calcule les flags heuristiques de N textes en opérations vectorisées.
+
+    Résultat identique à extract_features appliqué à chaque texte.
+
+    Args:
+        texts (list): Les textes à analyser
+
+    Returns:
+        dict: text_lower (liste), exclamation_count (tableau (N,)) et
+        flags (matrice booléenne (N, 6), colonnes dans l'ordre de FLAG_NAMES)
+    """
+    texts = list(texts)
+    n_texts = len(texts)
+    texts_lower = [text.lower() for text in texts]
+
+    # Code points de tous les textes, bornes de chaque texte
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=n_texts)
+    bounds = np.zeros(n_texts + 1, dtype=np.int64)
+    np.cumsum(lengths, out=bounds[1:])
+    codepoints = np.frombuffer(
+        ''.join(texts).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32
+    )
+    classes = _codepoint_classes(codepoints)
+
+    alpha_count = _segment_counts(classes & _ALPHA != 0, bounds, lengths)
+    upper_count = _segment_counts(classes & _UPPER != 0, bounds, lengths)
+    punctuation_count = _segment_counts(classes & _PUNCTUATION != 0, bounds, lengths)
+    exclamation_count = _segment_counts(codepoints == ord('!'), bounds, lengths)
+
+    flags = np.empty((n_texts, len(FLAG_NAMES)), dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        flags[:, 0] = exclamation_count >= 3
+        flags[:, 1] = (alpha_count > 0) & (upper_count / alpha_count > 0.6)
+        flags[:, 5] = (lengths > 0) & (punctuation_count / lengths > 0.1)
+    if n_texts:
+        flags[:, 2] = _pattern_hits(URL_PATTERN, texts_lower)
+        flags[:, 3] = _pattern_hits(PHONE_PATTERN, texts)
+        flags[:, 4] = _pattern_hits(MONEY_PATTERN, texts_lower)
+
+    return {
+        'text_lower': texts_lower,
+        'exclamation_count': exclamation_count,
+        'flags': flags
+    }
@@ -6,6 +6,7 @@ Ce module contient les fonctions de nettoyage de texte utilisées
 à la fois pour l'entraînement et l'inférence du modèle ML.
 """
 
+import re
 import string
 
 # Stopwords français (liste statique pour éviter les dépendances NLTK au runtime)
@@ -38,6 +39,10 @@ FRENCH_STOPWORDS = {
     'sous', 'tandis', 'tel', 'telle', 'tels', 'telles', 'tous', 'vu'
 }
 
+# Regex précompilée de la ponctuation ASCII (plus rapide que str.translate
+# sur les textes contenant des accents)
+_PONCTUATION_RE = re.compile('[' + re.escape(string.punctuation) + ']+')
+
 
 def nettoyage_texte(message):
     """
@@ -55,13 +60,12 @@ def nettoyage_texte(message):
     if not isinstance(message, str):
         return []
 
-    # Supprimer la ponctuation
-    sans_ponctuation = [char for char in message if char not in string.punctuation]
-    message_clean = ''.join(sans_ponctuation)
+    # Supprimer la ponctuation puis mettre en minuscule une seule fois
+    message_clean = _PONCTUATION_RE.sub('', message).lower()
 
-    # Supprimer les stopwords et mettre en minuscule
+    # Supprimer les stopwords
     return [
-        mot.lower()
+        mot
         for mot in message_clean.split()
-        if mot.lower() not in FRENCH_STOPWORDS
+        if mot not in FRENCH_STOPWORDS
     ]
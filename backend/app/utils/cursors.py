@@ -0,0 +1,42 @@
+import base64
+import json
+from datetime import datetime
+
+# Curseurs opaques pour la pagination par clé (keyset) de l'historique.
+# Un curseur encode la clé (analyzed_at, id) d'une ligne et le sens de
+# lecture: 'n' (lignes plus anciennes) ou 'p' (lignes plus récentes).
+NEXT = 'n'
+PREV = 'p'
+
+
+def encode_cursor(analyzed_at, analysis_id, direction):
+    """Encoder une clé de pagination en chaîne opaque (base64 url-safe)."""
+    payload = json.dumps(
+        [analyzed_at.isoformat(), analysis_id, direction],
+        separators=(',', ':')
+    )
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Décoder un curseur produit par encode_cursor.
+
+    Returns:
+        tuple: (analyzed_at, id, direction)
+
+    Raises:
+        ValueError: si le curseur est invalide
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        analyzed_at, analysis_id, direction = json.loads(
+            base64.urlsafe_b64decode(padded.encode('ascii'))
+        )
+        analyzed_at = datetime.fromisoformat(analyzed_at)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError('Curseur invalide')
+
+    if not isinstance(analysis_id, int) or direction not in (NEXT, PREV):
+        raise ValueError('Curseur invalide')
+    return analyzed_at, analysis_id, direction
@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+# Réglages SQLite appliqués à chaque connexion (base locale spam_detector.db):
+# WAL permet les lectures pendant une écriture, NORMAL évite un fsync par
+# COMMIT (sûr en WAL), busy_timeout attend un verrou au lieu d'échouer.
+SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool qui mesure le temps d'attente pour obtenir une connexion."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._wait_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._wait_lock:
+                self.wait_count += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f'PRAGMA journal_mode={SQLITE_JOURNAL_MODE}')
+    cursor.execute(f'PRAGMA synchronous={SQLITE_SYNCHRONOUS}')
+    cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+    cursor.close()
+
+
+def setup_engine(engine):
+    """Réglages propres au dialecte, à appeler avant la première connexion."""
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', _set_sqlite_pragmas)
+
+
+def pool_stats(engine):
+    """
+    État du pool de connexions de ce processus.
+
+    Returns:
+        dict: taille, connexions prises/disponibles, débordement et temps
+        d'attente (si le pool est un TimedQueuePool)
+    """
+    pool = engine.pool
+    stats = {'class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checkedIn': pool.checkedin(),
+            'checkedOut': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0)
+        })
+    if isinstance(pool, TimedQueuePool):
+        with pool._wait_lock:
+            stats.update({
+                'waits': pool.wait_count,
+                'waitTimeTotalMs': round(pool.wait_total * 1000, 3),
+                'waitTimeMaxMs': round(pool.wait_max * 1000, 3),
+                'timeouts': pool.timeouts
+            })
+    return stats
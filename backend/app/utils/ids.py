@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+
+# Identifiants de type snowflake, générés côté application pour l'écriture
+# différée de l'historique (ANALYSIS_WRITE_MODE=async, voir
+# services.analysis_writer); en mode sync, la base attribue les ids.
+# Ils sont limités à 53 bits pour rester des entiers exacts en JavaScript:
+#   41 bits : millisecondes depuis ID_EPOCH_MS (~69 ans)
+#    6 bits : identifiant du worker, unique parmi les processus en vie
+#    6 bits : séquence dans la milliseconde (64 ids/ms par worker)
+#
+# L'identifiant du worker vient de SPAM_ID_WORKER (un seul processus), ou
+# sinon de la source enregistrée par set_worker_source: un bail réservé en
+# base par chaque processus (services.id_workers). Sans l'un ou l'autre,
+# aucun id n'est généré: deux processus ne doivent jamais partager un
+# identifiant de worker.
+ID_EPOCH_MS = 1735689600000  # 2025-01-01T00:00:00Z
+WORKER_BITS = 6
+SEQUENCE_BITS = 6
+MAX_WORKERS = 1 << WORKER_BITS
+
+_MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+_lock = threading.Lock()
+_state = {'pid': None, 'worker': 0, 'last_ms': -1, 'sequence': 0}
+_worker_source = None
+
+
+def set_worker_source(source):
+    """
+    Enregistre la fonction qui attribue l'identifiant de worker.
+
+    source() est appelée une fois par processus (et de nouveau après un
+    fork ou release_worker_id) et retourne un entier dans [0, MAX_WORKERS).
+    """
+    global _worker_source
+    _worker_source = source
+
+
+def _worker_id():
+    """Identifiant du worker courant (recalculé après un fork)."""
+    configured = os.environ.get('SPAM_ID_WORKER')
+    if configured is not None:
+        worker = int(configured)
+    elif _worker_source is not None:
+        worker = _worker_source()
+    else:
+        raise RuntimeError(
+            "Aucun identifiant de worker: définir SPAM_ID_WORKER ou créer "
+            "l'application (bail réservé en base)"
+        )
+    if not 0 <= worker < MAX_WORKERS:
+        raise ValueError(f"Identifiant de worker hors de [0, {MAX_WORKERS}): {worker}")
+    return worker
+
+
+def _ensure_worker():
+    """Attribue l'identifiant du processus courant (à appeler sous _lock)."""
+    if _state['pid'] != os.getpid():
+        # last_ms et sequence sont conservés: même si le nouvel identifiant
+        # est l'ancien, les ids restent croissants et distincts
+        _state.update(worker=_worker_id(), pid=os.getpid())
+
+
+def claim_worker_id():
+    """
+    Attribue dès maintenant l'identifiant de worker du processus courant.
+
+    Appelée au démarrage d'un worker (gunicorn.conf.py) pour
+    refuser de démarrer plutôt que d'échouer à la première requête.
+    """
+    with _lock:
+        _ensure_worker()
+        return _state['worker']
+
+
+def release_worker_id():
+    """Oublie l'identifiant courant: le prochain id en attribue un nouveau."""
+    with _lock:
+        _state['pid'] = None
+
+
+def generate_id():
+    """
+    Générer un identifiant unique, croissant dans le temps.
+
+    Permet de connaître l'id d'une analyse avant son insertion en base.
+    """
+    with _lock:
+        _ensure_worker()
+
+        now_ms = int(time.time() * 1000) - ID_EPOCH_MS
+        if now_ms < _state['last_ms']:
+            # Horloge reculée: continuer sur la dernière milliseconde connue
+            now_ms = _state['last_ms']
+
+        if now_ms == _state['last_ms']:
+            _state['sequence'] = (_state['sequence'] + 1) & _MAX_SEQUENCE
+            if _state['sequence'] == 0:
+                # Séquence épuisée: attendre la milliseconde suivante
+                while now_ms <= _state['last_ms']:
+                    now_ms = int(time.time() * 1000) - ID_EPOCH_MS
+        else:
+            _state['sequence'] = 0
+
+        _state['last_ms'] = now_ms
+        return (
+            (now_ms << (WORKER_BITS + SEQUENCE_BITS))
+            | (_state['worker'] << SEQUENCE_BITS)
+            | _state['sequence']
+        )
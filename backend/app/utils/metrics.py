@@ -0,0 +1,208 @@
+"""
+Métriques de latence par étape, exportées au format Prometheus
+==============================================================
+
+    with stage('tfidf'):
+        ...
+
+mesure la durée d'une étape de l'analyse dans l'histogramme
+spamguard_stage_duration_seconds{stage=...}. Étapes instrumentées:
+jwt, json_parse, validate, cache,
+micro_batch_wait, tokenize, tfidf, nb_score, flags, indicators, rules,
+db_commit, db_flush.
+
+Autres métriques:
+- spamguard_http_request_duration_seconds{endpoint,method,status}
+- spamguard_analyses_total{method}   : ml, rules (modèle absent) ou
+                                       ml_error (fallback sur les règles)
+- spamguard_cache_events_total{event}: hit, miss
+- spamguard_batch_size{source}       : taille des lots classifiés
+- spamguard_model_reloads_total
+
+GET /api/metrics renvoie le format texte Prometheus. Sous gunicorn, les
+workers écrivent dans PROMETHEUS_MULTIPROC_DIR (voir gunicorn.conf.py) et
+l'endpoint agrège les fichiers de tous les workers.
+
+L'endpoint n'est pas public, pas plus que /api/health/details (état des
+pools et du cache): il exige l'en-tête Authorization: Bearer
+<METRICS_TOKEN> (app.config). Sans METRICS_TOKEN, seules les requêtes
+locales (127.0.0.1, ::1) sont servies, par exemple un Prometheus ou un
+agent dans le même conteneur.
+
+Désactivées (SPAM_METRICS=0, ou prometheus_client absent), stage()
+renvoie un contexte vide partagé et les compteurs retournent
+immédiatement: aucune horloge n'est lue, aucun hook n'est enregistré.
+"""
+
+import contextlib
+import hmac
+import os
+import time
+from functools import wraps
+
+from flask import Response, current_app, g, jsonify, request
+from flask_jwt_extended import verify_jwt_in_request
+
+METRICS_ENABLED = os.environ.get('SPAM_METRICS', '1').lower() not in ('0', 'false', 'no')
+
+if METRICS_ENABLED:
+    try:
+        import prometheus_client
+        from prometheus_client import CollectorRegistry, Counter, Histogram, multiprocess
+    except ImportError:
+        print("[Metrics] prometheus_client absent, métriques désactivées")
+        METRICS_ENABLED = False
+
+# Clients servis par /api/metrics quand METRICS_TOKEN n'est pas défini
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+# Bornes des histogrammes de latence (secondes)
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1000)
+
+_NOOP = contextlib.nullcontext()
+
+if METRICS_ENABLED:
+    STAGE_DURATION = Histogram(
+        'spamguard_stage_duration_seconds', "Durée d'une étape de l'analyse",
+        ['stage'], buckets=LATENCY_BUCKETS
+    )
+    REQUEST_DURATION = Histogram(
+        'spamguard_http_request_duration_seconds', 'Durée des requêtes HTTP',
+        ['endpoint', 'method', 'status'], buckets=LATENCY_BUCKETS
+    )
+    ANALYSES = Counter(
+        'spamguard_analyses_total', 'Analyses par méthode de détection', ['method']
+    )
+    CACHE_EVENTS = Counter(
+        'spamguard_cache_events_total', "Accès au cache d'analyse", ['event']
+    )
+    BATCH_SIZE = Histogram(
+        'spamguard_batch_size', 'Taille des lots classifiés', ['source'],
+        buckets=BATCH_BUCKETS
+    )
+    MODEL_RELOADS = Counter(
+        'spamguard_model_reloads_total', 'Modèles rechargés à chaud'
+    )
+
+# Enfants d'histogramme par étape, résolus une seule fois
+_stage_children = {}
+
+
+class _Timer:
+    """Contexte qui observe sa durée dans un histogramme."""
+
+    __slots__ = ('_histogram', '_start')
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._start)
+        return False
+
+
+def stage(name):
+    """Contexte mesurant une étape (contexte vide si métriques désactivées)."""
+    if not METRICS_ENABLED:
+        return _NOOP
+    child = _stage_children.get(name)
+    if child is None:
+        child = _stage_children[name] = STAGE_DURATION.labels(name)
+    return _Timer(child)
+
+
+def count_analyses(method, count=1):
+    """Compter des analyses par méthode (ml, rules, ml_error)."""
+    if METRICS_ENABLED and count:
+        ANALYSES.labels(method).inc(count)
+
+
+def count_cache(hits, misses):
+    """Compter les accès au cache d'analyse."""
+    if not METRICS_ENABLED:
+        return
+    if hits:
+        CACHE_EVENTS.labels('hit').inc(hits)
+    if misses:
+        CACHE_EVENTS.labels('miss').inc(misses)
+
+
+def observe_batch(source, size):
+    """Observer la taille d'un lot classifié."""
+    if METRICS_ENABLED:
+        BATCH_SIZE.labels(source).observe(size)
+
+
+def count_model_reload():
+    if METRICS_ENABLED:
+        MODEL_RELOADS.inc()
+
+
+def timed_jwt_required(**kwargs):
+    """jwt_required() dont la vérification du jeton est mesurée (étape jwt)."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kw):
+            with stage('jwt'):
+                verify_jwt_in_request(**kwargs)
+            return current_app.ensure_sync(fn)(*args, **kw)
+        return wrapper
+    return decorator
+
+
+def _start_timer():
+    g._metrics_start = time.perf_counter()
+
+
+def _observe_request(response):
+    start = g.pop('_metrics_start', None)
+    if start is not None:
+        REQUEST_DURATION.labels(
+            request.endpoint or 'unknown', request.method, str(response.status_code)
+        ).observe(time.perf_counter() - start)
+    return response
+
+
+def metrics_denied():
+    """Réponse d'erreur si le client n'est pas autorisé à lire les métriques."""
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        if request.remote_addr in LOCAL_ADDRESSES:
+            return None
+        return jsonify({'error': 'Accès refusé'}), 403
+
+    scheme, _, provided = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() == 'bearer' and hmac.compare_digest(provided.encode(), token.encode()):
+        return None
+    return jsonify({'error': 'Non autorisé'}), 401, {'WWW-Authenticate': 'Bearer'}
+
+
+def render_metrics():
+    """Exposition texte Prometheus (agrégée sur les workers en multiprocess)."""
+    denied = metrics_denied()
+    if denied is not None:
+        return denied
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return Response(prometheus_client.generate_latest(registry),
+                    content_type=prometheus_client.CONTENT_TYPE_LATEST)
+
+
+def init_app(app):
+    """Enregistre la mesure des requêtes et l'endpoint /api/metrics."""
+    if not METRICS_ENABLED:
+        return
+    app.before_request(_start_timer)
+    app.after_request(_observe_request)
+    app.add_url_rule('/api/metrics', 'metrics', render_metrics)
@@ -0,0 +1,104 @@
+"""
+Benchmark de /api/spam/history: pagination OFFSET vs pagination par curseur
+==========================================================================
+
+Remplit une base SQLite temporaire (1M lignes par défaut, dont la moitié
+pour un utilisateur « intensif »), parcourt tout son historique page par
+page avec SpamAnalysis.keyset_page, et mesure quelques pages à différentes
+profondeurs avec l'ancienne requête OFFSET + COUNT(*) de .paginate().
+
+Vérifie que chaque page mesurée est identique dans les deux modes, et
+que le parcours par curseur renvoie chaque ligne une seule fois.
+
+Usage (depuis backend/):
+    python -m benchmarks.history_pagination [--rows 1000000] [--per-page 20]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from benchmarks.stats_query import HEAVY_USER_ID, seed  # noqa: E402
+
+DEPTHS = (0.0, 0.1, 0.5, 0.9, 1.0)
+
+
+def offset_page(db, SpamAnalysis, user_id, page, per_page):
+    """Ancienne pagination: .paginate() (OFFSET + COUNT(*) à chaque page)."""
+    pagination = SpamAnalysis.query.filter_by(user_id=user_id) \
+        .order_by(*SpamAnalysis.history_order()) \
+        .paginate(page=page, per_page=per_page, error_out=False)
+    return [analysis.id for analysis in pagination.items]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--per-page', type=int, default=20)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix='spam-history-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp_dir, 'bench.db')
+
+    from app import create_app
+    from app.extensions import db
+    from app.models.analysis import SpamAnalysis
+    from flask_migrate import upgrade
+    from sqlalchemy import text
+
+    app = create_app('production')
+    with app.app_context():
+        upgrade()
+        print(f"[1] Insertion de {args.rows} lignes ({tmp_dir})...")
+        start = time.perf_counter()
+        seed(db, SpamAnalysis, args.rows)
+        db.session.execute(text('ANALYZE'))
+        print(f"   - {time.perf_counter() - start:.1f}s")
+
+        print(f"\n[2] Parcours complet par curseur ({args.per_page} lignes/page)")
+        pages = []
+        after = None
+        timings = []
+        while True:
+            start = time.perf_counter()
+            items, has_more = SpamAnalysis.keyset_page(HEAVY_USER_ID, args.per_page, after=after)
+            timings.append(time.perf_counter() - start)
+            pages.append([analysis.id for analysis in items])
+            db.session.expunge_all()
+            if not has_more:
+                break
+            after = (items[-1].analyzed_at, items[-1].id)
+
+        seen = [analysis_id for page in pages for analysis_id in page]
+        if len(seen) != len(set(seen)):
+            print("[ECHEC] Lignes dupliquees dans le parcours par curseur")
+            sys.exit(1)
+        print(f"   - {len(pages)} pages, {len(seen)} lignes en {sum(timings):.1f}s")
+
+        print("\n[3] Temps par page selon la profondeur")
+        print(f"   {'page':>8} {'OFFSET+COUNT':>14} {'curseur':>10}")
+        for depth in DEPTHS:
+            index = min(int(depth * len(pages)), len(pages) - 1)
+            start = time.perf_counter()
+            ids = offset_page(db, SpamAnalysis, HEAVY_USER_ID, index + 1, args.per_page)
+            offset_time = time.perf_counter() - start
+            db.session.expunge_all()
+            if ids != pages[index]:
+                print(f"[ECHEC] Page {index + 1} differente entre OFFSET et curseur")
+                sys.exit(1)
+            print(f"   {index + 1:>8} {offset_time * 1000:>11.1f} ms "
+                  f"{timings[index] * 1000:>7.2f} ms")
+
+        db.session.remove()
+        db.engine.dispose()
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark des moteurs d'inférence: scikit-learn vs NumPy
+========================================================
+
+Vérifie que le moteur NumPy (construit depuis le pickle et depuis le
+modèle compact) donne les mêmes probabilités que le pipeline
+scikit-learn à 1e-9 près sur tout french_spam_only.csv, puis mesure la
+latence par message (p50, p99) de chaque moteur.
+
+Usage (depuis backend/):
+    python -m benchmarks.inference_engine [--messages 2000]
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.services.ml_spam_detector import MODEL_PATH
+from app.services.model_store import load_compact_model
+from app.services.nb_engine import NaiveBayesEngine
+from app.services.text_preprocessor import nettoyage_texte  # noqa: F401
+
+CSV_PATH = os.path.join(backend_dir, 'french_spam_only.csv')
+TOLERANCE = 1e-9
+
+
+def sklearn_predict_proba(model_data):
+    """Retourne la fonction predict_proba du pipeline scikit-learn."""
+    bow = model_data['bow_transformer']
+    tfidf = model_data['tfidf_transformer']
+    model = model_data['model']
+
+    def predict_proba(texts):
+        return model.predict_proba(tfidf.transform(bow.transform(texts)))
+
+    return predict_proba
+
+
+def latencies(predict_proba, messages):
+    """Latence en secondes de chaque message scoré individuellement."""
+    result = np.empty(len(messages))
+    for i, message in enumerate(messages):
+        start = time.perf_counter()
+        predict_proba([message])
+        result[i] = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--messages', type=int, default=2000,
+                        help='Nombre de messages pour la mesure de latence')
+    args = parser.parse_args()
+
+    with open(MODEL_PATH, 'rb') as f:
+        model_data = pickle.load(f)
+
+    engines = {
+        'sklearn': sklearn_predict_proba(model_data),
+        'numpy (pickle)': NaiveBayesEngine.from_sklearn(model_data).predict_proba,
+        'numpy (compact)': NaiveBayesEngine.from_compact(load_compact_model()).predict_proba,
+    }
+
+    messages = pd.read_csv(CSV_PATH)['text_fr'].tolist()
+    print(f"Corpus: {len(messages)} messages")
+
+    # Equivalence numérique sur tout le corpus
+    reference = engines['sklearn'](messages)
+    failed = False
+    for name, predict_proba in engines.items():
+        diff = np.abs(predict_proba(messages) - reference).max()
+        status = 'OK' if diff <= TOLERANCE else 'ECHEC'
+        failed = failed or diff > TOLERANCE
+        print(f"   [{status}] {name:<16} ecart max {diff:.3e}")
+    if failed:
+        sys.exit(1)
+
+    # Latence par message
+    sample = messages[:args.messages]
+    print(f"\nLatence par message ({len(sample)} messages):")
+    for name, predict_proba in engines.items():
+        predict_proba(sample[:50])  # échauffement
+        lat = latencies(predict_proba, sample) * 1e6
+        print(f"   - {name:<16} p50 {np.percentile(lat, 50):8.1f} us | "
+              f"p99 {np.percentile(lat, 99):8.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark de la recherche multi-mots-clés
+=========================================
+
+Compare la boucle `mot_cle in texte` (un test par mot-clé) à l'automate
+d'Aho-Corasick de KeywordMatcher, en faisant croître la liste des
+indicateurs de 70 (SpamDetector.SPAM_INDICATORS) à 10 000 phrases
+synthétiques, sur des textes de 10 000 caractères.
+
+Vérifie que les deux stratégies retournent la même liste, dans le même
+ordre, avant de mesurer.
+
+Usage (depuis backend/):
+    python -m benchmarks.keyword_matcher [--texts 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.services.keyword_matcher import AUTOMATON_MIN_KEYWORDS, KeywordMatcher
+from app.services.spam_detector import SpamDetector
+from app.services.text_preprocessor import nettoyage_texte
+from benchmarks.text_features import CSV_PATH, synthetic_texts
+
+KEYWORD_COUNTS = (70, 300, 1000, 3000, 10000)
+
+
+def scan(keywords, text_lower):
+    """Stratégie d'origine: un test `in` par mot-clé."""
+    return [keyword for keyword in keywords if keyword.lower() in text_lower]
+
+
+def synthetic_keywords(messages, count, seed=42):
+    """Liste intégrée complétée par des phrases de deux mots du corpus."""
+    rng = random.Random(seed)
+    vocabulary = sorted({word for message in messages for word in nettoyage_texte(message)})
+    keywords = list(SpamDetector.SPAM_INDICATORS)
+    while len(keywords) < count:
+        keywords.append(' '.join(rng.sample(vocabulary, 2)))
+    return keywords[:count]
+
+
+def time_per_text(func, texts):
+    start = time.perf_counter()
+    for text in texts:
+        func(text)
+    return (time.perf_counter() - start) / len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--texts', type=int, default=20,
+                        help='Nombre de textes synthétiques de 10 000 caractères')
+    args = parser.parse_args()
+
+    messages = pd.read_csv(CSV_PATH)['text_fr'].tolist()
+    texts = [text.lower() for text in synthetic_texts(messages, args.texts)]
+
+    print(f"{args.texts} textes de 10 000 caracteres "
+          f"(automate active a partir de {AUTOMATON_MIN_KEYWORDS} mots-cles)\n")
+    print(f"{'mots-cles':>10} | {'boucle in':>12} | {'automate':>12} | {'construction':>12}")
+
+    for count in KEYWORD_COUNTS:
+        keywords = synthetic_keywords(messages, count)
+
+        start = time.perf_counter()
+        matcher = KeywordMatcher(keywords, use_automaton=True)
+        build_time = time.perf_counter() - start
+
+        for text in texts:
+            if matcher.find(text) != scan(keywords, text):
+                print(f"[ECHEC] Resultats differents pour {count} mots-cles")
+                sys.exit(1)
+
+        scan_time = time_per_text(lambda text: scan(keywords, text), texts)
+        automaton_time = time_per_text(matcher.find, texts)
+        print(f"{count:>10} | {scan_time * 1e3:9.2f} ms | {automaton_time * 1e3:9.2f} ms | "
+              f"{build_time * 1e3:9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
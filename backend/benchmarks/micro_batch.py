@@ -0,0 +1,152 @@
+"""
+Benchmark du micro-batching: débit et latence sous concurrence
+==============================================================
+
+Des threads simulent des requêtes /api/spam/analyze concurrentes (threads
+de requête d'un worker gunicorn à threads): chacun enchaîne
+des appels à MLSpamDetector.analyze sur les messages du dataset pendant
+--duration secondes.
+
+Configurations comparées, pour chaque niveau de concurrence:
+- off      : un appel vectorisé par texte (sans micro-batching)
+- N ms     : micro-batching avec une attente maximum de N ms par lot
+             (0 ms: seuls les textes arrivés pendant le lot précédent)
+
+Résultats: appels par seconde, latences p50/p99 par appel et taille
+moyenne des lots obtenus.
+
+Vérifie d'abord que les résultats du micro-batching sont identiques à ceux
+d'un appel par texte (code de sortie 1 sinon).
+
+Usage (depuis backend/):
+    python -m benchmarks.micro_batch [--threads 1 4 16 64] [--delays-ms 0 1 2 5]
+        [--max-size 32] [--duration 3]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+os.environ['SPAM_MODEL_CHECK_INTERVAL'] = '0'
+os.environ['SPAM_METRICS'] = '0'
+
+from app.services.micro_batcher import MicroBatcher  # noqa: E402
+from app.services.ml_spam_detector import get_detector  # noqa: E402
+
+
+def check_equivalence(detector, messages, max_size):
+    """Résultats identiques avec et sans micro-batching, appels concurrents compris."""
+    detector._batcher = None
+    expected = [detector.analyze(text) for text in messages]
+
+    detector._batcher = MicroBatcher(detector._score_batch, max_size, 0.002)
+    results = [None] * len(messages)
+
+    def work(offset):
+        for i in range(offset, len(messages), 8):
+            results[i] = detector.analyze(messages[i])
+
+    threads = [threading.Thread(target=work, args=(k,)) for k in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    mismatches = 0
+    for before, after in zip(expected, results):
+        if before != after:
+            mismatches += 1
+    return mismatches, detector._batcher.stats()['meanSize']
+
+
+def run_load(detector, messages, n_threads, duration):
+    """Appels concurrents pendant duration secondes: débit et latences."""
+    latencies = [[] for _ in range(n_threads)]
+    barrier = threading.Barrier(n_threads + 1)
+    deadline = [0.0]
+
+    def work(k):
+        samples = latencies[k]
+        i = k
+        barrier.wait()
+        while time.perf_counter() < deadline[0]:
+            start = time.perf_counter()
+            detector.analyze(messages[i % len(messages)])
+            samples.append(time.perf_counter() - start)
+            i += n_threads
+
+    threads = [threading.Thread(target=work, args=(k,)) for k in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + duration
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+
+    samples = np.concatenate([np.array(s) for s in latencies]) * 1000
+    p50, p99 = np.percentile(samples, [50, 99])
+    return {
+        'calls_per_s': len(samples) / duration,
+        'p50_ms': float(p50),
+        'p99_ms': float(p99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--delays-ms', type=float, nargs='+', default=[0, 1, 2, 5])
+    parser.add_argument('--max-size', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=3.0)
+    args = parser.parse_args()
+
+    messages = pd.read_csv(os.path.join(backend_dir, 'french_spam_only.csv'))['text_fr'] \
+        .dropna().astype(str).tolist()[:2000]
+
+    detector = get_detector()
+    if detector is None:
+        print("[ERREUR] Modele ML introuvable")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("MICRO-BATCHING DES PREDICTIONS CONCURRENTES")
+    print("=" * 60)
+    print(f"   Moteur: {detector.model_info()['engine']}, lots de {args.max_size} textes maximum")
+
+    print("\n[1] Equivalence avec un appel par texte")
+    mismatches, mean_size = check_equivalence(detector, messages[:500], args.max_size)
+    if mismatches:
+        print(f"   [ECHEC] {mismatches} resultat(s) different(s)")
+        sys.exit(1)
+    print(f"   [OK] 500 textes identiques (lots de {mean_size} textes en moyenne)")
+
+    print(f"\n[2] Charge ({args.duration:.0f} s par mesure)")
+    print(f"   {'threads':>7} {'lot':>8} {'appels/s':>10} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'taille lot':>10}")
+    for n_threads in args.threads:
+        configs = [None] + args.delays_ms
+        for delay_ms in configs:
+            if delay_ms is None:
+                detector._batcher = None
+                label = 'off'
+            else:
+                detector._batcher = MicroBatcher(
+                    detector._score_batch, args.max_size, delay_ms / 1000
+                )
+                label = f'{delay_ms:g} ms'
+            result = run_load(detector, messages, n_threads, args.duration)
+            size = detector._batcher.stats()['meanSize'] if detector._batcher else 1
+            print(f"   {n_threads:>7} {label:>8} {result['calls_per_s']:>10.1f} "
+                  f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} {size:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
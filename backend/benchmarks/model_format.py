@@ -0,0 +1,132 @@
+"""
+Benchmark des formats du modèle: pickle vs compact (mmap)
+=========================================================
+
+Pour chaque format, un interpréteur neuf charge le modèle (temps de
+démarrage à froid, imports compris), puis forke N workers comme le fait
+gunicorn. Chaque worker utilise le modèle et rapporte sa mémoire:
+- RSS : mémoire résidente totale (pages partagées comprises)
+- USS : pages privées du worker (Private_Clean + Private_Dirty)
+- PSS : pages partagées réparties entre les processus qui les utilisent
+
+Linux uniquement pour USS/PSS (/proc/<pid>/smaps_rollup).
+
+Usage (depuis backend/):
+    python -m benchmarks.model_format [--workers 2]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Script exécuté dans un interpréteur neuf pour chaque format
+_CHILD_SCRIPT = r'''
+import json, os, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {backend_dir!r})
+fmt = {fmt!r}
+if fmt == 'pickle':
+    import pickle
+    from app.services.text_preprocessor import nettoyage_texte
+    with open(os.path.join({backend_dir!r}, 'model', 'spam_model.pkl'), 'rb') as f:
+        data = pickle.load(f)
+else:
+    from app.services.text_preprocessor import nettoyage_texte
+    from app.services.model_store import load_compact_model
+    data = load_compact_model()
+cold_start = time.perf_counter() - start
+
+import pandas as pd
+messages = pd.read_csv(os.path.join({backend_dir!r}, 'french_spam_only.csv'))['text_fr'].tolist()[:500]
+
+
+def memory():
+    result = {{}}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                    result[key] = int(value.split()[0])
+    except OSError:
+        import resource
+        result['Rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {{
+        'rss_kb': result.get('Rss'),
+        'pss_kb': result.get('Pss'),
+        'uss_kb': (result['Private_Clean'] + result['Private_Dirty'])
+        if 'Private_Clean' in result else None,
+    }}
+
+
+def use_model():
+    if fmt == 'pickle':
+        bow = data['bow_transformer']
+        tfidf = data['tfidf_transformer'].transform(bow.transform(messages))
+        data['model'].predict_proba(tfidf)
+        sum(len(term) for term in bow.vocabulary_)
+    else:
+        for message in messages:
+            data.lookup(nettoyage_texte(message))
+        len(data.vocabulary.tobytes())
+        for name in ('vocabulary_ids', 'idf', 'feature_log_prob'):
+            getattr(data, name).sum()
+
+
+parent = memory()
+read_fd, write_fd = os.pipe()
+pids = []
+for _ in range({workers}):
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        use_model()
+        os.write(write_fd, (json.dumps(memory()) + '\n').encode())
+        os._exit(0)
+    pids.append(pid)
+os.close(write_fd)
+for pid in pids:
+    os.waitpid(pid, 0)
+with os.fdopen(read_fd) as f:
+    workers = [json.loads(line) for line in f]
+print(json.dumps({{'cold_start': cold_start, 'parent': parent, 'workers': workers}}))
+'''
+
+
+def run_format(fmt, workers):
+    """Lance un interpréteur neuf et retourne les mesures du format."""
+    script = _CHILD_SCRIPT.format(backend_dir=backend_dir, fmt=fmt, workers=workers)
+    output = subprocess.check_output([sys.executable, '-c', script], cwd=backend_dir)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def _fmt_kb(value):
+    return f"{value / 1024:8.1f} Mo" if value is not None else '     n/a'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Nombre de workers forkés (comme gunicorn --workers)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"FORMATS DU MODELE ({args.workers} workers)")
+    print("=" * 60)
+
+    for fmt in ('pickle', 'compact'):
+        result = run_format(fmt, args.workers)
+        print(f"\n[{fmt}]")
+        print(f"   - Demarrage a froid : {result['cold_start'] * 1000:8.1f} ms")
+        print(f"   - Master  RSS {_fmt_kb(result['parent']['rss_kb'])}")
+        for i, worker in enumerate(result['workers']):
+            print(f"   - Worker {i} RSS {_fmt_kb(worker['rss_kb'])} | "
+                  f"PSS {_fmt_kb(worker['pss_kb'])} | USS {_fmt_kb(worker['uss_kb'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""
+Benchmark mémoire de gunicorn: préchargement vs chargement par worker
+=====================================================================
+
+Démarre gunicorn avec gunicorn.conf.py pour 2, 4 et 8 workers, dans les
+deux modes:
+- sans préchargement (GUNICORN_PRELOAD=0, moteur sklearn): chaque worker
+  importe l'application et unpickle le modèle, comme l'ancien Procfile
+- avec préchargement (défaut de gunicorn.conf.py) et moteur NumPy
+  (SPAM_INFERENCE_ENGINE=numpy, comme le Procfile): modèle chargé dans
+  le master, gc.freeze(), modèle compact mappé
+
+Chaque serveur reçoit des requêtes /api/spam/analyze (cache d'analyse
+désactivé) pour que tous les workers utilisent le modèle, puis la mémoire
+de chaque processus est lue dans /proc/<pid>/smaps_rollup:
+- RSS : mémoire résidente (pages partagées comprises)
+- USS : pages privées du processus
+- PSS : pages partagées réparties entre les processus qui les utilisent;
+        la somme des PSS est l'empreinte réelle du serveur
+
+Linux uniquement. Code de sortie 1 si une requête échoue.
+
+Usage (depuis backend/):
+    python -m benchmarks.preload_memory [--workers 2 4 8] [--requests-per-worker 50]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import pandas as pd
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+MODES = ('sans prechargement', 'prechargement')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def call(url, payload=None, token=None):
+    """Requête JSON, retourne (statut, corps)."""
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+def memory(pid):
+    """RSS, PSS et USS d'un processus, en Ko."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                values[key] = int(value.split()[0])
+    return {
+        'rss_kb': values['Rss'],
+        'pss_kb': values['Pss'],
+        'uss_kb': values['Private_Clean'] + values['Private_Dirty'],
+    }
+
+
+def worker_pids(master_pid):
+    with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def run_server(mode, workers, database_url, messages, requests_per_worker):
+    """Démarre gunicorn, envoie les requêtes et mesure la mémoire."""
+    port = free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        FLASK_ENV='production',
+        PORT=str(port),
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_PRELOAD='1' if mode == 'prechargement' else '0',
+        SPAM_INFERENCE_ENGINE='numpy' if mode == 'prechargement' else 'sklearn',
+        SPAM_CACHE_SIZE='0',
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'run:app', '-c', 'gunicorn.conf.py'],
+        cwd=backend_dir, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base = f'http://127.0.0.1:{port}/api'
+    try:
+        deadline = time.monotonic() + 120
+        while True:
+            try:
+                if call(f'{base}/health')[0] == 200 and len(worker_pids(server.pid)) == workers:
+                    break
+            except (OSError, urllib.error.URLError):
+                pass
+            if time.monotonic() > deadline or server.poll() is not None:
+                raise RuntimeError(f"gunicorn n'a pas démarré ({mode}, {workers} workers)")
+            time.sleep(0.2)
+
+        email = f'bench-{port}@example.com'
+        call(f'{base}/auth/register', {'name': 'Bench', 'email': email, 'password': 'bench123'})
+        status, body = call(f'{base}/auth/login', {'email': email, 'password': 'bench123'})
+        token = body['access_token']
+
+        failures = 0
+        for i in range(requests_per_worker * workers):
+            status, _ = call(f'{base}/spam/analyze', {'text': messages[i % len(messages)]}, token)
+            failures += status != 200
+
+        return {
+            'master': memory(server.pid),
+            'workers': [memory(pid) for pid in worker_pids(server.pid)],
+            'failures': failures,
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, 8])
+    parser.add_argument('--requests-per-worker', type=int, default=50)
+    args = parser.parse_args()
+
+    messages = pd.read_csv(os.path.join(backend_dir, 'french_spam_only.csv'))['text_fr'] \
+        .dropna().astype(str).tolist()[:1000]
+
+    tmp_dir = tempfile.mkdtemp(prefix='spam-preload-')
+    database_url = 'sqlite:///' + os.path.join(tmp_dir, 'bench.db')
+
+    # Schéma créé une fois, avant le démarrage des serveurs
+    os.environ['DATABASE_URL'] = database_url
+    from app import create_app
+    from flask_migrate import upgrade
+    with create_app('production').app_context():
+        upgrade()
+
+    print("=" * 60)
+    print("MEMOIRE GUNICORN: PRECHARGEMENT VS CHARGEMENT PAR WORKER")
+    print("=" * 60)
+    print(f"   {'mode':<20} {'workers':>7} {'RSS/worker':>11} {'USS/worker':>11} "
+          f"{'PSS total':>10}")
+
+    failed = False
+    try:
+        for workers in args.workers:
+            for mode in MODES:
+                result = run_server(mode, workers, database_url, messages,
+                                    args.requests_per_worker)
+                failed |= result['failures'] > 0
+                count = len(result['workers'])
+                rss = sum(w['rss_kb'] for w in result['workers']) / count / 1024
+                uss = sum(w['uss_kb'] for w in result['workers']) / count / 1024
+                pss = (result['master']['pss_kb']
+                       + sum(w['pss_kb'] for w in result['workers'])) / 1024
+                print(f"   {mode:<20} {workers:>7} {rss:>8.1f} Mo {uss:>8.1f} Mo "
+                      f"{pss:>7.1f} Mo")
+                if result['failures']:
+                    print(f"   [ECHEC] {result['failures']} requete(s) en erreur")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
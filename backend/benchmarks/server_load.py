@@ -0,0 +1,298 @@
+"""
+Test de charge: workers gunicorn synchrones vs workers à threads
+================================================================
+
+Démarre successivement gunicorn run:app -c gunicorn.conf.py dans chaque
+mode, avec le même nombre de processus:
+- sync    : un thread par worker (GUNICORN_THREADS=1)
+- gthread : --threads threads par worker (GUNICORN_THREADS)
+
+Pour chaque niveau de concurrence (50, 200 et 1000 clients par défaut),
+chaque client virtuel enchaîne des requêtes pendant --duration secondes:
+POST /api/spam/analyze, et GET /api/spam/history pour une fraction
+--history-ratio des requêtes. Les clients sont des coroutines asyncio sur
+des connexions HTTP/1.1 persistantes (reconnexion si le serveur ferme).
+
+Résultats par serveur et par niveau: requêtes réussies par seconde,
+latences p50/p95/p99 des réponses 200, nombre de 503 et d'erreurs
+(autres statuts, délais, connexions refusées).
+
+Le client et le serveur partagent la machine: sur peu de cœurs, le client
+consomme une part du CPU mesuré.
+
+Code de sortie 1 si un serveur renvoie un statut autre que 200 ou 503.
+
+Usage (depuis backend/):
+    python -m benchmarks.server_load [--clients 50 200 1000] [--duration 10]
+        [--processes 2] [--threads 8] [--history-ratio 0.2]
+        [--modes sync gthread] [-o resultats.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+SERVER = [sys.executable, '-m', 'gunicorn', 'run:app', '-c', 'gunicorn.conf.py']
+MODES = ('sync', 'gthread')
+REQUEST_TIMEOUT = 30
+SEED = 42
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class HttpClient:
+    """Client HTTP/1.1 minimal sur une connexion persistante."""
+
+    def __init__(self, port):
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, payload=None, token=None):
+        """Envoie une requête et retourne (statut, en-têtes, corps)."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port)
+
+        body = json.dumps(payload).encode() if payload is not None else b''
+        headers = [f'{method} {path} HTTP/1.1', f'Host: 127.0.0.1:{self.port}',
+                   f'Content-Length: {len(body)}']
+        if payload is not None:
+            headers.append('Content-Type: application/json')
+        if token:
+            headers.append(f'Authorization: Bearer {token}')
+        self.writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode() + body)
+
+        try:
+            head = await self.reader.readuntil(b'\r\n\r\n')
+            lines = head.decode('latin-1').split('\r\n')
+            status = int(lines[0].split()[1])
+            fields = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+                fields[name.strip().lower()] = value.strip()
+            if 'content-length' in fields:
+                data = await self.reader.readexactly(int(fields['content-length']))
+                keep_alive = fields.get('connection', '').lower() != 'close'
+            else:
+                data = await self.reader.read()
+                keep_alive = False
+        except BaseException:
+            self.close()
+            raise
+        if not keep_alive:
+            self.close()
+        return status, fields, data
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+async def virtual_client(port, token, messages, history_ratio, deadline, rng, stats):
+    """Enchaîne des requêtes jusqu'à l'échéance."""
+    client = HttpClient(port)
+    try:
+        while time.monotonic() < deadline:
+            if rng.random() < history_ratio:
+                call = client.request('GET', '/api/spam/history?per_page=20', token=token)
+            else:
+                text = messages[rng.randrange(len(messages))]
+                call = client.request('POST', '/api/spam/analyze', {'text': text}, token)
+            start = time.perf_counter()
+            try:
+                status, fields, _ = await asyncio.wait_for(call, REQUEST_TIMEOUT)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                client.close()
+                stats['errors'] += 1
+                stats['transport_errors'] += 1
+                await asyncio.sleep(0.1)
+                continue
+            elapsed = time.perf_counter() - start
+            if status == 200:
+                stats['latencies'].append(elapsed)
+            elif status == 503:
+                stats['rejected'] += 1
+                # Le client respecte Retry-After avant de réessayer
+                await asyncio.sleep(float(fields.get('retry-after', 1)))
+            else:
+                stats['errors'] += 1
+                stats['statuses'][status] = stats['statuses'].get(status, 0) + 1
+    finally:
+        client.close()
+
+
+async def load(port, token, messages, clients, duration, history_ratio):
+    """Niveau de charge: clients simultanés pendant duration secondes."""
+    stats = {'latencies': [], 'rejected': 0, 'errors': 0, 'transport_errors': 0, 'statuses': {}}
+    rng = random.Random(SEED)
+    start = time.monotonic()
+    deadline = start + duration
+    await asyncio.gather(*(
+        virtual_client(port, token, messages, history_ratio, deadline,
+                       random.Random(rng.random()), stats)
+        for _ in range(clients)
+    ))
+    elapsed = time.monotonic() - start
+
+    latencies = np.array(stats['latencies']) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0, 0, 0)
+    return {
+        'clients': clients,
+        'ok': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(float(p50), 1),
+        'p95_ms': round(float(p95), 1),
+        'p99_ms': round(float(p99), 1),
+        'rejected_503': stats['rejected'],
+        'errors': stats['errors'],
+        'transport_errors': stats['transport_errors'],
+        'statuses': stats['statuses'],
+    }
+
+
+async def login(port, email):
+    client = HttpClient(port)
+    try:
+        await client.request('POST', '/api/auth/register',
+                             {'name': 'Bench', 'email': email, 'password': 'bench123'})
+        status, _, body = await client.request('POST', '/api/auth/login',
+                                            {'email': email, 'password': 'bench123'})
+        return json.loads(body)['access_token']
+    finally:
+        client.close()
+
+
+async def wait_ready(port, server, timeout=120):
+    deadline = time.monotonic() + timeout
+    while True:
+        client = HttpClient(port)
+        try:
+            if (await client.request('GET', '/api/health'))[0] == 200:
+                return
+        except OSError:
+            pass
+        finally:
+            client.close()
+        if time.monotonic() > deadline or server.poll() is not None:
+            raise RuntimeError("le serveur n'a pas démarré")
+        await asyncio.sleep(0.2)
+
+
+def run_server(mode, args, database_url, messages):
+    """Démarre un serveur, applique chaque niveau de charge et l'arrête."""
+    port = free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        FLASK_ENV='production',
+        PORT=str(port),
+        WEB_CONCURRENCY=str(args.processes),
+        GUNICORN_THREADS=str(args.threads if mode == 'gthread' else 1),
+        SPAM_CACHE_SIZE='0',
+        SPAM_METRICS='0',
+        # Base SQLite de test: attendre le verrou d'écriture plutôt qu'échouer
+        SQLITE_BUSY_TIMEOUT_MS=str(REQUEST_TIMEOUT * 1000),
+    )
+    server = subprocess.Popen(SERVER, cwd=backend_dir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        asyncio.run(wait_ready(port, server))
+        token = asyncio.run(login(port, f'bench-{port}@example.com'))
+        results = []
+        for clients in args.clients:
+            result = asyncio.run(load(port, token, messages, clients,
+                                      args.duration, args.history_ratio))
+            results.append(result)
+            print(f"   {mode:<7} {clients:>7} {result['rps']:>9.1f} {result['p50_ms']:>9.1f} "
+                  f"{result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} "
+                  f"{result['rejected_503']:>7} {result['errors']:>7}")
+        return results
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--clients', type=int, nargs='+', default=[50, 200, 1000])
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help='Durée de chaque niveau de charge (secondes)')
+    parser.add_argument('--processes', type=int, default=2,
+                        help='Processus par serveur (WEB_CONCURRENCY)')
+    parser.add_argument('--threads', type=int, default=8,
+                        help='Threads par worker du mode gthread')
+    parser.add_argument('--history-ratio', type=float, default=0.2,
+                        help="Part des requêtes GET /history")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('-o', '--output', help='Fichier JSON des résultats')
+    args = parser.parse_args()
+
+    messages = pd.read_csv(os.path.join(backend_dir, 'french_spam_only.csv'))['text_fr'] \
+        .dropna().astype(str).tolist()[:1000]
+
+    tmp_dir = tempfile.mkdtemp(prefix='spam-asgi-load-')
+    database_url = 'sqlite:///' + os.path.join(tmp_dir, 'bench.db')
+
+    # Schéma créé une fois, avant le démarrage des serveurs
+    os.environ['DATABASE_URL'] = database_url
+    from app import create_app
+    from flask_migrate import upgrade
+    with create_app('production').app_context():
+        upgrade()
+
+    print("=" * 60)
+    print("TEST DE CHARGE: WORKERS SYNCHRONES VS WORKERS A THREADS")
+    print("=" * 60)
+    print(f"   {args.processes} processus par serveur, {args.threads} threads (gthread), "
+          f"{args.duration:.0f} s par niveau, "
+          f"{args.history_ratio:.0%} de requetes /history")
+    print(f"   {'mode':<7} {'clients':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'503':>7} {'erreurs':>7}")
+
+    results = {}
+    try:
+        for mode in args.modes:
+            results[mode] = run_server(mode, args, database_url, messages)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"   [OK] Resultats enregistres: {args.output}")
+
+    unexpected = {
+        mode: [r['statuses'] for r in mode_results if r['statuses']]
+        for mode, mode_results in results.items()
+    }
+    unexpected = {mode: statuses for mode, statuses in unexpected.items() if statuses}
+    if unexpected:
+        print(f"\n[ECHEC] Statuts inattendus: {unexpected}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
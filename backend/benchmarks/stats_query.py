@@ -0,0 +1,168 @@
+"""
+Benchmark de /api/spam/stats: 5 requêtes vs 1 requête agrégée vs rollup
+========================================================================
+
+Remplit une base SQLite temporaire (1M lignes par défaut, dont la moitié
+pour un seul utilisateur « intensif »), puis compare l'ancienne
+implémentation de get_stats (5 allers-retours) à
+SpamAnalysis.aggregate_stats (une seule requête), avec et sans les index
+composites (user_id, analyzed_at, id) et (user_id, is_spam, ...), et à la
+lecture des rollups UserSpamStats (indépendante de la taille de l'historique).
+
+SQLite étant dans le processus, les allers-retours réseau d'une base
+distante (PostgreSQL sur Render) n'apparaissent pas: --rtt-ms ajoute une
+latence simulée par requête pour les modéliser.
+
+Usage (depuis backend/):
+    python -m benchmarks.stats_query [--rows 1000000] [--repeat 5] [--rtt-ms 0]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+HEAVY_USER_ID = 1
+OTHER_USERS = 10
+COMPOSITE_INDEXES = ('ix_spam_analyses_user_analyzed_at_id', 'ix_spam_analyses_user_is_spam')
+
+
+def stats_reference(db, SpamAnalysis, user_id, since):
+    """Ancienne implémentation de get_stats: cinq requêtes séparées."""
+    from sqlalchemy import func
+
+    total = SpamAnalysis.query.filter_by(user_id=user_id).count()
+    spam = SpamAnalysis.query.filter_by(user_id=user_id, is_spam=True).count()
+    avg_confidence = db.session.query(
+        func.avg(SpamAnalysis.confidence)
+    ).filter_by(user_id=user_id).scalar()
+    recent_total = SpamAnalysis.query.filter(
+        SpamAnalysis.user_id == user_id,
+        SpamAnalysis.analyzed_at >= since
+    ).count()
+    recent_spam = SpamAnalysis.query.filter(
+        SpamAnalysis.user_id == user_id,
+        SpamAnalysis.is_spam == True,  # noqa: E712
+        SpamAnalysis.analyzed_at >= since
+    ).count()
+    return {
+        'total': total,
+        'spam': spam,
+        'avg_confidence': avg_confidence,
+        'recent_total': recent_total,
+        'recent_spam': recent_spam
+    }
+
+
+def seed(db, SpamAnalysis, rows, chunk=50000):
+    """Insère `rows` analyses réparties sur les 30 derniers jours."""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    table = SpamAnalysis.__table__
+    inserted = 0
+    while inserted < rows:
+        batch = []
+        for i in range(inserted, min(rows, inserted + chunk)):
+            user_id = HEAVY_USER_ID if i % 2 == 0 else 2 + i % OTHER_USERS
+            batch.append({
+                'id': i + 1,
+                'user_id': user_id,
+                'text': 'message',
+                'is_spam': rng.random() < 0.3,
+                'confidence': rng.uniform(50, 100),
+                'indicators': '[]',
+                'flags': '{}',
+                'analyzed_at': now - timedelta(seconds=rng.randint(0, 30 * 86400))
+            })
+        db.session.execute(table.insert(), batch)
+        inserted += len(batch)
+    db.session.commit()
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--rtt-ms', type=float, default=0.0,
+                        help='Latence réseau simulée par requête (ms)')
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix='spam-stats-')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp_dir, 'bench.db')
+
+    from app import create_app
+    from app.extensions import db
+    from app.models.analysis import SpamAnalysis
+    from app.models.stats import UserSpamStats, recent_cutoff
+    from flask_migrate import upgrade
+    from sqlalchemy import event, text
+
+    app = create_app('production')
+    with app.app_context():
+        upgrade()
+    if args.rtt_ms:
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute',
+                         lambda *_: time.sleep(args.rtt_ms / 1000))
+    with app.app_context():
+        print(f"[1] Insertion de {args.rows} lignes ({tmp_dir})...")
+        start = time.perf_counter()
+        seed(db, SpamAnalysis, args.rows)
+        print(f"   - {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        with db.engine.begin() as conn:
+            UserSpamStats.rebuild(conn)
+        print(f"   - rollups recalculés en {time.perf_counter() - start:.1f}s")
+
+        # Fenêtre arrondie à l'heure, comme les compteurs horaires du rollup
+        since = recent_cutoff()
+        old = lambda: stats_reference(db, SpamAnalysis, HEAVY_USER_ID, since)  # noqa: E731
+        new = lambda: SpamAnalysis.aggregate_stats(HEAVY_USER_ID, since)  # noqa: E731
+        rollup = lambda: UserSpamStats.read(HEAVY_USER_ID)  # noqa: E731
+
+        for label in ('avec index composites', 'sans index composites'):
+            db.session.execute(text('ANALYZE'))
+            old_time, old_result = measure(old, args.repeat)
+            new_time, new_result = measure(new, args.repeat)
+            rollup_time, rollup_result = measure(rollup, args.repeat)
+            for result in (new_result, rollup_result):
+                if old_result['total'] != result['total'] or \
+                        old_result['spam'] != result['spam'] or \
+                        old_result['recent_total'] != result['recent_total'] or \
+                        old_result['recent_spam'] != result['recent_spam'] or \
+                        abs(old_result['avg_confidence'] - result['avg_confidence']) > 1e-9:
+                    print(f"[ECHEC] Resultats differents: {old_result} / {result}")
+                    sys.exit(1)
+            print(f"\n[2] {label} (utilisateur intensif: {new_result['total']} lignes)")
+            print(f"   - 5 requetes : {old_time * 1000:8.1f} ms")
+            print(f"   - 1 requete  : {new_time * 1000:8.1f} ms")
+            print(f"   - rollup     : {rollup_time * 1000:8.1f} ms")
+
+            for name in COMPOSITE_INDEXES:
+                db.session.execute(text(f'DROP INDEX IF EXISTS {name}'))
+            db.session.commit()
+
+        db.session.remove()
+        db.engine.dispose()
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
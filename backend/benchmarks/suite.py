@@ -0,0 +1,333 @@
+"""
+Suite de benchmarks du pipeline de détection
+============================================
+
+Mesure chaque étape du pipeline sur deux jeux d'entrées reproductibles:
+- short : messages de french_spam_only.csv
+- long  : textes synthétiques de 1 000, 5 000 et 10 000 caractères (la
+          limite de validate_text), assemblés à partir du dataset avec une
+          graine fixe
+
+Étapes mesurées:
+- tokenize    : nettoyage_texte
+- ml_predict  : MLSpamDetector.predict
+- patterns    : MLSpamDetector._analyze_patterns
+- indicators  : MLSpamDetector._find_indicators
+- rules       : SpamDetector._analyze_with_rules
+- api_analyze : requête POST /api/spam/analyze complète (client de test
+                Flask, JWT, JSON, analyse et insertion en base SQLite)
+
+Pour chaque mesure: latences p50/p95/p99 et moyenne (µs), débit (appels
+par seconde), et pic d'allocation par appel (tracemalloc, passe séparée
+pour ne pas fausser les latences). Le cache d'analyse et la surveillance
+du modèle sont désactivés. Chaque mesure est répétée --rounds fois et la
+série la plus rapide (moyenne la plus basse) est retenue: les séries
+ralenties par un autre processus de la machine sont écartées.
+
+Mode compare: relance la suite (ou lit un second fichier de résultats) et
+échoue (code de sortie 1) si une métrique se dégrade de plus du seuil par
+rapport à la référence.
+
+Usage (depuis backend/):
+    python -m benchmarks.suite run [-o resultats.json] [--iterations 1000] [--rounds 3]
+    python -m benchmarks.suite compare reference.json [resultats.json]
+        [--threshold 0.2] [--metrics p50_us p95_us throughput_per_s alloc_peak_kb_mean]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+# Chaque appel doit refaire le calcul complet
+os.environ['SPAM_CACHE_SIZE'] = '0'
+os.environ['SPAM_MODEL_CHECK_INTERVAL'] = '0'
+
+CSV_PATH = os.path.join(backend_dir, 'french_spam_only.csv')
+RESULTS_VERSION = 1
+
+LONG_LENGTHS = (1000, 5000, 10000)
+LONG_TEXTS_PER_LENGTH = 20
+SEED = 42
+
+# Sens de chaque métrique: +1 si une hausse est une dégradation
+METRICS = {
+    'p50_us': 1,
+    'p95_us': 1,
+    'p99_us': 1,
+    'throughput_per_s': -1,
+    'alloc_peak_kb_mean': 1,
+}
+# p99 est trop bruité pour bloquer par défaut
+DEFAULT_COMPARE_METRICS = ('p50_us', 'p95_us', 'throughput_per_s', 'alloc_peak_kb_mean')
+
+
+def load_inputs():
+    """Entrées reproductibles: messages du dataset et textes longs synthétiques."""
+    messages = pd.read_csv(CSV_PATH)['text_fr'].dropna().astype(str).tolist()
+
+    rng = random.Random(SEED)
+    long_texts = []
+    for length in LONG_LENGTHS:
+        for _ in range(LONG_TEXTS_PER_LENGTH):
+            parts = []
+            size = 0
+            while size < length:
+                part = rng.choice(messages)
+                parts.append(part)
+                size += len(part) + 1
+            long_texts.append(' '.join(parts)[:length])
+
+    return {'short': messages, 'long': long_texts}
+
+
+def measure(func, texts, iterations, rounds=3, warmup=20, alloc_samples=50):
+    """
+    Latences, débit et allocations de func sur une liste de textes.
+
+    Les textes sont parcourus en boucle dans l'ordre: deux exécutions avec
+    le même nombre d'itérations font exactement les mêmes appels. Les
+    allocations sont mesurées sur des textes répartis sur toute la liste.
+    """
+    for i in range(warmup):
+        func(texts[i % len(texts)])
+
+    best = None
+    for _ in range(rounds):
+        gc.collect()
+        samples = np.empty(iterations, dtype=np.float64)
+        for i in range(iterations):
+            text = texts[i % len(texts)]
+            start = time.perf_counter_ns()
+            func(text)
+            samples[i] = time.perf_counter_ns() - start
+        if best is None or samples.sum() < best.sum():
+            best = samples
+    samples = best
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in np.linspace(0, len(texts) - 1, min(alloc_samples, len(texts))).astype(int):
+            text = texts[i]
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            func(text)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    samples_us = samples / 1000
+    p50, p95, p99 = np.percentile(samples_us, [50, 95, 99])
+    return {
+        'iterations': iterations,
+        'rounds': rounds,
+        'p50_us': round(float(p50), 2),
+        'p95_us': round(float(p95), 2),
+        'p99_us': round(float(p99), 2),
+        'mean_us': round(float(samples_us.mean()), 2),
+        'throughput_per_s': round(iterations / (samples.sum() / 1e9), 1),
+        'alloc_peak_kb_mean': round(float(np.mean(peaks)) / 1024, 2),
+        'alloc_peak_kb_max': round(float(np.max(peaks)) / 1024, 2),
+    }
+
+
+def build_benchmarks():
+    """Fonctions mesurées, indexées par nom d'étape."""
+    from app import create_app
+    from app.extensions import db
+    from app.services.ml_spam_detector import get_detector
+    from app.services.spam_detector import SpamDetector
+    from app.services.text_preprocessor import nettoyage_texte
+
+    detector = get_detector()
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()  # Base en mémoire, comme les tests
+    client = app.test_client()
+    client.post('/api/auth/register', json={
+        'name': 'Benchmark', 'email': 'bench@example.com', 'password': 'bench123'
+    })
+    token = client.post('/api/auth/login', json={
+        'email': 'bench@example.com', 'password': 'bench123'
+    }).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def api_analyze(text):
+        response = client.post('/api/spam/analyze', json={'text': text}, headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/spam/analyze: HTTP {response.status_code}")
+
+    benchmarks = {
+        'tokenize': nettoyage_texte,
+        'ml_predict': detector.predict,
+        'patterns': detector._analyze_patterns,
+        'indicators': detector._find_indicators,
+        'rules': SpamDetector._analyze_with_rules,
+        'api_analyze': api_analyze,
+    }
+    return benchmarks, detector
+
+
+def environment(detector):
+    """Contexte de la mesure, enregistré avec les résultats."""
+    import sklearn
+
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=backend_dir,
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'date': datetime.utcnow().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'model': detector.model_info(),
+    }
+
+
+def run_suite(iterations, rounds):
+    """Exécute toute la suite et retourne le dictionnaire de résultats."""
+    inputs = load_inputs()
+    benchmarks, detector = build_benchmarks()
+
+    results = {}
+    for name, func in benchmarks.items():
+        for input_name, texts in inputs.items():
+            if input_name == 'short':
+                count = iterations
+            else:
+                # Passes complètes: chaque longueur pèse autant dans les percentiles
+                count = len(texts) * max(1, round(iterations / 10 / len(texts)))
+            key = f'{name}/{input_name}'
+            results[key] = measure(func, texts, count, rounds)
+            result = results[key]
+            print(f"   {key:<24} p50 {result['p50_us']:>10.1f} µs | "
+                  f"p95 {result['p95_us']:>10.1f} µs | p99 {result['p99_us']:>10.1f} µs | "
+                  f"{result['throughput_per_s']:>9.1f}/s | "
+                  f"alloc {result['alloc_peak_kb_mean']:>8.1f} Ko", file=sys.stderr)
+
+    return {
+        'version': RESULTS_VERSION,
+        'iterations': iterations,
+        'environment': environment(detector),
+        'results': results,
+    }
+
+
+def compare(reference, current, threshold, metrics):
+    """
+    Écarts relatifs entre deux résultats.
+
+    Returns:
+        list: Dégradations au-delà du seuil (benchmark, métrique, écart)
+    """
+    regressions = []
+    print(f"\n   {'benchmark':<24} {'metrique':<20} {'reference':>12} {'actuel':>12} {'ecart':>8}")
+    for key, reference_result in reference['results'].items():
+        current_result = current['results'].get(key)
+        if current_result is None:
+            print(f"   {key:<24} absent des resultats actuels")
+            continue
+        for metric in metrics:
+            before = reference_result.get(metric)
+            after = current_result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = change * METRICS[metric] > threshold
+            marker = '  <- degradation' if worse else ''
+            print(f"   {key:<24} {metric:<20} {before:>12.2f} {after:>12.2f} "
+                  f"{change:>+7.1%}{marker}")
+            if worse:
+                regressions.append((key, metric, change))
+
+    for key in current['results'].keys() - reference['results'].keys():
+        print(f"   {key:<24} nouveau (pas de reference)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Exécuter la suite')
+    run_parser.add_argument('-o', '--output', help='Fichier JSON des résultats')
+    run_parser.add_argument('--iterations', type=int, default=1000,
+                            help='Appels par mesure sur les messages courts')
+    run_parser.add_argument('--rounds', type=int, default=3,
+                            help='Répétitions de chaque mesure (la plus rapide est retenue)')
+
+    compare_parser = commands.add_parser('compare', help='Comparer à une référence')
+    compare_parser.add_argument('reference', help='Résultats de référence (JSON)')
+    compare_parser.add_argument('current', nargs='?',
+                                help='Résultats à comparer (défaut: nouvelle exécution)')
+    compare_parser.add_argument('-o', '--output', help='Enregistrer la nouvelle exécution')
+    compare_parser.add_argument('--iterations', type=int, default=1000)
+    compare_parser.add_argument('--rounds', type=int, default=3)
+    compare_parser.add_argument('--threshold', type=float, default=0.2,
+                                help='Dégradation relative tolérée (0.2 = 20%%)')
+    compare_parser.add_argument('--metrics', nargs='+', choices=sorted(METRICS),
+                                default=list(DEFAULT_COMPARE_METRICS))
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("SUITE DE BENCHMARKS DU PIPELINE DE DETECTION")
+    print("=" * 60)
+
+    if args.command == 'compare' and args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        print(f"\n[1] Mesures ({args.iterations} appels par etape sur les messages courts)")
+        current = run_suite(args.iterations, args.rounds)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(current, f, indent=2, ensure_ascii=False)
+            print(f"   [OK] Resultats enregistres: {args.output}")
+
+    if args.command == 'run':
+        return
+
+    with open(args.reference) as f:
+        reference = json.load(f)
+
+    print(f"\n[2] Comparaison a {args.reference} (seuil {args.threshold:.0%})")
+    if reference.get('iterations') != current.get('iterations'):
+        print(f"   [ATTENTION] iterations differentes: "
+              f"{reference.get('iterations')} -> {current.get('iterations')}")
+    for field in ('python', 'sklearn', 'numpy', 'cpu_count'):
+        if reference['environment'].get(field) != current['environment'].get(field):
+            print(f"   [ATTENTION] {field} different: "
+                  f"{reference['environment'].get(field)} -> {current['environment'].get(field)}")
+
+    regressions = compare(reference, current, args.threshold, args.metrics)
+    if regressions:
+        print(f"\n[ECHEC] {len(regressions)} metrique(s) degradee(s) au-dela de {args.threshold:.0%}")
+        sys.exit(1)
+    print("\n[OK] Aucune degradation au-dela du seuil")
+
+
+if __name__ == '__main__':
+    main()
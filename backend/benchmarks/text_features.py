@@ -0,0 +1,141 @@
+"""
+Benchmark de l'extraction des caractéristiques heuristiques
+===========================================================
+
+Compare les implémentations d'origine de MLSpamDetector._analyze_patterns
+et SpamDetector._analyze_with_rules (plusieurs parcours du texte, regex
+non compilées) au module partagé text_features.
+
+Vérifie d'abord que les sorties sont identiques sur french_spam_only.csv
+et sur des textes synthétiques de 10 000 caractères (maximum accepté par
+validate_text), puis mesure le temps moyen par texte.
+
+Usage (depuis backend/):
+    python -m benchmarks.text_features [--texts 200]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.services.spam_detector import SpamDetector
+from app.services.text_features import extract_features
+
+CSV_PATH = os.path.join(backend_dir, 'french_spam_only.csv')
+MAX_TEXT_LENGTH = 10000
+
+
+def analyze_patterns_reference(text):
+    """Implémentation d'origine de MLSpamDetector._analyze_patterns."""
+    flags = {
+        'multipleExclamations': False,
+        'allCaps': False,
+        'suspiciousUrl': False,
+        'phoneNumber': False,
+        'moneySymbol': False,
+        'excessivePunctuation': False
+    }
+    if text.count('!') >= 3:
+        flags['multipleExclamations'] = True
+    alpha_chars = [c for c in text if c.isalpha()]
+    if alpha_chars:
+        caps_ratio = sum(1 for c in alpha_chars if c.isupper()) / len(alpha_chars)
+        if caps_ratio > 0.6:
+            flags['allCaps'] = True
+    if re.search(r'https?://|www\.|\.com|\.net|\.org|\.fr', text.lower()):
+        flags['suspiciousUrl'] = True
+    if re.search(r'\+?\d{1,3}[-.\s]?\(?\d{1,4}\)?[-.\s]?\d{1,4}[-.\s]?\d{1,9}', text):
+        flags['phoneNumber'] = True
+    if re.search(r'[$€£¥₹]|\d+\s*(euro|dollar|usd|eur)', text.lower()):
+        flags['moneySymbol'] = True
+    punctuation_count = sum(1 for c in text if c in '!?.,;:')
+    if len(text) > 0 and punctuation_count / len(text) > 0.1:
+        flags['excessivePunctuation'] = True
+    return flags
+
+
+def analyze_with_rules_reference(text):
+    """Implémentation d'origine de SpamDetector._analyze_with_rules (sans jitter)."""
+    text_lower = text.lower()
+    weights = SpamDetector.WEIGHTS
+    score = 0
+    found_indicators = []
+    for indicator in SpamDetector.SPAM_INDICATORS:
+        if indicator.lower() in text_lower:
+            found_indicators.append(indicator)
+            score += weights['indicator']
+    flags = analyze_patterns_reference(text)
+    for flag, weight_key in SpamDetector.FLAG_WEIGHTS.items():
+        if flags[flag]:
+            score += weights[weight_key]
+    return found_indicators, flags, score
+
+
+def synthetic_texts(messages, count, seed=42):
+    """Construit des textes de 10 000 caractères à partir du corpus."""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        parts = []
+        length = 0
+        while length < MAX_TEXT_LENGTH:
+            part = rng.choice(messages)
+            parts.append(part)
+            length += len(part) + 1
+        texts.append(' '.join(parts)[:MAX_TEXT_LENGTH])
+    return texts
+
+
+def time_per_text(func, texts):
+    start = time.perf_counter()
+    for text in texts:
+        func(text)
+    return (time.perf_counter() - start) / len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--texts', type=int, default=200,
+                        help='Nombre de textes synthétiques de 10 000 caractères')
+    args = parser.parse_args()
+
+    messages = pd.read_csv(CSV_PATH)['text_fr'].tolist()
+    long_texts = synthetic_texts(messages, args.texts)
+
+    # Equivalence des sorties
+    mismatches = 0
+    for text in messages + long_texts:
+        if extract_features(text)['flags'] != analyze_patterns_reference(text):
+            mismatches += 1
+            continue
+        result = SpamDetector._analyze_with_rules(text)
+        if (result['indicators'], result['flags'], result['score']) != \
+                analyze_with_rules_reference(text):
+            mismatches += 1
+    if mismatches:
+        print(f"[ECHEC] {mismatches} textes donnent un resultat different")
+        sys.exit(1)
+    print(f"[OK] Sorties identiques sur {len(messages) + len(long_texts)} textes")
+
+    cases = [
+        ('patterns (avant)', analyze_patterns_reference),
+        ('patterns (apres)', lambda text: extract_features(text)['flags']),
+        ('regles   (avant)', analyze_with_rules_reference),
+        ('regles   (apres)', SpamDetector._analyze_with_rules),
+    ]
+    for label, corpus in (('Corpus', messages), ('10 000 caracteres', long_texts)):
+        print(f"\n{label} ({len(corpus)} textes):")
+        for name, func in cases:
+            print(f"   - {name} : {time_per_text(func, corpus) * 1e6:10.1f} us/texte")
+
+
+if __name__ == '__main__':
+    main()
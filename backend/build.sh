@@ -13,4 +13,7 @@ python -c "import nltk; nltk.download('stopwords', quiet=True)"
 echo "=== Entrainement du modele ML ==="
 python train_model.py
 
+echo "=== Migration du schema de la base ==="
+flask --app run db upgrade
+
 echo "=== Build termine avec succes ==="
@@ -0,0 +1,116 @@
+"""
+Configuration gunicorn (chargée par: gunicorn run:app -c gunicorn.conf.py)
+=========================================================================
+
+Mode préchargement (défaut): l'application, et donc le modèle ML, est
+chargée une seule fois dans le master avant le fork. Les workers
+partagent ces pages en copy-on-write au lieu d'unpickler chacun leur
+copie du modèle.
+
+Pour que les pages restent partagées:
+- gc.freeze() dans le master, juste avant le premier fork: les objets
+  existants passent dans une génération permanente que le ramasse-miettes
+  ne parcourt plus (il écrirait sinon dans leurs en-têtes, page par page)
+- moteur d'inférence NumPy sur le modèle compact: les tableaux sont
+  mappés en lecture seule depuis le disque, aucun compteur de références
+  n'est modifié en les lisant. Le moteur se choisit indépendamment du
+  préchargement: SPAM_INFERENCE_ENGINE=numpy est fixé dans le Procfile et
+  render.yaml (avec sklearn, chaque worker recopie peu à peu le modèle
+  unpicklé par le master)
+- le pool de connexions créé par le master (utilisateur de test) est
+  abandonné dans chaque worker sans fermer les sockets du master
+
+Workers à threads (GUNICORN_THREADS > 1, worker gthread): chaque worker
+sert plusieurs requêtes à la fois, une requête qui attend la base
+n'immobilise que son thread. Le GIL sérialise toujours le calcul: le gain
+vient seulement des attentes d'entrées/sorties (base distante). Le pool
+SQLAlchemy doit offrir une connexion par thread (DB_POOL_SIZE +
+DB_MAX_OVERFLOW >= GUNICORN_THREADS). Sur 1 vCPU avec SQLite local
+(benchmarks.server_load, 8 threads), le débit est celui des workers
+synchrones (~130 req/s) avec un p99 deux fois plus haut: le défaut reste
+un thread par worker.
+
+Variables d'environnement:
+- PORT                   : port d'écoute (défaut 5000)
+- WEB_CONCURRENCY        : nombre de workers (défaut 2)
+- GUNICORN_THREADS       : threads par worker (défaut 1, worker sync)
+- GUNICORN_PRELOAD       : '0' pour charger l'application dans chaque worker
+- GUNICORN_TIMEOUT       : délai maximum d'une requête en secondes (défaut 30)
+- PROMETHEUS_MULTIPROC_DIR: fichiers des métriques partagés par les workers
+                           (défaut: répertoire temporaire, vidé au démarrage)
+- SPAM_ID_WORKER         : refusé avec plusieurs workers (en écriture
+                           async, chaque worker réserve son identifiant
+                           en base, voir services.id_workers)
+"""
+
+import gc
+import os
+import shutil
+import sys
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1').lower() not in ('0', 'false', 'no')
+
+if workers > 1 and os.environ.get('SPAM_ID_WORKER') is not None:
+    # Tous les workers hériteraient du même identifiant: ids en collision
+    raise RuntimeError("SPAM_ID_WORKER fixe l'identifiant d'un seul processus: "
+                       "le retirer pour lancer plusieurs workers")
+
+# Métriques Prometheus agrégées sur tous les workers. Le répertoire est
+# préparé ici, avant le préchargement de l'application, et vidé une seule
+# fois par master (la configuration est relue à chaque SIGHUP)
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'spamguard-metrics')
+)
+if os.environ.get('SPAMGUARD_METRICS_MASTER') != str(os.getpid()):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.environ['SPAMGUARD_METRICS_MASTER'] = str(os.getpid())
+os.makedirs(metrics_dir, exist_ok=True)
+
+
+def when_ready(server):
+    """Master prêt, avant le premier fork: figer le tas chargé."""
+    if preload_app:
+        gc.collect()
+        gc.freeze()
+        server.log.info(f"[Gunicorn] Application prechargee, {gc.get_freeze_count()} objets figes")
+
+
+def post_fork(server, worker):
+    """Dans le worker: ne pas réutiliser les connexions SQL du master."""
+    if not preload_app:
+        return
+    from app.extensions import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    """Worker prêt: réserver son identifiant d'ids, ou refuser de démarrer."""
+    from gunicorn.arbiter import Arbiter
+    from app.services.analysis_writer import analysis_writer
+    from app.utils.ids import claim_worker_id
+
+    if analysis_writer.mode != 'async':
+        return  # Ids attribués par la base
+    try:
+        claim_worker_id()
+    except Exception as e:
+        worker.log.error(f"[Gunicorn] Identifiant de worker indisponible: {e}")
+        # Code d'échec de démarrage: le master s'arrête au lieu de relancer
+        sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+
+def child_exit(server, worker):
+    """Worker arrêté: retirer ses jauges des métriques agrégées."""
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
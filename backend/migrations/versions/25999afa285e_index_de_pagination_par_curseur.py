@@ -0,0 +1,35 @@
+"""index de pagination par curseur (user_id, analyzed_at, id)
+
+Remplace ix_spam_analyses_user_analyzed_at: l'id départage les analyses
+de même date et sert de clé de pagination.
+
+Revision ID: 25999afa285e
+Revises: c25e29773b55
+Create Date: 2026-10-18 09:04:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '25999afa285e'
+down_revision = 'c25e29773b55'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    indexes = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('spam_analyses')}
+
+    if 'ix_spam_analyses_user_analyzed_at_id' not in indexes:
+        op.create_index('ix_spam_analyses_user_analyzed_at_id', 'spam_analyses',
+                        ['user_id', 'analyzed_at', 'id'])
+    if 'ix_spam_analyses_user_analyzed_at' in indexes:
+        op.drop_index('ix_spam_analyses_user_analyzed_at', table_name='spam_analyses')
+
+
+def downgrade():
+    op.create_index('ix_spam_analyses_user_analyzed_at', 'spam_analyses',
+                    ['user_id', 'analyzed_at'])
+    op.drop_index('ix_spam_analyses_user_analyzed_at_id', table_name='spam_analyses')
@@ -0,0 +1,58 @@
+"""schéma initial: users et spam_analyses
+
+Les bases créées avant Alembic par db.create_all() ont déjà ces tables:
+elles ne sont créées que si elles manquent.
+
+Revision ID: 3372030f0f40
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3372030f0f40'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'users' not in tables:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('password_hash', sa.String(length=256), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    if 'spam_analyses' not in tables:
+        op.create_table(
+            'spam_analyses',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('text', sa.Text(), nullable=False),
+            sa.Column('is_spam', sa.Boolean(), nullable=False),
+            sa.Column('confidence', sa.Float(), nullable=False),
+            sa.Column('indicators', sa.Text(), nullable=True),
+            sa.Column('flags', sa.Text(), nullable=True),
+            sa.Column('analyzed_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_spam_analyses_user_id', 'spam_analyses', ['user_id'])
+        op.create_index('ix_spam_analyses_analyzed_at', 'spam_analyses', ['analyzed_at'])
+
+
+def downgrade():
+    op.drop_table('spam_analyses')
+    op.drop_table('users')
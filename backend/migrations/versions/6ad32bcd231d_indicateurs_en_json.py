@@ -0,0 +1,55 @@
+"""indicateurs en JSON (JSONB et index GIN sur PostgreSQL)
+
+Sur SQLite, JSON est stocké en texte: les valeurs écrites avec
+json.dumps restent lisibles par JSON1, seul le type déclaré change.
+
+Revision ID: 6ad32bcd231d
+Revises: c56a4d8c5aa8
+Create Date: 2026-10-18 09:06:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '6ad32bcd231d'
+down_revision = 'c56a4d8c5aa8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        inspector = sa.inspect(bind)
+        column = next(c for c in inspector.get_columns('spam_analyses')
+                      if c['name'] == 'indicators')
+        if not isinstance(column['type'], postgresql.JSONB):
+            op.alter_column('spam_analyses', 'indicators',
+                            type_=postgresql.JSONB(), existing_type=sa.Text(),
+                            postgresql_using="COALESCE(NULLIF(indicators, ''), '[]')::jsonb")
+        indexes = {index['name'] for index in inspector.get_indexes('spam_analyses')}
+        if 'ix_spam_analyses_indicators_gin' not in indexes:
+            # Recherche par indicateur (opérateur @>)
+            op.create_index('ix_spam_analyses_indicators_gin', 'spam_analyses', ['indicators'],
+                            postgresql_using='gin',
+                            postgresql_ops={'indicators': 'jsonb_path_ops'})
+        return
+
+    op.execute("UPDATE spam_analyses SET indicators = '[]' WHERE indicators = ''")
+    with op.batch_alter_table('spam_analyses') as batch_op:
+        batch_op.alter_column('indicators', type_=sa.JSON(), existing_type=sa.Text())
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_spam_analyses_indicators_gin', table_name='spam_analyses')
+        op.alter_column('spam_analyses', 'indicators',
+                        type_=sa.Text(), existing_type=postgresql.JSONB(),
+                        postgresql_using='indicators::text')
+        return
+
+    with op.batch_alter_table('spam_analyses') as batch_op:
+        batch_op.alter_column('indicators', type_=sa.Text(), existing_type=sa.JSON())
@@ -0,0 +1,40 @@
+"""corrections des utilisateurs (spam_feedback)
+
+Revision ID: 6d767535c582
+Revises: 6ad32bcd231d
+Create Date: 2026-10-18 09:07:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d767535c582'
+down_revision = '6ad32bcd231d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('spam_feedback'):
+        return
+
+    op.create_table(
+        'spam_feedback',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('analysis_id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'),
+                  nullable=True),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('label', sa.String(length=4), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_spam_feedback_user_id', 'spam_feedback', ['user_id'])
+    op.create_index('ix_spam_feedback_created_at', 'spam_feedback', ['created_at'])
+
+
+def downgrade():
+    op.drop_table('spam_feedback')
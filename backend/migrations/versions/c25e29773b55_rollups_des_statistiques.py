@@ -0,0 +1,103 @@
+"""rollups des statistiques par utilisateur
+
+Crée user_spam_stats et user_spam_stats_hourly, puis les remplit depuis
+l'historique existant (même calcul que `flask stats rebuild`).
+
+Revision ID: c25e29773b55
+Revises: cc4c7658e30a
+Create Date: 2026-10-18 09:03:00.000000
+
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c25e29773b55'
+down_revision = 'cc4c7658e30a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'user_spam_stats' not in tables:
+        op.create_table(
+            'user_spam_stats',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('total', sa.Integer(), nullable=False),
+            sa.Column('spam', sa.Integer(), nullable=False),
+            sa.Column('confidence_sum', sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('user_id')
+        )
+    if 'user_spam_stats_hourly' not in tables:
+        op.create_table(
+            'user_spam_stats_hourly',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('hour', sa.DateTime(), nullable=False),
+            sa.Column('total', sa.Integer(), nullable=False),
+            sa.Column('spam', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('user_id', 'hour')
+        )
+
+    _backfill()
+
+
+def _backfill():
+    """Rollups recalculés depuis spam_analyses s'ils sont encore vides."""
+    bind = op.get_bind()
+    analyses = sa.table(
+        'spam_analyses',
+        sa.column('user_id', sa.Integer), sa.column('is_spam', sa.Boolean),
+        sa.column('confidence', sa.Float), sa.column('analyzed_at', sa.DateTime)
+    )
+    stats = sa.table(
+        'user_spam_stats',
+        sa.column('user_id', sa.Integer), sa.column('total', sa.Integer),
+        sa.column('spam', sa.Integer), sa.column('confidence_sum', sa.Float)
+    )
+    hourly = sa.table(
+        'user_spam_stats_hourly',
+        sa.column('user_id', sa.Integer), sa.column('hour', sa.DateTime),
+        sa.column('total', sa.Integer), sa.column('spam', sa.Integer)
+    )
+
+    if bind.execute(sa.select(stats.c.user_id).limit(1)).first():
+        return
+
+    spam_count = sa.func.count().filter(analyses.c.is_spam == sa.true())
+    op.execute(stats.insert().from_select(
+        ['user_id', 'total', 'spam', 'confidence_sum'],
+        sa.select(
+            analyses.c.user_id, sa.func.count(), spam_count,
+            sa.func.coalesce(sa.func.sum(analyses.c.confidence), 0.0)
+        ).group_by(analyses.c.user_id)
+    ))
+
+    # Compteurs horaires de la fenêtre de 24h, arrondis à l'heure en Python
+    # (date_trunc / strftime selon le dialecte)
+    cutoff = (datetime.utcnow() - timedelta(hours=24)).replace(minute=0, second=0, microsecond=0)
+    totals, spams = Counter(), Counter()
+    for row in bind.execute(
+        sa.select(analyses.c.user_id, analyses.c.is_spam, analyses.c.analyzed_at)
+        .where(analyses.c.analyzed_at >= cutoff)
+    ):
+        key = (row.user_id, row.analyzed_at.replace(minute=0, second=0, microsecond=0))
+        totals[key] += 1
+        spams[key] += 1 if row.is_spam else 0
+    if totals:
+        op.bulk_insert(hourly, [
+            {'user_id': user_id, 'hour': hour, 'total': total, 'spam': spams[(user_id, hour)]}
+            for (user_id, hour), total in totals.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('user_spam_stats_hourly')
+    op.drop_table('user_spam_stats')
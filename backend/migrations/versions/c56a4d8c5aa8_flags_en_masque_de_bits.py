@@ -0,0 +1,81 @@
+"""flags en masque de bits (flags_mask), suppression de la colonne flags
+
+Les flags JSON existants sont convertis par lots de 1000 lignes, puis
+l'ancienne colonne texte est supprimée (table recopiée sur SQLite).
+
+Revision ID: c56a4d8c5aa8
+Revises: 25999afa285e
+Create Date: 2026-10-18 09:05:00.000000
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c56a4d8c5aa8'
+down_revision = '25999afa285e'
+branch_labels = None
+depends_on = None
+
+# Un bit par flag, dans cet ordre (text_features.FLAG_NAMES à cette révision)
+FLAG_NAMES = (
+    'multipleExclamations', 'allCaps', 'suspiciousUrl',
+    'phoneNumber', 'moneySymbol', 'excessivePunctuation'
+)
+
+BATCH_SIZE = 1000
+
+
+def _mask(flags):
+    """Masque de bits d'un objet JSON de flags (0 s'il est illisible)."""
+    try:
+        flags = json.loads(flags)
+        return sum(1 << bit for bit, name in enumerate(FLAG_NAMES) if flags.get(name))
+    except (TypeError, ValueError, AttributeError):
+        return 0
+
+
+def upgrade():
+    bind = op.get_bind()
+    columns = {column['name'] for column in sa.inspect(bind).get_columns('spam_analyses')}
+
+    if 'flags_mask' not in columns:
+        op.add_column('spam_analyses', sa.Column(
+            'flags_mask', sa.Integer(), server_default='0', nullable=False
+        ))
+    if 'flags' not in columns:
+        return
+
+    last_id = 0
+    while True:
+        rows = bind.execute(sa.text(
+            'SELECT id, flags FROM spam_analyses '
+            'WHERE flags IS NOT NULL AND id > :last_id ORDER BY id LIMIT :limit'
+        ), {'last_id': last_id, 'limit': BATCH_SIZE}).all()
+        if not rows:
+            break
+        bind.execute(sa.text(
+            'UPDATE spam_analyses SET flags_mask = :mask WHERE id = :id'
+        ), [{'id': analysis_id, 'mask': _mask(flags)} for analysis_id, flags in rows])
+        last_id = rows[-1][0]
+
+    with op.batch_alter_table('spam_analyses') as batch_op:
+        batch_op.drop_column('flags')
+
+
+def downgrade():
+    with op.batch_alter_table('spam_analyses') as batch_op:
+        batch_op.add_column(sa.Column('flags', sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    for mask in range(1 << len(FLAG_NAMES)):
+        flags = {name: bool(mask >> bit & 1) for bit, name in enumerate(FLAG_NAMES)}
+        bind.execute(sa.text(
+            'UPDATE spam_analyses SET flags = :flags WHERE flags_mask = :mask'
+        ), {'flags': json.dumps(flags), 'mask': mask})
+
+    with op.batch_alter_table('spam_analyses') as batch_op:
+        batch_op.drop_column('flags_mask')
@@ -0,0 +1,58 @@
+"""ids d'analyse sur 64 bits et baux d'identifiant de worker
+
+spam_analyses.id passe en BIGINT pour les ids générés côté application
+(écriture async, utils.ids). En écriture sync, la séquence de la base
+attribue toujours les ids: elle passe aussi sur 64 bits, ou est créée
+si la table n'en avait pas.
+
+Revision ID: c8ecee15484e
+Revises: 3372030f0f40
+Create Date: 2026-10-18 09:01:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8ecee15484e'
+down_revision = '3372030f0f40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # SQLite: INTEGER PRIMARY KEY est déjà sur 64 bits
+    if bind.dialect.name == 'postgresql':
+        op.alter_column('spam_analyses', 'id', type_=sa.BigInteger(),
+                        existing_type=sa.Integer(), existing_nullable=False)
+        sequence = bind.execute(sa.text(
+            "SELECT pg_get_serial_sequence('spam_analyses', 'id')"
+        )).scalar()
+        if sequence:
+            op.execute(f'ALTER SEQUENCE {sequence} AS BIGINT')
+        else:
+            op.execute('CREATE SEQUENCE spam_analyses_id_seq OWNED BY spam_analyses.id')
+            op.execute(
+                "SELECT setval('spam_analyses_id_seq', COALESCE(MAX(id), 0) + 1, false) "
+                "FROM spam_analyses"
+            )
+            op.execute(
+                "ALTER TABLE spam_analyses ALTER COLUMN id "
+                "SET DEFAULT nextval('spam_analyses_id_seq')"
+            )
+
+    if not sa.inspect(bind).has_table('id_worker_leases'):
+        op.create_table(
+            'id_worker_leases',
+            sa.Column('worker_id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('owner', sa.String(length=64), nullable=False),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('worker_id')
+        )
+
+
+def downgrade():
+    op.drop_table('id_worker_leases')
@@ -0,0 +1,33 @@
+"""index des statistiques par utilisateur
+
+Revision ID: cc4c7658e30a
+Revises: c8ecee15484e
+Create Date: 2026-10-18 09:02:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cc4c7658e30a'
+down_revision = 'c8ecee15484e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    indexes = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('spam_analyses')}
+
+    if 'ix_spam_analyses_user_analyzed_at' not in indexes:
+        op.create_index('ix_spam_analyses_user_analyzed_at', 'spam_analyses',
+                        ['user_id', 'analyzed_at'])
+    if 'ix_spam_analyses_user_is_spam' not in indexes:
+        # Index couvrant pour aggregate_stats (pas d'accès à la table)
+        op.create_index('ix_spam_analyses_user_is_spam', 'spam_analyses',
+                        ['user_id', 'is_spam', 'analyzed_at', 'confidence'])
+
+
+def downgrade():
+    op.drop_index('ix_spam_analyses_user_is_spam', table_name='spam_analyses')
+    op.drop_index('ix_spam_analyses_user_analyzed_at', table_name='spam_analyses')
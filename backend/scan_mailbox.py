@@ -0,0 +1,128 @@
+"""
+Analyse d'un export de boîte mail en ligne de commande
+======================================================
+
+Lit un fichier NDJSON ou mbox (ou l'entrée standard) en flux, classifie
+les messages par micro-lots avec le modèle ML et écrit un résultat NDJSON
+par message. La mémoire utilisée ne dépend pas de la taille de l'export.
+
+Usage (depuis backend/):
+    python scan_mailbox.py export.mbox -o resultats.ndjson
+    python scan_mailbox.py messages.ndjson --format ndjson
+    cat export.mbox | python scan_mailbox.py - --format mbox > resultats.ndjson
+
+Options:
+    --save-user-id ID  : enregistre aussi les analyses dans l'historique
+                         de l'utilisateur ID (base configurée par DATABASE_URL)
+"""
+
+import argparse
+import os
+import resource
+import sys
+import time
+
+# Ajouter le chemin du backend au PYTHONPATH pour les imports
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, backend_dir)
+
+from app.services import bulk_scan  # noqa: E402
+
+
+def detect_format(path):
+    """Format déduit de l'extension du fichier."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    if extension in ('.mbox', '.mbx'):
+        return 'mbox'
+    return None
+
+
+def history_saver(user_id):
+    """Callback on_batch qui insère les analyses dans l'historique."""
+    from app import create_app
+    from app.models.analysis import SpamAnalysis
+    from app.services.analysis_writer import analysis_writer
+
+    app = create_app(os.environ.get('FLASK_ENV', 'development'))
+
+    def save(pairs):
+        with app.app_context():
+            analyses = []
+            for text, result in pairs:
+                analysis = SpamAnalysis(
+                    user_id=user_id,
+                    text=text,
+                    is_spam=bool(result['isSpam']),
+                    confidence=float(result['confidence'])
+                )
+                analysis.set_indicators(result['indicators'])
+                analysis.set_flags(result['flags'])
+                analyses.append(analysis)
+            analysis_writer.save(analyses)
+
+    return app, save
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('input', help="Fichier NDJSON/mbox, ou '-' pour l'entrée standard")
+    parser.add_argument('-o', '--output', default='-', help='Fichier NDJSON de sortie')
+    parser.add_argument('--format', choices=bulk_scan.FORMATS)
+    parser.add_argument('--batch-size', type=int, default=bulk_scan.SCAN_BATCH_SIZE)
+    parser.add_argument('--max-chars', type=int, default=bulk_scan.MAX_TEXT_CHARS)
+    parser.add_argument('--save-user-id', type=int, default=None)
+    args = parser.parse_args()
+
+    fmt = args.format or (detect_format(args.input) if args.input != '-' else None)
+    if fmt is None:
+        parser.error('format non reconnu, utilisez --format ndjson|mbox')
+
+    from app.services.ml_spam_detector import get_detector
+    detector = get_detector()
+
+    app = on_batch = None
+    if args.save_user_id is not None:
+        app, on_batch = history_saver(args.save_user_id)
+
+    source = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    output = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+
+    count = spam = errors = 0
+    start = time.perf_counter()
+    try:
+        messages = bulk_scan.iter_messages(source, fmt)
+        records = bulk_scan.scan(
+            messages, detector,
+            batch_size=args.batch_size, max_chars=args.max_chars, on_batch=on_batch
+        )
+        for record in records:
+            count += 1
+            if 'error' in record:
+                errors += 1
+            elif record['isSpam']:
+                spam += 1
+            output.write(next(bulk_scan.to_ndjson([record])))
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if output is not sys.stdout.buffer:
+            output.close()
+        else:
+            output.flush()
+        if app is not None:
+            from app.services.analysis_writer import analysis_writer
+            analysis_writer.flush()
+
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"[Scan] {count} messages ({spam} spams, {errors} erreurs) en {elapsed:.1f}s "
+        f"- {count / elapsed if elapsed else 0:.0f} messages/s - mémoire max {peak_mb:.0f} Mo",
+        file=sys.stderr
+    )
+
+
+if __name__ == '__main__':
+    main()
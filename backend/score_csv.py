@@ -0,0 +1,197 @@
+"""
+Scoring hors ligne d'un grand corpus CSV, sur plusieurs processus
+=================================================================
+
+Lit un CSV au format de french_spam_only.csv (labels,text_fr) par blocs,
+répartit les blocs sur un pool de processus (le modèle est chargé une
+seule fois par worker, via l'initializer) et écrit les prédictions dans
+l'ordre d'entrée, au fur et à mesure.
+
+Le nombre de blocs en cours est borné (2 par worker): la mémoire ne
+dépend pas de la taille du corpus.
+
+Usage (depuis backend/):
+    python score_csv.py archive.csv -o scores.csv [--workers 4] [--chunk-size 20000]
+    python score_csv.py archive.csv -o scores.parquet   (nécessite pyarrow)
+
+Colonnes ajoutées: prediction, prob_spam, prob_ham (en %).
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Ajouter le chemin du backend au PYTHONPATH pour les imports
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, backend_dir)
+
+from app.services.ml_spam_detector import get_detector  # noqa: E402
+
+# Détecteur chargé une fois par processus
+_detector = None
+
+
+def init_worker():
+    """
+    Initializer du pool: charge le modèle dans le worker.
+
+    Le processus principal le charge avant de créer le pool: avec fork, les
+    workers héritent du singleton (pages partagées, pas de unpickle); avec
+    spawn, chacun le charge ici une seule fois.
+    """
+    global _detector
+    _detector = get_detector()
+
+
+def score_texts(texts):
+    """
+    Classifier un bloc de textes.
+
+    Returns:
+        tuple: (predictions, prob_spam, prob_ham) en tableaux NumPy
+    """
+    if _detector is None:
+        init_worker()
+    predictions = _detector.predict_batch(texts)
+    labels, prob_spam, prob_ham = zip(*predictions) if predictions else ((), (), ())
+    return (
+        np.array(labels, dtype=object),
+        np.array(prob_spam, dtype=np.float64),
+        np.array(prob_ham, dtype=np.float64)
+    )
+
+
+class CsvOutput:
+    """Écriture incrémentale en CSV."""
+
+    def __init__(self, path):
+        self.path = path
+        self.header = True
+
+    def write(self, frame):
+        frame.to_csv(self.path, mode='w' if self.header else 'a',
+                     header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        pass
+
+
+class ParquetOutput:
+    """Écriture incrémentale en Parquet (un row group par bloc)."""
+
+    def __init__(self, path):
+        try:
+            import pyarrow  # noqa: F401
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise SystemExit("La sortie Parquet nécessite pyarrow: pip install pyarrow")
+        self.path = path
+        self.writer = None
+
+    def write(self, frame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def ordered_results(executor, chunks, text_column, max_pending):
+    """
+    Soumettre les blocs au pool et les rendre dans l'ordre d'entrée.
+
+    Au plus max_pending blocs sont en cours à la fois.
+
+    Yields:
+        tuple: (bloc d'entrée, (predictions, prob_spam, prob_ham))
+    """
+    pending = deque()
+    for chunk in chunks:
+        texts = chunk[text_column].fillna('').astype(str).tolist()
+        if executor is None:
+            yield chunk, score_texts(texts)
+            continue
+        pending.append((chunk, executor.submit(score_texts, texts)))
+        if len(pending) >= max_pending:
+            done_chunk, future = pending.popleft()
+            yield done_chunk, future.result()
+    while pending:
+        done_chunk, future = pending.popleft()
+        yield done_chunk, future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('input', help='CSV à scorer')
+    parser.add_argument('-o', '--output', required=True, help='Fichier .csv ou .parquet')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Nombre de processus (1: dans le processus courant)')
+    parser.add_argument('--chunk-size', type=int, default=20000)
+    parser.add_argument('--text-column', default='text_fr')
+    args = parser.parse_args()
+
+    if args.output.endswith('.parquet'):
+        output = ParquetOutput(args.output)
+    else:
+        output = CsvOutput(args.output)
+
+    print("=" * 60)
+    print("SCORING HORS LIGNE")
+    print("=" * 60)
+    print(f"   - Entrée  : {args.input}")
+    print(f"   - Sortie  : {args.output}")
+    print(f"   - Workers : {args.workers}, blocs de {args.chunk_size} messages")
+
+    init_worker()
+    executor = None
+    if args.workers > 1:
+        executor = ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker)
+
+    count = 0
+    correct = 0
+    labelled = 0
+    start = time.perf_counter()
+    try:
+        chunks = pd.read_csv(args.input, chunksize=args.chunk_size)
+        for chunk, (labels, prob_spam, prob_ham) in ordered_results(
+                executor, chunks, args.text_column, max_pending=2 * args.workers):
+            result = chunk.assign(
+                prediction=labels,
+                prob_spam=prob_spam.round(2),
+                prob_ham=prob_ham.round(2)
+            )
+            output.write(result)
+
+            if 'labels' in chunk:
+                labelled += len(chunk)
+                correct += int((chunk['labels'].to_numpy() == labels).sum())
+            count += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"   - {count} messages, {count / elapsed:.0f} messages/s", file=sys.stderr)
+    finally:
+        output.close()
+        if executor is not None:
+            executor.shutdown()
+
+    elapsed = time.perf_counter() - start
+    print(f"\n[OK] {count} messages en {elapsed:.1f}s "
+          f"({count / elapsed if elapsed else 0:.0f} messages/s)")
+    if labelled:
+        print(f"   - Accord avec la colonne labels: {correct / labelled * 100:.2f}%")
+
+
+if __name__ == '__main__':
+    main()
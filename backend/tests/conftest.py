@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+
+# Lancer depuis backend/: python -m pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('SPAM_METRICS', '0')
+os.environ.setdefault('SPAM_MODEL_CHECK_INTERVAL', '0')
+os.environ.setdefault('SPAM_CACHE_SIZE', '0')
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.services.id_workers import id_worker_leases  # noqa: E402
+from app.utils import ids  # noqa: E402
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'french_spam_only.csv')
+
+
+@pytest.fixture
+def app():
+    """Application de test sur une base SQLite en mémoire."""
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        # Bail libéré avant la suppression des tables
+        id_worker_leases.release()
+        ids.release_worker_id()
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture(scope='session')
+def messages():
+    """Messages du corpus d'entraînement (test ignoré si le fichier manque)."""
+    import pandas as pd
+
+    if not os.path.exists(CSV_PATH):
+        pytest.skip(f"Corpus absent: {CSV_PATH}")
+    return pd.read_csv(CSV_PATH)
+
+
+@pytest.fixture(scope='session')
+def model_data(messages):
+    """Modèle entraîné comme train_model.py, sans dépendre de model/."""
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+    from sklearn.naive_bayes import MultinomialNB
+
+    from app.services.text_preprocessor import nettoyage_texte
+
+    texts = messages['text_fr'].fillna('').astype(str)
+    bow_transformer = CountVectorizer(analyzer=nettoyage_texte)
+    tfidf_transformer = TfidfTransformer()
+    model = MultinomialNB().fit(
+        tfidf_transformer.fit_transform(bow_transformer.fit_transform(texts)),
+        messages['labels']
+    )
+    return {
+        'bow_transformer': bow_transformer,
+        'tfidf_transformer': tfidf_transformer,
+        'model': model,
+        'accuracy': 0.97
+    }
@@ -0,0 +1,78 @@
+import pytest
+
+from app.services import spam_detector
+from app.services.analysis_cache import AnalysisCache
+from app.services.spam_detector import SpamDetector
+
+
+class FakeDetector:
+    """Détecteur ML dont le modèle peut être rechargé pendant une analyse."""
+
+    keywords_version = 'kw'
+
+    def __init__(self):
+        self.model_version = 'v1'
+        self.reload_during_analysis = None
+        self.calls = 0
+
+    def _score(self, text):
+        self.calls += 1
+        if self.reload_during_analysis:
+            self.model_version = self.reload_during_analysis
+            self.reload_during_analysis = None
+        return {'isSpam': False, 'confidence': 10.0, 'model': self.model_version}
+
+    def analyze(self, text):
+        return self._score(text)
+
+    def analyze_batch(self, texts):
+        return [self._score(text) for text in texts]
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    detector = FakeDetector()
+    lookups = []
+
+    def active_ml_detector():
+        lookups.append(detector)
+        return detector
+
+    monkeypatch.setattr(SpamDetector, '_cache', AnalysisCache(max_size=100, ttl=60))
+    monkeypatch.setattr(spam_detector, '_active_ml_detector', active_ml_detector)
+    detector.lookups = lookups
+    return detector
+
+
+def test_results_are_cached_by_model_version(detector):
+    assert SpamDetector.analyze('Bonjour')['model'] == 'v1'
+    assert SpamDetector.analyze('Bonjour')['model'] == 'v1'
+    assert detector.calls == 1
+    # Détecteur résolu une seule fois par analyse
+    assert len(detector.lookups) == 2
+
+    detector.model_version = 'v2'
+    assert SpamDetector.analyze('Bonjour')['model'] == 'v2'
+    assert detector.calls == 2
+
+
+def test_reload_during_analysis_is_not_cached_under_the_old_version(detector):
+    detector.reload_during_analysis = 'v2'
+    assert SpamDetector.analyze('Bonjour')['model'] == 'v2'
+
+    # Rien sous la clé v1: après un retour à v1, le texte est ré-analysé
+    detector.model_version = 'v1'
+    assert SpamDetector.analyze('Bonjour')['model'] == 'v1'
+    assert detector.calls == 2
+
+
+def test_batch_reload_during_analysis_is_not_cached(detector):
+    assert SpamDetector.analyze_batch(['a'])[0]['model'] == 'v1'
+    detector.reload_during_analysis = 'v2'
+    results = SpamDetector.analyze_batch(['a', 'b'])
+
+    assert [result['model'] for result in results] == ['v1', 'v2']
+    assert detector.calls == 2
+    detector.model_version = 'v1'
+    SpamDetector.analyze_batch(['b'])
+    assert detector.calls == 3
@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from app.extensions import db
+from app.models import IdWorkerLease, SpamAnalysis, User
+from app.services.analysis_writer import analysis_writer
+from app.utils import ids
+
+
+@pytest.fixture
+def async_writer(app, monkeypatch):
+    """Writer en mode async, sans thread d'arrière-plan (flush explicites)."""
+    monkeypatch.setattr(analysis_writer, 'mode', 'async')
+    monkeypatch.setattr(analysis_writer, '_ensure_thread', lambda: None)
+    yield analysis_writer
+    analysis_writer.flush()
+
+
+def _user(name):
+    user = User(name=name, email=f'{name}@example.com')
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _analysis(user):
+    analysis = SpamAnalysis(user_id=user.id, text='texte', is_spam=False, confidence=10.0)
+    analysis.set_indicators([])
+    analysis.set_flags({})
+    return analysis
+
+
+def _stored(user):
+    return SpamAnalysis.query.filter_by(user_id=user.id).count()
+
+
+def test_flush_user_inserts_only_the_callers_rows(async_writer):
+    alice, bob = _user('alice'), _user('bob')
+    async_writer.save([_analysis(alice), _analysis(bob), _analysis(alice)])
+
+    assert async_writer.flush_user(alice.id) == 2
+    assert (_stored(alice), _stored(bob)) == (2, 0)
+    assert async_writer.pending() == 1
+
+    assert async_writer.flush_user(alice.id) == 0
+    assert async_writer.flush() == 1
+    assert _stored(bob) == 1
+
+
+def test_flush_user_does_not_wait_for_the_background_flush(async_writer):
+    alice = _user('alice')
+    async_writer.save([_analysis(alice)])
+
+    # Flush d'arrière-plan en cours (verrou tenu), sans ligne d'alice en vol
+    finished = threading.Event()
+    with async_writer._flush_lock:
+        reader = threading.Thread(
+            target=lambda: (async_writer.flush_user(alice.id), finished.set())
+        )
+        reader.start()
+        assert finished.wait(5)
+    reader.join()
+    assert _stored(alice) == 1
+
+
+def test_sync_mode_keeps_database_ids(app, monkeypatch):
+    # Ni SPAM_ID_WORKER ni bail: aucun id généré côté application
+    monkeypatch.delenv('SPAM_ID_WORKER', raising=False)
+    monkeypatch.setattr(ids, '_worker_source', None)
+    ids.release_worker_id()
+
+    alice = _user('alice')
+    analyses = [_analysis(alice), _analysis(alice)]
+    analysis_writer.save(analyses)
+
+    assert [analysis.id for analysis in analyses] == [1, 2]
+    assert IdWorkerLease.query.count() == 0
@@ -0,0 +1,24 @@
+def test_public_health_exposes_only_status_and_model_version(app):
+    body = app.test_client().get('/api/health').get_json()
+
+    assert set(body) == {'status', 'message', 'model'}
+    assert set(body['model']) == {'version'}
+
+
+def test_health_details_require_the_metrics_token(app):
+    client = app.test_client()
+    app.config['METRICS_TOKEN'] = 'secret'
+
+    assert client.get('/api/health/details').status_code == 401
+    response = client.get('/api/health/details', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 200
+    assert {'model', 'cache', 'database'} <= set(response.get_json())
+
+
+def test_health_details_without_token_are_local_only(app):
+    client = app.test_client()
+    app.config['METRICS_TOKEN'] = None
+
+    assert client.get('/api/health/details').status_code == 200
+    remote = client.get('/api/health/details', environ_base={'REMOTE_ADDR': '203.0.113.7'})
+    assert remote.status_code == 403
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app.extensions import db
+from app.models import SpamAnalysis, User
+from app.services.analysis_writer import analysis_writer
+
+
+@pytest.fixture
+def user(app):
+    user = User(name='Historique', email='history@example.com')
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def client(app, user):
+    client = app.test_client()
+    token = create_access_token(identity=str(user.id))
+    client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    return client
+
+
+def _seed(user, count=25):
+    """Analyses dont plusieurs partagent la même date (départage par id)."""
+    start = datetime(2026, 1, 1)
+    analyses = []
+    for i in range(count):
+        analysis = SpamAnalysis(user_id=user.id, text=f'texte {i}', is_spam=i % 3 == 0,
+                                confidence=50.0, analyzed_at=start + timedelta(minutes=i // 4))
+        analysis.set_indicators(['gratuit', 'prix'] if i % 5 == 0 else ['urgent'])
+        analysis.set_flags({'suspiciousUrl': i % 2 == 0, 'allCaps': i % 4 == 0})
+        analyses.append(analysis)
+    analysis_writer.save(analyses)
+    return analyses
+
+
+def _expected_order(analyses):
+    return [a.id for a in sorted(analyses, key=lambda a: (a.analyzed_at, a.id), reverse=True)]
+
+
+def test_cursor_pages_cover_the_history_once_in_order(client, user):
+    expected = _expected_order(_seed(user))
+
+    pages, cursor = [], None
+    while True:
+        query = {'per_page': 7, 'fields': 'id'}
+        if cursor:
+            query['cursor'] = cursor
+        body = client.get('/api/spam/history', query_string=query).get_json()
+        pages.append([item['id'] for item in body['history']])
+        assert body['pagination']['total'] == len(expected)
+        cursor = body['pagination']['next_cursor']
+        if not body['pagination']['has_next']:
+            assert cursor is None
+            break
+
+    assert [len(page) for page in pages] == [7, 7, 7, 4]
+    assert [i for page in pages for i in page] == expected
+
+    # Retour en arrière depuis la dernière page: mêmes pages
+    prev_cursor = body['pagination']['prev_cursor']
+    for page in reversed(pages[:-1]):
+        body = client.get('/api/spam/history', query_string={
+            'per_page': 7, 'fields': 'id', 'cursor': prev_cursor
+        }).get_json()
+        assert [item['id'] for item in body['history']] == page
+        prev_cursor = body['pagination']['prev_cursor']
+    assert prev_cursor is None and not body['pagination']['has_prev']
+
+
+def test_cursor_and_offset_pagination_agree(client, user):
+    _seed(user)
+    first = client.get('/api/spam/history', query_string={'per_page': 10}).get_json()
+    offset = client.get('/api/spam/history', query_string={'per_page': 10, 'page': 1}).get_json()
+
+    assert first['history'] == offset['history']
+    assert offset['pagination']['pages'] == 3
+
+
+def test_invalid_cursor_is_rejected(client, user):
+    response = client.get('/api/spam/history', query_string={'cursor': 'pas-un-curseur'})
+    assert response.status_code == 400
+
+
+def test_history_filters_by_flag_and_indicator(client, user):
+    analyses = _seed(user)
+
+    def ids(**query):
+        body = client.get('/api/spam/history', query_string={
+            'per_page': 100, 'fields': 'id', **query
+        }).get_json()
+        assert body['pagination']['total'] == len(body['history'])
+        return [item['id'] for item in body['history']]
+
+    order = _expected_order(analyses)
+    url = {a.id for a in analyses if a.get_flags()['suspiciousUrl']}
+    caps = {a.id for a in analyses if a.get_flags()['allCaps']}
+    gratuit = {a.id for a in analyses if 'gratuit' in a.get_indicators()}
+
+    assert ids(flag='suspiciousUrl') == [i for i in order if i in url]
+    assert ids(flag=['suspiciousUrl', 'allCaps']) == [i for i in order if i in url & caps]
+    assert ids(indicator='gratuit') == [i for i in order if i in gratuit]
+    assert ids(indicator='gratuit', flag='allCaps') == [i for i in order if i in gratuit & caps]
+    assert ids(indicator='absent') == []
+
+    response = client.get('/api/spam/history', query_string={'flag': 'inconnu'})
+    assert response.status_code == 400
@@ -0,0 +1,86 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.id_worker import IdWorkerLease
+from app.utils import ids
+
+
+def _parts(value):
+    """(milliseconde, worker, séquence) d'un id."""
+    sequence = value & ((1 << ids.SEQUENCE_BITS) - 1)
+    worker = (value >> ids.SEQUENCE_BITS) & ((1 << ids.WORKER_BITS) - 1)
+    return value >> (ids.WORKER_BITS + ids.SEQUENCE_BITS), worker, sequence
+
+
+@pytest.fixture
+def worker_source(monkeypatch):
+    """Source d'identifiants de test: 5 dans ce processus, 6 après un fork."""
+    parent = os.getpid()
+    monkeypatch.delenv('SPAM_ID_WORKER', raising=False)
+    monkeypatch.setattr(ids, '_worker_source', lambda: 5 if os.getpid() == parent else 6)
+    ids.release_worker_id()
+    yield
+    ids.release_worker_id()
+
+
+def test_sequence_rollover_waits_for_next_millisecond(worker_source, monkeypatch):
+    # 64 ids dans la même milliseconde; le 65e attend que l'horloge avance
+    clock = iter([1_800_000_000.0] * ((1 << ids.SEQUENCE_BITS) + 5) + [1_800_000_000.002] * 10)
+    monkeypatch.setattr(ids.time, 'time', lambda: next(clock))
+
+    generated = [ids.generate_id() for _ in range((1 << ids.SEQUENCE_BITS) + 1)]
+    parts = [_parts(value) for value in generated]
+
+    assert len(set(generated)) == len(generated)
+    assert generated == sorted(generated)
+    assert [sequence for _, _, sequence in parts[:-1]] == list(range(1 << ids.SEQUENCE_BITS))
+    assert parts[-1][0] > parts[0][0] and parts[-1][2] == 0
+    assert {worker for _, worker, _ in parts} == {5}
+
+
+def test_fork_claims_a_new_worker_id(worker_source):
+    parent_id = ids.generate_id()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        os.write(write_fd, str(ids.generate_id()).encode())
+        os._exit(0)
+    os.close(write_fd)
+    child_id = int(os.read(read_fd, 64))
+    os.waitpid(pid, 0)
+
+    assert _parts(parent_id)[1] == 5
+    assert _parts(child_id)[1] == 6
+    assert _parts(ids.generate_id())[1] == 5
+
+
+def test_explicit_worker_id_out_of_range_is_refused(monkeypatch):
+    monkeypatch.setenv('SPAM_ID_WORKER', str(ids.MAX_WORKERS))
+    ids.release_worker_id()
+    with pytest.raises(ValueError):
+        ids.generate_id()
+    ids.release_worker_id()
+
+
+def test_leases_are_unique_and_expire(app):
+    first = IdWorkerLease.claim('a', ttl=60, max_workers=2)
+    second = IdWorkerLease.claim('b', ttl=60, max_workers=2)
+    assert {first, second} == {0, 1}
+
+    with pytest.raises(RuntimeError):
+        IdWorkerLease.claim('c', ttl=60, max_workers=2)
+
+    # Bail de 'a' expiré: repris par 'c', 'a' ne peut plus le renouveler
+    IdWorkerLease.query.filter_by(owner='a').update(
+        {'expires_at': datetime.utcnow() - timedelta(seconds=1)}
+    )
+    IdWorkerLease.query.session.commit()
+    assert IdWorkerLease.claim('c', ttl=60, max_workers=2) == first
+    assert not IdWorkerLease.renew(first, 'a', ttl=60)
+    assert IdWorkerLease.renew(second, 'b', ttl=60)
+
+    IdWorkerLease.release(second, 'b')
+    assert IdWorkerLease.claim('d', ttl=60, max_workers=2) == second
@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+from app.services.micro_batcher import MicroBatcher, MicroBatchTimeout
+
+
+def test_concurrent_calls_share_a_batch():
+    release = threading.Event()
+    sizes = []
+
+    def score(items):
+        release.wait(5)
+        sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(score, max_size=8, max_delay=0.05)
+    results = {}
+    threads = [threading.Thread(target=lambda i=i: results.update({i: batcher.submit(i)}))
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == {i: i * 2 for i in range(8)}
+    assert sum(sizes) == 8 and len(sizes) < 8
+
+
+def test_stuck_scoring_thread_times_out():
+    stuck = threading.Event()
+    batcher = MicroBatcher(lambda items: stuck.wait(5) and items, max_size=1,
+                           max_delay=0, timeout=0.05)
+    with pytest.raises(MicroBatchTimeout):
+        batcher.submit('texte')
+    stuck.set()
+
+
+@pytest.mark.filterwarnings('ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_dead_scoring_thread_is_restarted(monkeypatch):
+    batcher = MicroBatcher(lambda items: items, max_size=1, max_delay=0, timeout=1)
+    assert batcher.submit('a') == 'a'
+
+    # Thread arrêté par une erreur hors de la fonction de scoring
+    def crash(batch):
+        raise SystemExit
+
+    monkeypatch.setattr(batcher, '_score', crash)
+    with pytest.raises(MicroBatchTimeout):
+        batcher.submit('b')
+    batcher._thread.join(1)
+    assert not batcher._thread.is_alive()
+
+    monkeypatch.undo()
+    assert batcher.submit('c') == 'c'
@@ -0,0 +1,68 @@
+import json
+from datetime import datetime
+
+import pytest
+from flask_migrate import check, upgrade
+from sqlalchemy import inspect, text
+
+from app import create_app
+from app.config import TestingConfig, config
+from app.extensions import db
+from app.models import SpamAnalysis, UserSpamStats
+
+# Révision du schéma initial (tables créées par db.create_all() avant Alembic)
+BASELINE = '3372030f0f40'
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """Application sur une base SQLite vide, dans un fichier."""
+    class MigrationConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'spam.db')
+
+    monkeypatch.setitem(config, 'migration', MigrationConfig)
+    app = create_app('migration')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_upgrade_matches_the_models(file_app):
+    upgrade()
+    check()  # flask db check: sort en erreur si l'autogenerate trouve un écart
+
+
+def test_upgrade_converts_a_baseline_database(file_app):
+    upgrade(revision=BASELINE)
+    now = datetime.utcnow().isoformat(' ')
+    flags = {'phoneNumber': True, 'moneySymbol': True, 'allCaps': False}
+    with db.engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO users (id, name, email, password_hash) "
+            "VALUES (1, 'Alice', 'alice@example.com', 'x')"
+        ))
+        conn.execute(text(
+            'INSERT INTO spam_analyses '
+            '(user_id, text, is_spam, confidence, indicators, flags, analyzed_at) '
+            'VALUES (1, :text, :is_spam, :confidence, :indicators, :flags, :analyzed_at)'
+        ), [
+            {'text': 'Gagnez un prix', 'is_spam': True, 'confidence': 90.0,
+             'indicators': '["prix"]', 'flags': json.dumps(flags), 'analyzed_at': now},
+            {'text': 'Bonjour', 'is_spam': False, 'confidence': 20.0,
+             'indicators': '[]', 'flags': 'illisible', 'analyzed_at': now},
+        ])
+
+    upgrade()
+
+    columns = {column['name'] for column in inspect(db.engine).get_columns('spam_analyses')}
+    assert 'flags' not in columns
+    spam, ham = SpamAnalysis.query.order_by(SpamAnalysis.id).all()
+    assert [name for name, raised in spam.get_flags().items() if raised] == \
+        ['phoneNumber', 'moneySymbol']
+    assert ham.flags_mask == 0
+    assert spam.get_indicators() == ['prix']
+
+    stats = UserSpamStats.read(1)
+    assert (stats['total'], stats['spam'], stats['recent_total']) == (2, 1, 2)
+    assert UserSpamStats.check() == []
@@ -0,0 +1,55 @@
+import pytest
+
+from app.services import ml_spam_detector
+from app.services.ml_spam_detector import MLSpamDetector
+from app.services.model_store import load_compact_model, publish_model
+
+
+@pytest.fixture(params=['sklearn', 'numpy'])
+def published(request, model_data, tmp_path, monkeypatch):
+    """Modèle publié dans un dossier temporaire et détecteur qui le charge."""
+    model_path = str(tmp_path / 'spam_model.pkl')
+    compact_dir = str(tmp_path / 'spam_model_compact')
+    monkeypatch.setattr(ml_spam_detector, 'MODEL_PATH', model_path)
+    monkeypatch.setattr(ml_spam_detector, 'COMPACT_MODEL_DIR', compact_dir)
+    monkeypatch.setattr(ml_spam_detector, 'INFERENCE_ENGINE', request.param)
+    monkeypatch.setattr(ml_spam_detector, 'load_compact_model',
+                        lambda: load_compact_model(compact_dir))
+
+    def publish(accuracy):
+        publish_model({**model_data, 'accuracy': accuracy}, model_path, compact_dir)
+
+    publish(0.9)
+    detector = object.__new__(MLSpamDetector)
+    detector._load_model()
+    return detector, publish, request.param
+
+
+def test_new_publication_is_loaded_once(published):
+    detector, publish, engine = published
+    before = detector.model_info()
+    assert before['engine'] == engine
+    assert detector.reload_if_changed() is False
+
+    publish(0.8)
+    assert detector.reload_if_changed() is True
+    after = detector.model_info()
+    assert after['version'] != before['version']
+    assert (before['accuracy'], after['accuracy']) == (90.0, 80.0)
+    assert detector.analyze('Gagnez un prix GRATUIT')['modelAccuracy'] == 80.0
+
+    assert detector.reload_if_changed() is False
+
+
+def test_unreadable_publication_keeps_the_current_model(published, monkeypatch):
+    detector, publish, _ = published
+    version = detector.model_version
+    publish(0.8)
+
+    def broken():
+        raise ValueError('artefact corrompu')
+
+    monkeypatch.setattr(detector, '_read_model', broken)
+    assert detector.reload_if_changed() is False
+    assert detector.model_version == version
+    assert detector.analyze('Bonjour')['modelAccuracy'] == 90.0
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from app.services.model_store import export_compact_model, load_compact_model
+from app.services.nb_engine import NaiveBayesEngine
+
+
+def _sklearn_predict_proba(model_data, texts):
+    bow = model_data['bow_transformer'].transform(texts)
+    return model_data['model'].predict_proba(model_data['tfidf_transformer'].transform(bow))
+
+
+@pytest.mark.parametrize('source', ['pickle', 'compact'])
+def test_numpy_engine_matches_sklearn(source, model_data, messages, tmp_path):
+    if source == 'pickle':
+        engine = NaiveBayesEngine.from_sklearn(model_data)
+    else:
+        export_compact_model(model_data, str(tmp_path / 'compact'))
+        engine = NaiveBayesEngine.from_compact(load_compact_model(str(tmp_path / 'compact')))
+    texts = messages['text_fr'].fillna('').astype(str).tolist() + [
+        '', 'mot_inconnu_du_vocabulaire', 'GRATUIT gratuit Gratuit !!!'
+    ]
+
+    np.testing.assert_allclose(engine.predict_proba(texts),
+                               _sklearn_predict_proba(model_data, texts), rtol=0, atol=1e-12)
+    assert list(engine.classes_) == list(model_data['model'].classes_)
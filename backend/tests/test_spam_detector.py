@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from app.services import spam_detector
+from app.services.ml_spam_detector import LoadedModel, MLSpamDetector
+from app.services.nb_engine import NaiveBayesEngine
+from app.services.spam_detector import SpamDetector
+from benchmarks.rules_engine import load_messages
+
+EDGE_CASES = ['', '   ', 'URGENT!!! Gagnez 1000€ sur www.exemple.fr',
+              'Appelez le 06 12 34 56 78', 'ok']
+
+
+def _texts(messages, count=300):
+    return messages['text_fr'].dropna().astype(str).tolist()[:count] + EDGE_CASES
+
+
+@pytest.fixture(params=['sklearn', 'numpy'])
+def ml_detector(request, model_data, monkeypatch):
+    """Détecteur ML actif sur le modèle de test, pour chaque moteur."""
+    model = model_data['model']
+    detector = object.__new__(MLSpamDetector)
+    detector._active = LoadedModel(
+        stamp=None, version='test', accuracy=model_data['accuracy'],
+        classes=model.classes_,
+        engine=NaiveBayesEngine.from_sklearn(model_data) if request.param == 'numpy' else None,
+        bow_transformer=model_data['bow_transformer'],
+        tfidf_transformer=model_data['tfidf_transformer'], model=model
+    )
+    monkeypatch.setattr(spam_detector, '_active_ml_detector', lambda: detector)
+    return detector
+
+
+def test_ml_batch_matches_single_analyses(ml_detector, messages):
+    texts = _texts(messages)
+    results = SpamDetector.analyze_batch(texts)
+
+    assert {result['method'] for result in results} == {'ml'}
+    assert results == [SpamDetector.analyze(text) for text in texts]
+
+
+def test_rules_batch_matches_single_analyses(monkeypatch, messages):
+    monkeypatch.setattr(spam_detector, '_active_ml_detector', lambda: None)
+    texts = _texts(messages)
+
+    assert SpamDetector.analyze_batch(texts) == [SpamDetector.analyze(text) for text in texts]
+
+
+def test_vectorized_rules_match_scalar_rules(messages):
+    # Corpus varié comme benchmarks.rules_engine: casse, !!!, URL, numéro, montant
+    texts = load_messages(3000) + EDGE_CASES
+
+    assert SpamDetector._analyze_batch_with_rules(texts) == \
+        [SpamDetector._analyze_with_rules(text) for text in texts]
+
+
+def test_confidence_jitter_is_deterministic(messages):
+    texts = load_messages(1000)
+    jitters = SpamDetector._confidence_jitters(texts)
+
+    assert jitters.tolist() == [SpamDetector._confidence_jitter(text) for text in texts]
+    assert jitters.min() >= -5 and jitters.max() <= 5
+    # Empreinte SHA-256 du texte: mêmes valeurs d'un processus à l'autre
+    assert [SpamDetector._confidence_jitter(text) for text in
+            ('Bonjour', 'URGENT!!! Gagnez 1000€', 'a')] == [0, 3, 1]
+    assert np.array_equal(SpamDetector._score_batch_with_rules(texts)['confidence'],
+                          SpamDetector._score_batch_with_rules(texts)['confidence'])
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import SpamAnalysis, User, UserSpamStats
+from app.services.analysis_writer import analysis_writer
+
+
+def _analysis(user, age, is_spam, confidence=50.0):
+    analysis = SpamAnalysis(user_id=user.id, text='texte', is_spam=is_spam,
+                            confidence=confidence,
+                            analyzed_at=datetime.utcnow() - age)
+    analysis.set_indicators([])
+    analysis.set_flags({})
+    return analysis
+
+
+def test_rollup_matches_rebuild_after_inserts_and_deletes(app):
+    user = User(name='Stats', email='stats@example.com')
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+
+    ages = [timedelta(minutes=m) for m in (1, 30, 90, 23 * 60 + 50, 24 * 60 - 1,
+                                            24 * 60 + 1, 24 * 60 + 50, 3 * 24 * 60)]
+    analyses = [_analysis(user, age, is_spam=i % 2 == 0, confidence=10.0 * i)
+                for i, age in enumerate(ages)]
+    analysis_writer.save(analyses)
+
+    # Suppression comme delete_analysis
+    for analysis in (analyses[1], analyses[6]):
+        UserSpamStats.apply(db.session, [analysis.to_row()], sign=-1)
+        db.session.delete(analysis)
+    db.session.commit()
+
+    assert UserSpamStats.check() == []
+    before = UserSpamStats.read(user.id)
+
+    # Fenêtre exacte de 24h, comme l'agrégat brut
+    raw = SpamAnalysis.aggregate_stats(user.id, datetime.utcnow() - timedelta(hours=24))
+    assert (before['recent_total'], before['recent_spam']) == (4, 3)
+    assert (before['recent_total'], before['recent_spam']) == \
+        (raw['recent_total'], raw['recent_spam'])
+
+    with db.engine.begin() as conn:
+        UserSpamStats.rebuild(conn)
+    db.session.expire_all()
+    assert UserSpamStats.read(user.id) == before
+    assert UserSpamStats.check() == []
@@ -0,0 +1,25 @@
+import os
+
+import pandas as pd
+import pytest
+
+from app.services.text_preprocessor import nettoyage_texte
+from benchmarks.tokenizer import CSV_PATH, nettoyage_texte_reference
+
+
+def test_tokens_match_the_reference_on_the_training_corpus():
+    if not os.path.exists(CSV_PATH):
+        pytest.skip(f"Corpus absent: {CSV_PATH}")
+    messages = pd.read_csv(CSV_PATH)['text_fr'].tolist()
+
+    mismatches = [message for message in messages
+                  if nettoyage_texte(message) != nettoyage_texte_reference(message)]
+    assert mismatches == []
+
+
+@pytest.mark.parametrize('message', [
+    None, float('nan'), '', '   ', "L'été: GRATUIT!!! 100€ -> www.exemple.fr",
+    'Déjà-vu… « Cliquez » ici', 'ÉTÉ Être DÉJÀ',
+])
+def test_tokens_match_the_reference_on_edge_cases(message):
+    assert nettoyage_texte(message) == nettoyage_texte_reference(message)
@@ -4,14 +4,28 @@ Script d'entraînement et sauvegarde du modèle ML de détection de spam
 
 Ce script:
 1. Charge le dataset de spam en français
-2. Prétraite les textes (nettoyage, suppression stopwords)
+2. Prétraite les textes (nettoyage, suppression stopwords), une seule fois
+   par message, en parallèle sur tous les cœurs
 3. Entraîne un modèle Naive Bayes avec TF-IDF
 4. Sauvegarde le modèle et les transformers pour utilisation en production
+5. Exporte les paramètres au format compact (tableaux NumPy mappables)
+
+Les tokens sont mis en cache dans model/token_cache/, sous une clé formée
+de l'empreinte du CSV et de celle de text_preprocessor.py: un nouvel
+entraînement sur les mêmes données ne re-tokenise rien.
+
+Usage (depuis backend/):
+    python train_model.py [--workers N] [--no-cache]
 """
 
+import argparse
 import os
 import sys
 import pickle
+import time
+from multiprocessing import Pool
+
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
@@ -23,20 +37,86 @@ backend_dir = os.path.dirname(__file__)
 sys.path.insert(0, backend_dir)
 
 # Importer la fonction de nettoyage depuis le module partagé
+from app.services import text_preprocessor
 from app.services.text_preprocessor import nettoyage_texte
+from app.services.model_store import file_fingerprint, publish_model
 
 # Chemin vers le dossier model
 MODEL_DIR = os.path.join(backend_dir, 'model')
 os.makedirs(MODEL_DIR, exist_ok=True)
 
+# Cache des textes tokenisés
+TOKEN_CACHE_DIR = os.path.join(MODEL_DIR, 'token_cache')
+
+
+def deja_tokenise(tokens):
+    """Analyzer identité: les textes sont déjà passés par nettoyage_texte."""
+    return tokens
+
+
+def tokenize_corpus(texts, workers):
+    """
+    Tokenise chaque message une seule fois avec nettoyage_texte.
+
+    Args:
+        texts (list): Messages du dataset
+        workers (int): Nombre de processus (1: dans le processus courant)
+
+    Returns:
+        list: Liste de tokens par message, dans l'ordre des textes
+    """
+    if workers <= 1:
+        return [nettoyage_texte(text) for text in texts]
+
+    chunksize = max(1, len(texts) // (workers * 8))
+    with Pool(workers) as pool:
+        return pool.map(nettoyage_texte, texts, chunksize=chunksize)
+
+
+def load_tokens(csv_path, texts, workers, use_cache=True):
+    """
+    Tokens du dataset, depuis le cache disque si possible.
+
+    La clé combine l'empreinte du CSV et celle du préprocesseur: modifier
+    les données ou nettoyage_texte invalide le cache.
 
-def train_and_save_model():
+    Returns:
+        tuple: (tokens, True si lus depuis le cache)
+    """
+    key = f"{file_fingerprint([csv_path])}-{file_fingerprint([text_preprocessor.__file__])}"
+    cache_path = os.path.join(TOKEN_CACHE_DIR, f'{key}.pkl')
+
+    if use_cache and os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            tokens = pickle.load(f)
+        if len(tokens) == len(texts):
+            return tokens, True
+
+    tokens = tokenize_corpus(texts, workers)
+
+    if use_cache:
+        os.makedirs(TOKEN_CACHE_DIR, exist_ok=True)
+        with open(cache_path + '.tmp', 'wb') as f:
+            pickle.dump(tokens, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(cache_path + '.tmp', cache_path)
+
+    return tokens, False
+
+
+def train_and_save_model(workers=None, use_cache=True):
     """
     Entraîne le modèle et sauvegarde tous les composants nécessaires.
 
+    Args:
+        workers (int): Processus de tokenisation (défaut: nombre de cœurs)
+        use_cache (bool): Lire/écrire le cache des tokens
+
     Returns:
         dict: Métriques d'évaluation du modèle
     """
+    workers = workers or os.cpu_count() or 1
+    timings = {}
+
     print("=" * 60)
     print("ENTRAINEMENT DU MODELE DE DETECTION DE SPAM")
     print("=" * 60)
@@ -45,44 +125,57 @@ def train_and_save_model():
     csv_path = os.path.join(os.path.dirname(__file__), 'french_spam_only.csv')
     print(f"\n[1] Chargement du dataset: {csv_path}")
 
+    start = time.perf_counter()
     df = pd.read_csv(csv_path)
+    timings['load'] = time.perf_counter() - start
     print(f"   - Nombre total de messages: {len(df)}")
     print(f"   - Distribution des classes:")
     print(df['labels'].value_counts().to_string().replace('\n', '\n     '))
 
-    # 2. Preparation des donnees
-    X = df['text_fr']
+    # 2. Preparation des donnees: tokenisation unique de tout le dataset
+    texts = df['text_fr'].tolist()
     y = df['labels']
 
-    # Decoupage train/test (80/20)
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
+    start = time.perf_counter()
+    tokens, cached = load_tokens(csv_path, texts, workers, use_cache)
+    timings['tokenize'] = time.perf_counter() - start
+
+    # Decoupage train/test (80/20), sur les indices des messages
+    train_idx, test_idx, y_train, y_test = train_test_split(
+        np.arange(len(texts)), y, test_size=0.2, random_state=42, stratify=y
     )
-    print(f"\n[2] Decoupage des donnees:")
+    X_train = [tokens[i] for i in train_idx]
+    X_test = [tokens[i] for i in test_idx]
+    print(f"\n[2] Tokenisation et decoupage des donnees:")
+    print(f"   - Tokens: {'cache' if cached else f'{workers} processus'}")
     print(f"   - Entrainement: {len(X_train)} messages")
     print(f"   - Test: {len(X_test)} messages")
 
-    # 3. Vectorisation avec Bag of Words
+    # 3. Vectorisation avec Bag of Words (sur les tokens deja calcules)
     print("\n[3] Vectorisation (Bag of Words + TF-IDF)...")
-    bow_transformer = CountVectorizer(analyzer=nettoyage_texte)
-    bow_transformer.fit(X_train)
-    X_train_bow = bow_transformer.transform(X_train)
+    start = time.perf_counter()
+    bow_transformer = CountVectorizer(analyzer=deja_tokenise)
+    X_train_bow = bow_transformer.fit_transform(X_train)
     print(f"   - Vocabulaire: {len(bow_transformer.vocabulary_)} mots uniques")
 
     # 4. Transformation TF-IDF
     tfidf_transformer = TfidfTransformer()
-    tfidf_transformer.fit(X_train_bow)
-    X_train_tfidf = tfidf_transformer.transform(X_train_bow)
+    X_train_tfidf = tfidf_transformer.fit_transform(X_train_bow)
+    timings['vectorize'] = time.perf_counter() - start
 
     # 5. Entrainement du modele Naive Bayes
     print("\n[4] Entrainement du modele Naive Bayes...")
+    start = time.perf_counter()
     model = MultinomialNB()
     model.fit(X_train_tfidf, y_train)
+    timings['fit'] = time.perf_counter() - start
 
     # 6. Evaluation sur le jeu de test
+    start = time.perf_counter()
     X_test_bow = bow_transformer.transform(X_test)
     X_test_tfidf = tfidf_transformer.transform(X_test_bow)
     predictions = model.predict(X_test_tfidf)
+    timings['evaluate'] = time.perf_counter() - start
 
     accuracy = accuracy_score(y_test, predictions)
     print(f"\n[5] Performance du modele:")
@@ -91,9 +184,16 @@ def train_and_save_model():
     report = classification_report(y_test, predictions)
     print("   " + report.replace('\n', '\n   '))
 
+    print("\n   Durees par etape:")
+    for stage, seconds in timings.items():
+        print(f"   - {stage:<10}: {seconds:.2f}s")
+
     # 7. Sauvegarde des composants
     print("\n[6] Sauvegarde du modele...")
 
+    # En production, le vectoriseur recoit du texte brut
+    bow_transformer.set_params(analyzer=nettoyage_texte)
+
     model_data = {
         'bow_transformer': bow_transformer,
         'tfidf_transformer': tfidf_transformer,
@@ -101,21 +201,32 @@ def train_and_save_model():
         'accuracy': accuracy
     }
 
+    # Export compact (mappé en mémoire par les workers) puis pickle, par
+    # renommage atomique: les workers en cours basculent sur le nouveau modèle
     model_path = os.path.join(MODEL_DIR, 'spam_model.pkl')
-    with open(model_path, 'wb') as f:
-        pickle.dump(model_data, f)
+    compact_dir = os.path.join(MODEL_DIR, 'spam_model_compact')
+    publish_model(model_data, model_path, compact_dir)
 
     print(f"   [OK] Modele sauvegarde: {model_path}")
+    print(f"   [OK] Modele compact exporte: {compact_dir}")
     print("=" * 60)
 
     return {
         'accuracy': accuracy,
         'vocab_size': len(bow_transformer.vocabulary_),
         'train_size': len(X_train),
-        'test_size': len(X_test)
+        'test_size': len(X_test),
+        'timings': timings
     }
 
 
 if __name__ == '__main__':
-    metrics = train_and_save_model()
+    parser = argparse.ArgumentParser(description="Entrainement du modele de detection de spam")
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processus de tokenisation (defaut: nombre de coeurs)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Ne pas utiliser le cache des tokens')
+    args = parser.parse_args()
+
+    metrics = train_and_save_model(workers=args.workers, use_cache=not args.no_cache)
     print(f"\n[SUCCESS] Entrainement termine avec une accuracy de {metrics['accuracy']:.2%}")